@@ -0,0 +1,33 @@
+"""Add conditional GET validators to rss_sources
+
+Revision ID: a3c91e5f2b7d
+Revises: 45ff66ae7419
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c91e5f2b7d'
+down_revision: Union[str, Sequence[str], None] = '45ff66ae7419'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rss_sources', sa.Column('etag', sa.String(length=255), nullable=True))
+    op.add_column('rss_sources', sa.Column('last_modified', sa.String(length=100), nullable=True))
+    op.add_column('rss_sources', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('rss_sources') as batch_op:
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('last_modified')
+        batch_op.drop_column('etag')
@@ -0,0 +1,41 @@
+"""Add the materialized prediction_accuracy table
+
+Revision ID: a8d3f5e1c642
+Revises: f1b6e8c3a207
+Create Date: 2026-10-17 17:48:31.920644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f5e1c642'
+down_revision: Union[str, Sequence[str], None] = 'f1b6e8c3a207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('prediction_accuracy',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stock_symbol', sa.String(length=20), nullable=False),
+    sa.Column('algorithm_used', sa.String(length=100), nullable=False),
+    sa.Column('sample_count', sa.Integer(), nullable=False),
+    sa.Column('mean_accuracy', sa.Float(), nullable=True),
+    sa.Column('mean_absolute_error', sa.Float(), nullable=True),
+    sa.Column('mean_absolute_percentage_error', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stock_symbol', 'algorithm_used', name='uq_prediction_accuracy')
+    )
+    op.create_index(op.f('ix_prediction_accuracy_id'), 'prediction_accuracy', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_prediction_accuracy_id'), table_name='prediction_accuracy')
+    op.drop_table('prediction_accuracy')
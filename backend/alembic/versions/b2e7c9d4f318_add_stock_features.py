@@ -0,0 +1,46 @@
+"""Add the stock_features feature store table
+
+Revision ID: b2e7c9d4f318
+Revises: a8d3f5e1c642
+Create Date: 2026-10-17 19:12:54.662310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e7c9d4f318'
+down_revision: Union[str, Sequence[str], None] = 'a8d3f5e1c642'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_features',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.Column('close_price', sa.Float(), nullable=False),
+    sa.Column('return_1d', sa.Float(), nullable=True),
+    sa.Column('return_5d', sa.Float(), nullable=True),
+    sa.Column('return_20d', sa.Float(), nullable=True),
+    sa.Column('volatility_20d', sa.Float(), nullable=True),
+    sa.Column('volume_zscore_20d', sa.Float(), nullable=True),
+    sa.Column('news_count', sa.Integer(), nullable=False),
+    sa.Column('news_sentiment', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stock_features_id'), 'stock_features', ['id'], unique=False)
+    op.create_index('idx_feature_symbol_date', 'stock_features', ['symbol', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_feature_symbol_date', table_name='stock_features')
+    op.drop_index(op.f('ix_stock_features_id'), table_name='stock_features')
+    op.drop_table('stock_features')
@@ -0,0 +1,39 @@
+"""Add pipeline watermarks for incremental aggregation
+
+Revision ID: b7e2d4a19c05
+Revises: a3c91e5f2b7d
+Create Date: 2026-10-17 10:03:48.215664
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4a19c05'
+down_revision: Union[str, Sequence[str], None] = 'a3c91e5f2b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pipeline_watermarks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_pipeline_watermarks_id'), 'pipeline_watermarks', ['id'], unique=False)
+    op.create_index(op.f('ix_aggregated_news_published_date'), 'aggregated_news', ['published_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_aggregated_news_published_date'), table_name='aggregated_news')
+    op.drop_index(op.f('ix_pipeline_watermarks_id'), table_name='pipeline_watermarks')
+    op.drop_table('pipeline_watermarks')
@@ -0,0 +1,52 @@
+"""Add watchlist stocks and news stock tags
+
+Revision ID: c4f8a61e0d93
+Revises: b7e2d4a19c05
+Create Date: 2026-10-17 11:26:05.731942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a61e0d93'
+down_revision: Union[str, Sequence[str], None] = 'b7e2d4a19c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('watchlist_stocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=True),
+    sa.Column('aliases', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('symbol')
+    )
+    op.create_index(op.f('ix_watchlist_stocks_id'), 'watchlist_stocks', ['id'], unique=False)
+    op.create_table('news_stock_tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('news_id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['news_id'], ['news.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('news_id', 'symbol', name='uq_news_stock_tag')
+    )
+    op.create_index(op.f('ix_news_stock_tags_id'), 'news_stock_tags', ['id'], unique=False)
+    op.create_index(op.f('ix_news_stock_tags_symbol'), 'news_stock_tags', ['symbol'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_news_stock_tags_symbol'), table_name='news_stock_tags')
+    op.drop_index(op.f('ix_news_stock_tags_id'), table_name='news_stock_tags')
+    op.drop_table('news_stock_tags')
+    op.drop_index(op.f('ix_watchlist_stocks_id'), table_name='watchlist_stocks')
+    op.drop_table('watchlist_stocks')
@@ -0,0 +1,34 @@
+"""Make raw_news.link unique
+
+Revision ID: c8e1f4a7b263
+Revises: b2e7c9d4f318
+Create Date: 2026-10-17 20:41:07.219584
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f4a7b263'
+down_revision: Union[str, Sequence[str], None] = 'b2e7c9d4f318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the first stored row of any duplicated link, which the
+    # aggregation watermark has already seen
+    op.execute(
+        "DELETE FROM raw_news WHERE id NOT IN "
+        "(SELECT MIN(id) FROM raw_news GROUP BY link)"
+    )
+    op.create_index('idx_raw_news_link', 'raw_news', ['link'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_raw_news_link', table_name='raw_news')
@@ -0,0 +1,53 @@
+"""Add polling schedule and health stats to rss_sources
+
+Revision ID: d92b7f03e8a1
+Revises: c4f8a61e0d93
+Create Date: 2026-10-17 12:48:17.094526
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd92b7f03e8a1'
+down_revision: Union[str, Sequence[str], None] = 'c4f8a61e0d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('rss_sources', sa.Column('last_polled_at', sa.DateTime(), nullable=True))
+    op.add_column('rss_sources', sa.Column('last_success_at', sa.DateTime(), nullable=True))
+    op.add_column('rss_sources', sa.Column('next_poll_at', sa.DateTime(), nullable=True))
+    op.add_column('rss_sources', sa.Column('poll_interval_seconds', sa.Integer(), nullable=True))
+    op.add_column('rss_sources', sa.Column('avg_publish_interval_seconds', sa.Float(), nullable=True))
+    op.add_column('rss_sources', sa.Column('last_entry_published_at', sa.DateTime(), nullable=True))
+    op.add_column('rss_sources', sa.Column('consecutive_failures', sa.Integer(), nullable=True))
+    op.add_column('rss_sources', sa.Column('total_polls', sa.Integer(), nullable=True))
+    op.add_column('rss_sources', sa.Column('total_failures', sa.Integer(), nullable=True))
+    op.add_column('rss_sources', sa.Column('circuit_open_until', sa.DateTime(), nullable=True))
+    op.add_column('rss_sources', sa.Column('last_error', sa.String(length=500), nullable=True))
+    op.add_column('rss_sources', sa.Column('tls_verified', sa.Boolean(), nullable=True))
+    op.create_index(op.f('ix_rss_sources_next_poll_at'), 'rss_sources', ['next_poll_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_rss_sources_next_poll_at'), table_name='rss_sources')
+    with op.batch_alter_table('rss_sources') as batch_op:
+        batch_op.drop_column('tls_verified')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('circuit_open_until')
+        batch_op.drop_column('total_failures')
+        batch_op.drop_column('total_polls')
+        batch_op.drop_column('consecutive_failures')
+        batch_op.drop_column('last_entry_published_at')
+        batch_op.drop_column('avg_publish_interval_seconds')
+        batch_op.drop_column('poll_interval_seconds')
+        batch_op.drop_column('next_poll_at')
+        batch_op.drop_column('last_success_at')
+        batch_op.drop_column('last_polled_at')
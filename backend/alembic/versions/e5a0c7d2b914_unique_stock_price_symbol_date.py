@@ -0,0 +1,35 @@
+"""Make the stock_prices (symbol, date) index unique
+
+Revision ID: e5a0c7d2b914
+Revises: d92b7f03e8a1
+Create Date: 2026-10-17 14:05:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a0c7d2b914'
+down_revision: Union[str, Sequence[str], None] = 'd92b7f03e8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the most recently written row of any duplicated (symbol, date)
+    op.execute(
+        "DELETE FROM stock_prices WHERE id NOT IN "
+        "(SELECT MAX(id) FROM stock_prices GROUP BY symbol, date)"
+    )
+    op.drop_index('idx_symbol_date', table_name='stock_prices')
+    op.create_index('idx_symbol_date', 'stock_prices', ['symbol', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_symbol_date', table_name='stock_prices')
+    op.create_index('idx_symbol_date', 'stock_prices', ['symbol', 'date'], unique=False)
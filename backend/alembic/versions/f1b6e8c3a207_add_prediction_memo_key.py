@@ -0,0 +1,37 @@
+"""Add the prediction memo key (days_ahead, input_version)
+
+Revision ID: f1b6e8c3a207
+Revises: e5a0c7d2b914
+Create Date: 2026-10-17 16:22:08.504117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b6e8c3a207'
+down_revision: Union[str, Sequence[str], None] = 'e5a0c7d2b914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('predictions', sa.Column('days_ahead', sa.Integer(), nullable=True))
+    op.add_column('predictions', sa.Column('input_version', sa.String(length=64), nullable=True))
+    op.create_index(
+        'uq_prediction_inputs', 'predictions',
+        ['stock_symbol', 'prediction_date', 'days_ahead', 'algorithm_used', 'input_version'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_prediction_inputs', table_name='predictions')
+    with op.batch_alter_table('predictions') as batch_op:
+        batch_op.drop_column('input_version')
+        batch_op.drop_column('days_ahead')
@@ -1,14 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, WebSocket
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..services.stock_service import StockService
 from ..services.news_service import NewsService
+from ..services.watchlist_service import WatchlistService
+from ..services.feed_scheduler import FeedScheduler
+from ..services.indicator_service import IndicatorService
+from ..services.prediction_service import PredictionService, PREDICTION_LOOKBACK_DAYS, TREND_ALGORITHM
+from ..services.predictors import PREDICTORS
+from ..services.model_store import ModelStore, ModelCache, ModelTrainer
+from ..services.backtest import BacktestEngine
+from ..services.feature_store import FeatureStore
+from ..services.downsampling import RESAMPLE_RULES
+from ..services.quote_stream import QuoteBroadcaster
+from ..services.blocking_io import run_blocking
 from ..schemas import (
     StockPriceResponse, StockHistoryResponse, NewsResponse, 
-    PredictionResponse, StockRequest, NewsRequest, PredictionRequest
+    PredictionResponse, StockRequest, NewsRequest, PredictionRequest, BacktestRequest,
+    WatchlistStock, WatchlistStockCreate
 )
 from ..models import StockPrice, News, Prediction, AggregatedNews, RSSSource, RawNews
 
@@ -16,7 +32,16 @@ router = APIRouter(prefix="/api", tags=["stock-analyzer"])
 
 # Initialize services
 stock_service = StockService()
-news_service = NewsService()
+watchlist_service = WatchlistService()
+news_service = NewsService(watchlist_service)
+feed_scheduler = FeedScheduler(news_service)
+indicator_service = IndicatorService(stock_service)
+feature_store = FeatureStore(stock_service, watchlist_service)
+model_store = ModelStore()
+model_trainer = ModelTrainer(feature_store, model_store)
+prediction_service = PredictionService(stock_service, watchlist_service, feature_store, ModelCache(model_store))
+backtest_engine = BacktestEngine(stock_service)
+quote_broadcaster = QuoteBroadcaster(stock_service)
 
 @router.get("/health")
 async def health_check():
@@ -25,13 +50,10 @@ async def health_check():
 
 # Stock Price Routes
 @router.get("/stock/price", response_model=StockPriceResponse)
-async def get_current_stock_price(
-    symbol: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
+async def get_current_stock_price(symbol: Optional[str] = None):
     """Get current stock price"""
     try:
-        current_price_data = stock_service.get_current_price(symbol)
+        current_price_data = await stock_service.get_current_price_async(symbol)
         
         if current_price_data is None:
             raise HTTPException(status_code=404, detail="Could not fetch current stock price")
@@ -47,25 +69,85 @@ async def get_current_stock_price(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stock price: {str(e)}")
 
+@router.websocket("/stock/stream")
+async def stream_stock_quotes(websocket: WebSocket, symbols: Optional[str] = None):
+    """Stream live quotes of comma-separated symbols: a snapshot, then changed fields"""
+    await websocket.accept()
+    symbol_list = list(dict.fromkeys(
+        symbol.strip() for symbol in (symbols or stock_service.default_symbol).split(",") if symbol.strip()
+    ))
+    if len(symbol_list) > quote_broadcaster.max_symbols:
+        # 1008: policy violation
+        await websocket.close(code=1008, reason=f"At most {quote_broadcaster.max_symbols} symbols per stream")
+        return
+    queue = quote_broadcaster.new_queue()
+    for symbol in symbol_list:
+        quote_broadcaster.subscribe(symbol, queue)
+    
+    async def forward_quotes():
+        while True:
+            await websocket.send_json(await queue.get())
+    
+    async def wait_for_disconnect():
+        # Client messages are not used; receiving detects the disconnect
+        while True:
+            await websocket.receive_text()
+    
+    tasks = [asyncio.create_task(forward_quotes()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # Collects the disconnect (or send error) and the cancellations
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        for symbol in symbol_list:
+            quote_broadcaster.unsubscribe(symbol, queue)
+
 @router.get("/stock/history", response_model=StockHistoryResponse)
 async def get_stock_history(
     symbol: Optional[str] = None,
     days: Optional[int] = 30,
-    db: Session = Depends(get_db)
+    interval: Optional[str] = None,
+    max_points: Optional[int] = Query(None, ge=3),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get historical stock data"""
+    """Get historical stock data, optionally resampled (1d, 1w, 1mo) and decimated to max_points"""
+    if interval is not None and interval not in RESAMPLE_RULES:
+        raise HTTPException(status_code=400, detail=f"Invalid interval, expected one of: {', '.join(RESAMPLE_RULES)}")
     try:
-        stock_prices = stock_service.get_stock_history_from_db(db, symbol, days)
+        if interval is None and max_points is None:
+            stock_prices = await stock_service.get_stock_history_from_db_async(db, symbol, days)
+        else:
+            stock_prices = await stock_service.get_stock_chart_async(db, symbol, days, interval or '1d', max_points)
         
         return StockHistoryResponse(
             symbol=symbol or stock_service.default_symbol,
             data=stock_prices,
-            total_records=len(stock_prices)
+            total_records=len(stock_prices),
+            interval=interval
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stock history: {str(e)}")
 
+@router.get("/stock/indicators")
+async def get_stock_indicators(
+    symbols: Optional[str] = None,
+    days: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get technical indicators for comma-separated symbols (default: the watchlist)"""
+    try:
+        if symbols:
+            symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+        else:
+            symbol_list = await run_in_threadpool(watchlist_service.get_active_symbols, db)
+        indicators = await run_in_threadpool(indicator_service.get_indicators, db, symbol_list, days)
+        return {"indicators": indicators}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing indicators: {str(e)}")
+
 @router.post("/stock/update")
 async def update_stock_data(
     background_tasks: BackgroundTasks,
@@ -74,9 +156,10 @@ async def update_stock_data(
 ):
     """Update stock data from external source"""
     try:
-        success = stock_service.update_stock_data(db, symbol)
+        success = await run_blocking(stock_service.update_stock_data, db, symbol)
         
         if success:
+            await run_in_threadpool(feature_store.update, db, [symbol or stock_service.default_symbol])
             return {"message": "Stock data updated successfully", "symbol": symbol or stock_service.default_symbol}
         else:
             raise HTTPException(status_code=500, detail="Failed to update stock data")
@@ -84,17 +167,49 @@ async def update_stock_data(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating stock data: {str(e)}")
 
+@router.post("/stock/update-watchlist")
+async def update_watchlist_stock_data(db: Session = Depends(get_db)):
+    """Update stock data of every active watchlist symbol with batched downloads"""
+    try:
+        symbols = await run_in_threadpool(watchlist_service.get_active_symbols, db)
+        result = await run_blocking(stock_service.update_stocks_data, db, symbols)
+        if result["updated"]:
+            await run_in_threadpool(feature_store.update, db, result["updated"])
+        return {"message": "Watchlist stock data updated", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating watchlist stock data: {str(e)}")
+
+# Watchlist Routes
+@router.get("/watchlist", response_model=List[WatchlistStock])
+async def get_watchlist(db: AsyncSession = Depends(get_async_db)):
+    """Get the active watchlist used for news tagging and refreshes"""
+    try:
+        return await watchlist_service.get_active_stocks_async(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching watchlist: {str(e)}")
+
+@router.post("/watchlist", response_model=WatchlistStock)
+async def add_watchlist_stock(
+    stock: WatchlistStockCreate,
+    db: Session = Depends(get_db)
+):
+    """Add a stock and its news aliases to the watchlist"""
+    try:
+        return await run_in_threadpool(watchlist_service.add_stock, db, stock.symbol, stock.name, stock.aliases)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating watchlist: {str(e)}")
+
 # News Routes
 @router.get("/news", response_model=NewsResponse)
 async def get_news(
     stock_symbol: Optional[str] = None,
     limit: Optional[int] = 5,
     days: Optional[int] = 7,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get news for a specific stock"""
     try:
-        news_items = news_service.get_news_from_db(db, stock_symbol, limit, days)
+        news_items = await news_service.get_news_from_db_async(db, stock_symbol, limit, days)
         
         return NewsResponse(
             news=news_items,
@@ -108,11 +223,11 @@ async def get_news(
 async def get_news_summary(
     stock_symbol: Optional[str] = None,
     limit: Optional[int] = 5,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get news summary for a specific stock"""
     try:
-        summary = news_service.get_latest_news_summary(db, stock_symbol, limit)
+        summary = await news_service.get_latest_news_summary_async(db, stock_symbol, limit)
         return summary
         
     except Exception as e:
@@ -126,9 +241,10 @@ async def update_news_data(
 ):
     """Update news data from RSS feed"""
     try:
-        success = news_service.update_news_data(db, stock_symbol)
+        success = await run_blocking(news_service.update_news_data, db, stock_symbol)
         
         if success:
+            await run_in_threadpool(feature_store.update_news, db)
             return {"message": "News data updated successfully", "symbol": stock_symbol or news_service.default_stock}
         else:
             raise HTTPException(status_code=500, detail="Failed to update news data")
@@ -139,25 +255,42 @@ async def update_news_data(
 @router.post("/news/discover-sources")
 async def discover_rss_sources(db: Session = Depends(get_db)):
     """Discover and store RSS sources from aggregators."""
-    news_service.discover_and_store_rss_sources(db)
+    await run_in_threadpool(news_service.discover_and_store_rss_sources, db)
     return {"status": "sources discovered"}
 
 @router.post("/news/fetch-raw")
 async def fetch_raw_news(db: Session = Depends(get_db)):
     """Fetch and store raw news from all RSS sources."""
-    news_service.fetch_and_store_raw_news(db)
-    return {"status": "raw news fetched"}
+    counts = await run_blocking(news_service.fetch_and_store_raw_news, db)
+    return {"status": "raw news fetched", **counts}
+
+@router.get("/news/sources/health")
+async def get_rss_sources_health(db: AsyncSession = Depends(get_async_db)):
+    """Get polling schedule and health stats of every RSS source."""
+    try:
+        rss_sources = (await db.execute(select(RSSSource).order_by(RSSSource.id))).scalars().all()
+        return [news_service.feed_health.health(rss_source) for rss_source in rss_sources]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching source health: {str(e)}")
+
+@router.post("/news/sources/poll")
+async def poll_due_rss_sources(db: Session = Depends(get_db)):
+    """Fetch raw news from the RSS sources that are due according to the scheduler."""
+    counts = await run_blocking(feed_scheduler.run_due, db)
+    return {"status": "due sources polled", **counts}
 
 @router.post("/news/deduplicate")
 async def deduplicate_news(db: Session = Depends(get_db)):
     """Deduplicate raw news and store in aggregated news table."""
-    news_service.deduplicate_and_store_aggregated_news(db)
-    return {"status": "news deduplicated"}
+    counts = await run_in_threadpool(news_service.deduplicate_and_store_aggregated_news, db)
+    return {"status": "news deduplicated", **counts}
 
 @router.get("/news/aggregated")
-async def get_aggregated_news(limit: int = 10, db: Session = Depends(get_db)):
+async def get_aggregated_news(limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     """Get deduplicated, aggregated news for the frontend."""
-    news = db.query(AggregatedNews).order_by(AggregatedNews.published_date.desc()).limit(limit).all()
+    news = (await db.execute(
+        select(AggregatedNews).order_by(AggregatedNews.published_date.desc()).limit(limit)
+    )).scalars().all()
     return [
         {
             "title": n.title,
@@ -170,86 +303,167 @@ async def get_aggregated_news(limit: int = 10, db: Session = Depends(get_db)):
     ]
 
 # Prediction Routes
+def _predict(db: Session, symbol: str, days_ahead: int, algorithm: str) -> PredictionResponse:
+    """Prediction of a symbol with its historical accuracy; runs in the threadpool"""
+    if algorithm != TREND_ALGORITHM:
+        # Inference with the cached trained model on the stored feature vector
+        prediction = prediction_service.predict_with_model(db, symbol, days_ahead, algorithm)
+        if prediction is None:
+            raise HTTPException(status_code=404, detail=f"No trained {algorithm} model or current features for {symbol}")
+        return PredictionResponse(
+            stock_symbol=symbol,
+            prediction=prediction,
+            historical_accuracy=prediction_service.get_historical_accuracy(db, symbol, algorithm)
+        )
+    
+    # Get recent stock data
+    stock_prices = stock_service.get_stock_history_arrays(db, symbol, PREDICTION_LOOKBACK_DAYS)
+    
+    if len(stock_prices['close_price']) == 0:
+        raise HTTPException(status_code=404, detail="No stock data available for prediction")
+    
+    # Simple trend prediction from the last few closes, reused until new prices arrive
+    prediction = prediction_service.predict(db, symbol, stock_prices, days_ahead)
+    if prediction is None:
+        raise HTTPException(status_code=400, detail="Insufficient data for prediction")
+    
+    return PredictionResponse(
+        stock_symbol=symbol,
+        prediction=prediction,
+        historical_accuracy=prediction_service.get_historical_accuracy(db, symbol, prediction.algorithm_used)
+    )
+
 @router.get("/prediction", response_model=PredictionResponse)
 async def get_prediction(
     stock_symbol: Optional[str] = None,
     days_ahead: Optional[int] = 1,
+    algorithm: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Get stock price prediction"""
+    algorithm = algorithm or TREND_ALGORITHM
+    if algorithm != TREND_ALGORITHM and algorithm not in PREDICTORS:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm {algorithm}")
     try:
-        # For MVP, we'll implement a simple prediction algorithm
-        # This is a placeholder - you can enhance this with ML models later
-        
-        # Get recent stock data
-        stock_prices = stock_service.get_stock_history_from_db(db, stock_symbol, 10)
-        
-        if not stock_prices:
-            raise HTTPException(status_code=404, detail="No stock data available for prediction")
-        
-        # Simple prediction: if last 3 days were up, predict up; else down
-        recent_prices = sorted(stock_prices, key=lambda x: x.date)[-3:]
-        
-        if len(recent_prices) >= 3:
-            # Calculate trend
-            price_changes = []
-            for i in range(1, len(recent_prices)):
-                change = (recent_prices[i].close_price - recent_prices[i-1].close_price) / recent_prices[i-1].close_price
-                price_changes.append(change)
-            
-            # Simple trend analysis
-            avg_change = sum(price_changes) / len(price_changes)
-            current_price = recent_prices[-1].close_price
-            
-            # Predict next day price (simple linear extrapolation)
-            predicted_price = current_price * (1 + avg_change)
-            confidence_score = min(abs(avg_change) * 10, 0.8)  # Simple confidence based on trend strength
-            
-            # Create prediction record
-            prediction = Prediction(
-                stock_symbol=stock_symbol or stock_service.default_symbol,
-                prediction_date=datetime.now() + timedelta(days=days_ahead),
-                predicted_price=round(predicted_price, 2),
-                confidence_score=round(confidence_score, 3),
-                prediction_type="daily",
-                algorithm_used="simple_trend_analysis"
-            )
-            
-            db.add(prediction)
-            db.commit()
-            
-            return PredictionResponse(
-                stock_symbol=stock_symbol or stock_service.default_symbol,
-                prediction=prediction,
-                historical_accuracy=None  # Will be calculated when actual prices are available
-            )
-        else:
-            raise HTTPException(status_code=400, detail="Insufficient data for prediction")
+        symbol = stock_symbol or stock_service.default_symbol
+        return await run_in_threadpool(_predict, db, symbol, days_ahead, algorithm)
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating prediction: {str(e)}")
 
+@router.post("/prediction/batch")
+async def batch_predict(
+    symbols: Optional[str] = None,
+    days_ahead: int = 1,
+    db: Session = Depends(get_db)
+):
+    """Predict comma-separated symbols (default: the watchlist) in one vectorized pass"""
+    try:
+        symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else None
+        result = await run_in_threadpool(prediction_service.predict_batch, db, symbol_list, days_ahead)
+        return {"message": "Batch prediction completed", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating batch predictions: {str(e)}")
+
+@router.post("/prediction/backfill-accuracy")
+async def backfill_prediction_accuracy(db: Session = Depends(get_db)):
+    """Resolve stored predictions against actual closes and refresh rolling accuracy"""
+    try:
+        result = await run_in_threadpool(prediction_service.backfill_accuracy, db)
+        return {"message": "Prediction accuracy backfill completed", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error backfilling prediction accuracy: {str(e)}")
+
+@router.post("/backtest")
+async def run_backtest(request: BacktestRequest, db: Session = Depends(get_db)):
+    """Walk-forward backtest of the trend model over stored prices and a parameter grid"""
+    if min(request.windows, default=0) < 2 or min(request.days_ahead, default=0) < 1:
+        raise HTTPException(status_code=400, detail="windows must be at least 2 and days_ahead at least 1")
+    try:
+        return await run_in_threadpool(
+            backtest_engine.run, db, request.symbols, request.start_date,
+            {"window": request.windows, "days_ahead": request.days_ahead},
+            keep_predictions=request.include_predictions
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running backtest: {str(e)}")
+
+@router.post("/features/update")
+async def update_features(
+    symbols: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Incrementally refresh the feature store for comma-separated symbols (default: the watchlist)"""
+    try:
+        symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else None
+        result = await run_in_threadpool(feature_store.update, db, symbol_list)
+        return {"message": "Features updated", **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating features: {str(e)}")
+
+@router.get("/features")
+async def get_features(
+    symbols: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get the latest stored feature vector of comma-separated symbols (default: the watchlist)"""
+    try:
+        if symbols:
+            symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+        else:
+            symbol_list = await run_in_threadpool(watchlist_service.get_active_symbols, db)
+        return await run_in_threadpool(feature_store.get_vectors, db, symbol_list)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching features: {str(e)}")
+
+# Model Routes
+@router.post("/models/train")
+async def train_models(
+    symbols: Optional[str] = None,
+    algorithm: str = "ridge_regression",
+    days_ahead: int = Query(1, ge=1),
+    db: Session = Depends(get_db)
+):
+    """Start background training of a model per symbol (default: the watchlist) on stored features"""
+    if algorithm not in PREDICTORS:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm {algorithm}, expected one of {', '.join(sorted(PREDICTORS))}")
+    try:
+        symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else None
+        return await run_in_threadpool(model_trainer.submit, db, symbol_list, algorithm, days_ahead)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting model training: {str(e)}")
+
+@router.get("/models/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Get the status of a model training job"""
+    job = model_trainer.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
 # Dashboard Route
 @router.get("/dashboard")
 async def get_dashboard_data(
     stock_symbol: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get comprehensive dashboard data"""
     try:
         # Get current stock price
-        current_price = stock_service.get_current_price(stock_symbol)
+        current_price = await stock_service.get_current_price_async(stock_symbol)
         
         # Get recent stock history
-        stock_history = stock_service.get_stock_history_from_db(db, stock_symbol, 30)
+        stock_history = (await stock_service.get_stock_history_arrays_async(db, stock_symbol, 30))['date']
         
         # Get latest news
-        news_summary = news_service.get_latest_news_summary(db, stock_symbol, 5)
+        news_summary = await news_service.get_latest_news_summary_async(db, stock_symbol, 5)
         
         # Get latest prediction
-        latest_prediction = db.query(Prediction).filter(
-            Prediction.stock_symbol == (stock_symbol or stock_service.default_symbol)
-        ).order_by(Prediction.created_at.desc()).first()
+        latest_prediction = await prediction_service.get_latest_prediction_async(
+            db, stock_symbol or stock_service.default_symbol
+        )
         
         dashboard_data = {
             "stock_info": {
@@ -277,10 +491,14 @@ async def update_all_data(
     """Update both stock and news data"""
     try:
         # Update stock data
-        stock_success = stock_service.update_stock_data(db)
+        stock_success = await run_blocking(stock_service.update_stock_data, db)
         
         # Update news data
-        news_success = news_service.update_news_data(db)
+        news_success = await run_blocking(news_service.update_news_data, db)
+        
+        # Refresh the features of the new prices and of the days the news changed
+        if stock_success or news_success:
+            await run_in_threadpool(feature_store.update_news, db)
         
         return {
             "message": "Data update completed",
@@ -1,6 +1,10 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import importlib.util
 import os
 from dotenv import load_dotenv
 
@@ -11,11 +15,43 @@ load_dotenv()
 # For MVP, use SQLite. For production, use PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./stock_analyzer.db")
 
+# Async driver URL for the API read paths: SQLite through aiosqlite and
+# PostgreSQL through asyncpg (both in requirements.txt). Other databases
+# need ASYNC_DATABASE_URL set to a URL with an async driver
+ASYNC_DRIVERS = {
+    "sqlite": ("sqlite+aiosqlite", "aiosqlite"),
+    "postgresql": ("postgresql+asyncpg", "asyncpg"),
+    "postgres": ("postgresql+asyncpg", "asyncpg"),
+}
+
+def async_database_url(url: str) -> str:
+    scheme, separator, rest = url.partition("://")
+    if scheme in ASYNC_DRIVERS:
+        async_scheme, driver = ASYNC_DRIVERS[scheme]
+        if importlib.util.find_spec(driver) is not None:
+            return f"{async_scheme}{separator}{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+def create_async_database_engine(url: str):
+    """Async engine for url, failing with a configuration error when it has no async driver"""
+    try:
+        return create_async_engine(url)
+    except (InvalidRequestError, ImportError) as e:
+        raise RuntimeError(
+            f"No async driver for database URL {make_url(url).render_as_string(hide_password=True)}: "
+            f"install its async driver (aiosqlite, asyncpg) or set ASYNC_DATABASE_URL ({str(e)})"
+        ) from e
+
 # Create SQLAlchemy engine
 engine = create_engine(DATABASE_URL)
+async_engine = create_async_database_engine(ASYNC_DATABASE_URL)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay readable after commit so routes can return them
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Create Base class for models
 Base = declarative_base()
@@ -26,4 +62,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
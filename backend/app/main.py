@@ -1,11 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import os
 from dotenv import load_dotenv
 
-from .database import engine, Base
-from .api.routes import router
+from .database import engine, async_engine, Base
+from .api.routes import router, feed_scheduler, news_service, stock_service, quote_broadcaster, model_trainer
+from .services import blocking_io
 
 # Load environment variables
 load_dotenv()
@@ -13,13 +15,29 @@ load_dotenv()
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers with the application"""
+    if feed_scheduler.enabled:
+        feed_scheduler.start()
+    yield
+    await quote_broadcaster.stop()
+    feed_scheduler.stop()
+    news_service.feed_parser.shutdown()
+    model_trainer.shutdown()
+    blocking_io.shutdown()
+    await async_engine.dispose()
+    if stock_service.hot_window is not None:
+        stock_service.hot_window.close()
+
 # Create FastAPI app
 app = FastAPI(
     title="Stock Analyzer API",
     description="A comprehensive stock analysis and prediction tool for Indian small-cap stocks",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Index, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Index, JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from .database import Base
 from sqlalchemy.orm import relationship
@@ -19,9 +19,10 @@ class StockPrice(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Composite index for efficient querying by symbol and date
+    # Composite index for efficient querying by symbol and date; unique so
+    # price rows can be upserted with ON CONFLICT (symbol, date)
     __table_args__ = (
-        Index('idx_symbol_date', 'symbol', 'date'),
+        Index('idx_symbol_date', 'symbol', 'date', unique=True),
     )
 
 class News(Base):
@@ -73,6 +74,8 @@ class Prediction(Base):
     confidence_score = Column(Float, nullable=True)
     prediction_type = Column(String(50), nullable=False, default="daily")  # daily, weekly, etc.
     algorithm_used = Column(String(100), nullable=False, default="simple_rule")
+    days_ahead = Column(Integer, nullable=True)
+    input_version = Column(String(64), nullable=True)  # Fingerprint of the prices the prediction was made from
     features_used = Column(Text, nullable=True)  # JSON string of features used
     actual_price = Column(Float, nullable=True)  # To be filled when actual price is available
     accuracy = Column(Float, nullable=True)  # To be calculated when actual price is available
@@ -81,14 +84,71 @@ class Prediction(Base):
     # Index for efficient querying
     __table_args__ = (
         Index('idx_symbol_prediction_date', 'stock_symbol', 'prediction_date'),
+        Index('uq_prediction_inputs', 'stock_symbol', 'prediction_date', 'days_ahead',
+              'algorithm_used', 'input_version', unique=True),
     ) 
 
+class StockFeature(Base):
+    """Model for the materialized daily features of a stock"""
+    __tablename__ = "stock_features"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), nullable=False)
+    date = Column(DateTime, nullable=False)
+    close_price = Column(Float, nullable=False)
+    return_1d = Column(Float, nullable=True)
+    return_5d = Column(Float, nullable=True)
+    return_20d = Column(Float, nullable=True)
+    volatility_20d = Column(Float, nullable=True)  # Standard deviation of daily returns
+    volume_zscore_20d = Column(Float, nullable=True)
+    news_count = Column(Integer, nullable=False, default=0)  # News since the previous bar
+    news_sentiment = Column(Float, nullable=True)  # Mean sentiment of that news
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index('idx_feature_symbol_date', 'symbol', 'date', unique=True),
+    )
+
+class PredictionAccuracy(Base):
+    """Model for the rolling accuracy of resolved predictions per symbol and algorithm"""
+    __tablename__ = "prediction_accuracy"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    stock_symbol = Column(String(20), nullable=False)
+    algorithm_used = Column(String(100), nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)  # Resolved predictions in the rolling window
+    mean_accuracy = Column(Float, nullable=True)
+    mean_absolute_error = Column(Float, nullable=True)
+    mean_absolute_percentage_error = Column(Float, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('stock_symbol', 'algorithm_used', name='uq_prediction_accuracy'),
+    )
+
 class RSSSource(Base):
     __tablename__ = 'rss_sources'
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(1000), unique=True, nullable=False)
     source = Column(String(100), nullable=False)  # e.g., Feedspot, GitHub List
     discovered_at = Column(DateTime, default=datetime.utcnow)
+    # Conditional GET validators from the last successful fetch
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(100), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the last parsed body
+    # Polling schedule and health, maintained by FeedHealthPolicy
+    last_polled_at = Column(DateTime, nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True, index=True)
+    poll_interval_seconds = Column(Integer, nullable=True)
+    avg_publish_interval_seconds = Column(Float, nullable=True)  # Learned publish cadence
+    last_entry_published_at = Column(DateTime, nullable=True)
+    consecutive_failures = Column(Integer, default=0)
+    total_polls = Column(Integer, default=0)
+    total_failures = Column(Integer, default=0)
+    circuit_open_until = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
+    tls_verified = Column(Boolean, nullable=True)  # None until the host has been fetched over https
     raw_news = relationship('RawNews', back_populates='rss_source')
 
 class RawNews(Base):
@@ -102,12 +162,47 @@ class RawNews(Base):
     fetched_at = Column(DateTime, default=datetime.utcnow)
     rss_source = relationship('RSSSource', back_populates='raw_news')
 
+    # Unique so concurrent pollers cannot store a link twice and new links
+    # are looked up by index
+    __table_args__ = (
+        Index('idx_raw_news_link', 'link', unique=True),
+    )
+
 class AggregatedNews(Base):
     __tablename__ = 'aggregated_news'
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False)
     description = Column(Text)
-    published_date = Column(DateTime, nullable=False)
+    published_date = Column(DateTime, nullable=False, index=True)
     sources = Column(JSON)  # List of sources that had this news
     additional_info = Column(JSON)  # Optional: extra info from a source
-    created_at = Column(DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PipelineWatermark(Base):
+    """Model for persisting the high-water mark of incremental pipeline steps"""
+    __tablename__ = 'pipeline_watermarks'
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)  # e.g. aggregated_news
+    last_id = Column(Integer, nullable=False, default=0)  # Last processed source row id
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class WatchlistStock(Base):
+    """Model for the tracked stock universe and the aliases used to tag news"""
+    __tablename__ = 'watchlist_stocks'
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), unique=True, nullable=False)
+    name = Column(String(200), nullable=True)
+    aliases = Column(JSON)  # Extra lowercase names matched in headlines, e.g. ["elxsi"]
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class NewsStockTag(Base):
+    """Model for tagging a news item with every watchlist symbol it mentions"""
+    __tablename__ = 'news_stock_tags'
+    id = Column(Integer, primary_key=True, index=True)
+    news_id = Column(Integer, ForeignKey('news.id'), nullable=False)
+    symbol = Column(String(20), nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint('news_id', 'symbol', name='uq_news_stock_tag'),
+    )
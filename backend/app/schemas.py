@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 # Stock Price Schemas
@@ -23,6 +23,10 @@ class StockPrice(StockPriceBase):
     class Config:
         from_attributes = True
 
+class StockBar(StockPriceBase):
+    """Resampled or decimated price bar (not a stored row)"""
+    pass
+
 # News Schemas
 class NewsBase(BaseModel):
     title: str = Field(..., description="News headline")
@@ -73,6 +77,9 @@ class PredictionBase(BaseModel):
     confidence_score: Optional[float] = Field(None, description="Confidence in the prediction (0-1)")
     prediction_type: str = Field(default="daily", description="Type of prediction")
     algorithm_used: str = Field(default="simple_rule", description="Algorithm used for prediction")
+    days_ahead: Optional[int] = Field(None, description="Number of days predicted ahead")
+    input_version: Optional[str] = Field(None, description="Fingerprint of the price data the prediction was made from")
+    features_used: Optional[str] = Field(None, description="JSON snapshot of the feature vector the prediction was made with")
 
 class PredictionCreate(PredictionBase):
     pass
@@ -86,6 +93,23 @@ class Prediction(PredictionBase):
     class Config:
         from_attributes = True
 
+# Watchlist Schemas
+class WatchlistStockBase(BaseModel):
+    symbol: str = Field(..., description="Stock symbol (e.g., TATAELXSI.NS)")
+    name: Optional[str] = Field(None, description="Company name, also matched in news")
+    aliases: List[str] = Field(default_factory=list, description="Extra names matched in news headlines")
+
+class WatchlistStockCreate(WatchlistStockBase):
+    pass
+
+class WatchlistStock(WatchlistStockBase):
+    id: int
+    is_active: bool = True
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 # API Response Schemas
 class StockPriceResponse(BaseModel):
     symbol: str
@@ -96,8 +120,9 @@ class StockPriceResponse(BaseModel):
 
 class StockHistoryResponse(BaseModel):
     symbol: str
-    data: List[StockPrice]
+    data: List[Union[StockPrice, StockBar]]
     total_records: int
+    interval: Optional[str] = None
 
 class NewsResponse(BaseModel):
     news: List[News]
@@ -120,4 +145,11 @@ class NewsRequest(BaseModel):
 
 class PredictionRequest(BaseModel):
     stock_symbol: str = Field(..., description="Stock symbol to predict")
-    days_ahead: Optional[int] = Field(1, description="Number of days to predict ahead") 
\ No newline at end of file
+    days_ahead: Optional[int] = Field(1, description="Number of days to predict ahead") 
+
+class BacktestRequest(BaseModel):
+    symbols: Optional[List[str]] = Field(None, description="Symbols to backtest (default: every stored symbol)")
+    start_date: Optional[datetime] = Field(None, description="First price date replayed (default: all history)")
+    windows: List[int] = Field(default_factory=lambda: [3], description="Closes used per prediction, one run per value")
+    days_ahead: List[int] = Field(default_factory=lambda: [1], description="Bars predicted ahead, one run per value")
+    include_predictions: bool = Field(False, description="Return every daily prediction, not only the scores")
\ No newline at end of file
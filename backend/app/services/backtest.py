@@ -0,0 +1,181 @@
+import itertools
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Tuple
+import logging
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.orm import Session
+from .bulk_writer import chunked
+from .prediction_service import simple_trend, TREND_WINDOW
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRID = {"window": [TREND_WINDOW], "days_ahead": [1]}
+
+# Predictor: (days x window) matrix of closes, oldest first -> (predicted prices, confidences)
+Predictor = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+def parameter_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the grid's parameter values"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def walk_forward(closes: np.ndarray, window: int, days_ahead: int,
+                 predictor: Predictor = simple_trend) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Replay a close series day by day: every bar t with `window` closes up to
+    it predicts the close `days_ahead` bars later, using only data known at t.
+    All days are predicted in one call on a sliding-window matrix. Returns
+    the predicted closes, the actual closes and the closes at t.
+    """
+    last = len(closes) - days_ahead
+    if window < 2 or last < window:
+        empty = np.empty(0)
+        return empty, empty, empty
+    windows = sliding_window_view(closes[:last], window)
+    predicted, _ = predictor(windows)
+    return predicted, closes[window - 1 + days_ahead:], closes[window - 1:last]
+
+def score(predicted: np.ndarray, actual: np.ndarray, base: np.ndarray) -> Dict[str, Any]:
+    """
+    Error metrics of a set of predictions: accuracy as in the prediction
+    backfill (1 - absolute percentage error, floored at 0), MAE, MAPE and the
+    hit rate of the predicted direction
+    """
+    if len(predicted) == 0:
+        return {"samples": 0, "accuracy": None, "mae": None, "mape": None, "hit_rate": None}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        absolute_error = np.abs(predicted - actual)
+        percentage_error = absolute_error / actual
+        valid = np.isfinite(percentage_error)
+        hits = np.sign(predicted - base) == np.sign(actual - base)
+    if not valid.any():
+        return {"samples": 0, "accuracy": None, "mae": None, "mape": None, "hit_rate": None}
+    return {
+        "samples": int(valid.sum()),
+        "accuracy": float(np.clip(1 - percentage_error[valid], 0, 1).mean()),
+        "mae": float(absolute_error[valid].mean()),
+        "mape": float(percentage_error[valid].mean()),
+        "hit_rate": float(hits[valid].mean()),
+    }
+
+def run_shard(series: Dict[str, Tuple[np.ndarray, np.ndarray]], grid: List[Dict[str, Any]],
+              predictor: Predictor = simple_trend, keep_predictions: bool = False) -> List[Dict[str, Any]]:
+    """
+    Backtest every symbol of a shard (symbol -> (dates, closes), oldest first)
+    with every parameter set. Module-level so it can run in a worker process.
+    """
+    results = []
+    for params in grid:
+        window, days_ahead = int(params["window"]), int(params["days_ahead"])
+        for symbol, (dates, closes) in series.items():
+            predicted, actual, base = walk_forward(closes, window, days_ahead, predictor)
+            result = {"symbol": symbol, "params": params, **score(predicted, actual, base)}
+            if keep_predictions:
+                result["predictions"] = [
+                    {"date": str(np.datetime_as_string(day, unit='D')), "predicted": float(p), "actual": float(a)}
+                    for day, p, a in zip(dates[window - 1 + days_ahead:], predicted, actual)
+                ]
+            results.append(result)
+    return results
+
+class BacktestEngine:
+    """
+    Walk-forward backtests of a predictor over stored prices.
+
+    Work is split into shards of BACKTEST_SHARD_SIZE symbols and, when there
+    are fewer symbol shards than workers, slices of the parameter grid. The
+    shards run in a process pool of BACKTEST_WORKERS processes (0 runs
+    inline) and are vectorized over all days of a series.
+    """
+
+    def __init__(self, stock_service, max_workers: int = None, shard_size: int = None):
+        self.stock_service = stock_service
+        if max_workers is None:
+            max_workers = int(os.getenv("BACKTEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_workers = max_workers
+        self.shard_size = shard_size or int(os.getenv("BACKTEST_SHARD_SIZE", "25"))
+
+    def load_series(self, db: Session, symbols: List[str] = None,
+                    start_date: datetime = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Read stored closes into one (dates, closes) pair per symbol with a single query"""
+        prices = self.stock_service.get_stocks_history_frame(db, symbols, start_date)
+        return {
+            symbol: (
+                group['date'].to_numpy(dtype='datetime64[ns]'),
+                group['close_price'].to_numpy(dtype=float)
+            )
+            for symbol, group in prices.groupby('symbol', sort=False)
+        }
+
+    def _tasks(self, series: Dict[str, Tuple[np.ndarray, np.ndarray]],
+               combos: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        symbol_shards = [
+            {symbol: series[symbol] for symbol in shard}
+            for shard in chunked(list(series), self.shard_size)
+        ]
+        grid_slices = min(len(combos), max(1, math.ceil(self.max_workers / max(len(symbol_shards), 1))))
+        grid_shards = [combos[start::grid_slices] for start in range(grid_slices)]
+        return [(shard, grid) for shard in symbol_shards for grid in grid_shards]
+
+    def run_series(self, series: Dict[str, Tuple[np.ndarray, np.ndarray]], grid: Dict[str, List[Any]] = None,
+                   predictor: Predictor = simple_trend, keep_predictions: bool = False) -> Dict[str, Any]:
+        """
+        Backtest already loaded series. Returns {"results": one entry per
+        symbol and parameter set, "summary": metrics per parameter set across
+        symbols, best accuracy first}.
+        """
+        combos = parameter_grid(grid or DEFAULT_GRID)
+        tasks = self._tasks(series, combos)
+
+        results: List[Dict[str, Any]] = []
+        if self.max_workers <= 0 or len(tasks) <= 1:
+            for shard, shard_grid in tasks:
+                results.extend(run_shard(shard, shard_grid, predictor, keep_predictions))
+        else:
+            try:
+                # spawn: the API process runs threads, which makes forking unsafe
+                with ProcessPoolExecutor(max_workers=self.max_workers,
+                                         mp_context=multiprocessing.get_context("spawn")) as executor:
+                    futures = [executor.submit(run_shard, shard, shard_grid, predictor, keep_predictions)
+                               for shard, shard_grid in tasks]
+                    for future in futures:
+                        results.extend(future.result())
+            except BrokenProcessPool:
+                logger.error("Backtest pool broke, running the backtest inline")
+                results = []
+                for shard, shard_grid in tasks:
+                    results.extend(run_shard(shard, shard_grid, predictor, keep_predictions))
+
+        logger.info(f"Backtested {len(series)} symbols x {len(combos)} parameter sets in {len(tasks)} shards")
+        return {"results": results, "summary": self._summarize(results, combos)}
+
+    def run(self, db: Session, symbols: List[str] = None, start_date: datetime = None,
+            grid: Dict[str, List[Any]] = None, predictor: Predictor = simple_trend,
+            keep_predictions: bool = False) -> Dict[str, Any]:
+        """Backtest stored prices of symbols (default: every stored symbol) since start_date"""
+        return self.run_series(self.load_series(db, symbols, start_date), grid, predictor, keep_predictions)
+
+    def _summarize(self, results: List[Dict[str, Any]], combos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sample-weighted metrics of every parameter set over all symbols"""
+        by_params: Dict[tuple, List[Dict[str, Any]]] = {}
+        for result in results:
+            if result["samples"]:
+                by_params.setdefault(tuple(sorted(result["params"].items())), []).append(result)
+
+        summary = []
+        for params in combos:
+            scored = by_params.get(tuple(sorted(params.items())), [])
+            samples = sum(result["samples"] for result in scored)
+            entry = {"params": params, "symbols": len(scored), "samples": samples}
+            for metric in ("accuracy", "mae", "mape", "hit_rate"):
+                entry[metric] = (
+                    sum(result[metric] * result["samples"] for result in scored) / samples if samples else None
+                )
+            summary.append(entry)
+        return sorted(summary, key=lambda entry: -1 if entry["accuracy"] is None else entry["accuracy"], reverse=True)
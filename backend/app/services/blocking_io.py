@@ -0,0 +1,40 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Any
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool of BLOCKING_IO_WORKERS threads for blocking third-party calls
+    (yfinance, RSS fetching). It is separate from the threadpool serving sync
+    routes and database work, so slow upstreams cannot starve them.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("BLOCKING_IO_WORKERS", "16")),
+                thread_name_prefix="blocking-io"
+            )
+        return _executor
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the bounded executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown() -> None:
+    """Stop the executor; queued calls are cancelled"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
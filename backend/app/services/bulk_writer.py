@@ -0,0 +1,127 @@
+from sqlalchemy import insert, update, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import Optional, List, Dict, Any, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN lists and multi-row inserts well under SQLite's bound-parameter limit
+DEFAULT_BATCH_SIZE = 500
+
+def chunked(items: List[Any], size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """Yield successive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _is_unique(model, key: str) -> bool:
+    """Whether `key` alone is unique in model's table, as ON CONFLICT requires"""
+    column = model.__table__.c[key]
+    return bool(column.unique) or column.primary_key or any(
+        index.unique and list(index.columns) == [column] for index in model.__table__.indexes
+    )
+
+def insert_missing(db: Session, model, rows: List[Dict[str, Any]], key: str = "link",
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   inserted_rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, int]:
+    """
+    Insert rows whose `key` value is not stored yet.
+
+    Existing keys are resolved with one IN query per batch and the new rows are
+    written with a single executemany INSERT, instead of one SELECT per row.
+    Rows repeating a key already seen in `rows` are skipped as well. When `key`
+    is unique, SQLite and PostgreSQL insert with ON CONFLICT DO NOTHING, so a
+    concurrent writer cannot make the batch fail. The caller owns the
+    transaction. Returns {"inserted": n, "skipped": n}; the rows that
+    were written are appended to `inserted_rows` when it is given.
+    """
+    column = getattr(model, key)
+    stmt = insert(model)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql") and _is_unique(model, key):
+        # A row a concurrent writer stored after the lookup is left alone
+        # instead of failing the batch; it is still counted as inserted
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=[key])
+    inserted = 0
+    skipped = 0
+    seen = set()
+
+    for batch in chunked(rows, batch_size):
+        keys = {row[key] for row in batch}
+        existing = {value for (value,) in db.query(column).filter(column.in_(keys))}
+
+        new_rows = []
+        for row in batch:
+            value = row[key]
+            if value in existing or value in seen:
+                skipped += 1
+                continue
+            seen.add(value)
+            new_rows.append(row)
+
+        if new_rows:
+            db.execute(stmt, new_rows)
+            inserted += len(new_rows)
+            if inserted_rows is not None:
+                inserted_rows.extend(new_rows)
+
+    logger.debug(f"Bulk insert into {model.__tablename__}: {inserted} inserted, {skipped} skipped")
+    return {"inserted": inserted, "skipped": skipped}
+
+def upsert_rows(db: Session, model, rows: List[Dict[str, Any]], index_elements: List[str],
+                update_columns: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Insert rows, updating `update_columns` (and `updated_at`, if the model has
+    it) of rows that already exist under the unique `index_elements`.
+
+    SQLite and PostgreSQL use a native INSERT ... ON CONFLICT DO UPDATE run as
+    one executemany per batch. Other dialects resolve existing keys with one
+    query per batch and issue a bulk INSERT plus a bulk UPDATE by primary key
+    (where the column's onupdate default sets `updated_at`).
+    Rows repeating a key within `rows` keep the last value. The caller owns
+    the transaction. Returns the number of rows written.
+    """
+    # Last row wins for keys repeated in the input, as ON CONFLICT cannot
+    # touch the same row twice in one statement
+    unique_rows = list({tuple(row[name] for name in index_elements): row for row in rows}.values())
+    if not unique_rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    has_updated_at = "updated_at" in model.__table__.c
+
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(model)
+        set_ = {name: stmt.excluded[name] for name in update_columns}
+        if has_updated_at:
+            set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+        for batch in chunked(unique_rows, batch_size):
+            db.execute(stmt, batch)
+    else:
+        key_columns = [getattr(model, name) for name in index_elements]
+        for batch in chunked(unique_rows, batch_size):
+            keys = [tuple(row[name] for name in index_elements) for row in batch]
+            existing = {
+                tuple(found[:-1]): found[-1]
+                for found in db.query(*key_columns, model.id).filter(tuple_(*key_columns).in_(keys))
+            }
+            new_rows = []
+            changed_rows = []
+            for key, row in zip(keys, batch):
+                if key in existing:
+                    changed = {name: row[name] for name in update_columns}
+                    changed["id"] = existing[key]
+                    changed_rows.append(changed)
+                else:
+                    new_rows.append(row)
+            if new_rows:
+                db.execute(insert(model), new_rows)
+            if changed_rows:
+                db.execute(update(model), changed_rows)
+
+    logger.debug(f"Bulk upsert into {model.__tablename__}: {len(unique_rows)} rows")
+    return len(unique_rows)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+# Supported resampling intervals and their pandas offsets (labelled by period start)
+RESAMPLE_RULES = {
+    '1d': None,
+    '1w': 'W-MON',
+    '1mo': 'MS',
+}
+
+def resample_ohlcv(prices: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Aggregate daily bars (date and OHLCV columns, oldest first) into weekly or
+    monthly bars dated by the start of their period
+    """
+    rule = RESAMPLE_RULES[interval]
+    if rule is None or prices.empty:
+        return prices
+    grouped = prices.set_index('date').resample(rule, label='left', closed='left')
+    bars = grouped.agg({
+        'open_price': 'first',
+        'high_price': 'max',
+        'low_price': 'min',
+        'close_price': 'last',
+        'volume': 'sum',
+    }).dropna(subset=['close_price'])
+    return bars.reset_index()
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `threshold` points that
+    keep the visual shape of the series y(x). The first and last points are
+    always kept.
+    """
+    length = len(x)
+    if threshold >= length:
+        return np.arange(length)
+    if threshold < 3:
+        return np.array([0, length - 1][:max(threshold, 0)], dtype=int)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket edges over the points between the first and the last one
+    edges = np.linspace(1, length - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = length - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) is the third vertex
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else length
+        if next_end <= next_start:
+            next_end = next_start + 1
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+def decimate_ohlcv(prices: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Keep at most max_points bars, chosen by LTTB over the closing price"""
+    if len(prices) <= max_points:
+        return prices
+    x = prices['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    indices = lttb_indices(x, prices['close_price'].to_numpy(), max_points)
+    return prices.iloc[indices].reset_index(drop=True)
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any
+import logging
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from ..models import News, NewsStockTag, StockFeature
+from .bulk_writer import chunked, upsert_rows
+
+logger = logging.getLogger(__name__)
+
+RETURN_HORIZONS = [1, 5, 20]
+VOLATILITY_WINDOW = 20
+VOLUME_WINDOW = 20
+
+FEATURE_COLUMNS = [
+    'close_price', 'return_1d', 'return_5d', 'return_20d',
+    'volatility_20d', 'volume_zscore_20d', 'news_count', 'news_sentiment'
+]
+
+# Calendar days of extra price history loaded so the rolling windows of the
+# first recomputed bar are complete
+WARMUP_DAYS = 45
+
+def compute_features(prices: pd.DataFrame, news: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Compute the daily features of every symbol in one grouped pass.
+
+    `prices` holds symbol, date, close_price and volume; `news` holds symbol,
+    published_date and sentiment_score. News is counted on the first bar on
+    or after the day it was published, so weekend news lands on Monday.
+    Returns symbol, date and FEATURE_COLUMNS; windows that are not full yet
+    are NaN.
+    """
+    prices = prices.sort_values(['symbol', 'date']).reset_index(drop=True)
+    grouped = prices.groupby('symbol', sort=False)
+    close = prices['close_price'].astype(float)
+    volume = prices['volume'].astype(float)
+
+    features = prices[['symbol', 'date', 'close_price']].copy()
+    for horizon in RETURN_HORIZONS:
+        features[f'return_{horizon}d'] = close / grouped['close_price'].shift(horizon) - 1
+    daily_return = features['return_1d']
+    features['volatility_20d'] = daily_return.groupby(prices['symbol'], sort=False).transform(
+        lambda returns: returns.rolling(VOLATILITY_WINDOW, min_periods=VOLATILITY_WINDOW).std()
+    )
+    volume_mean = grouped['volume'].transform(lambda values: values.rolling(VOLUME_WINDOW, min_periods=VOLUME_WINDOW).mean())
+    volume_std = grouped['volume'].transform(lambda values: values.rolling(VOLUME_WINDOW, min_periods=VOLUME_WINDOW).std())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features['volume_zscore_20d'] = ((volume - volume_mean) / volume_std).replace([np.inf, -np.inf], np.nan)
+
+    features['news_count'] = 0
+    features['news_sentiment'] = np.nan
+    if news is not None and not news.empty:
+        bars = features[['symbol', 'date']].assign(date=pd.to_datetime(features['date']))
+        news = news.assign(day=pd.to_datetime(news['published_date']).dt.normalize())
+        matched = pd.merge_asof(
+            news.sort_values('day'), bars.sort_values('date'),
+            left_on='day', right_on='date', by='symbol', direction='forward'
+        ).dropna(subset=['date'])
+        per_bar = matched.groupby(['symbol', 'date']).agg(
+            news_count=('day', 'size'), news_sentiment=('sentiment_score', 'mean')
+        ).reset_index()
+        features = features.drop(columns=['news_count', 'news_sentiment']).merge(
+            per_bar, on=['symbol', 'date'], how='left'
+        )
+        features['news_count'] = features['news_count'].fillna(0).astype(int)
+    return features
+
+class FeatureStore:
+    """
+    Materialized per-symbol, per-day features in the stock_features table.
+
+    Updates are incremental: each symbol is recomputed from its latest stored
+    feature day (which may have been an intraday bar), or from `since` when
+    late news changes older days, with WARMUP_DAYS of extra history for the
+    rolling windows. Predictors read the stored vectors instead of
+    recomputing them from raw rows.
+    """
+
+    def __init__(self, stock_service, watchlist_service):
+        self.stock_service = stock_service
+        self.watchlist_service = watchlist_service
+        self.news_lookback_days = int(os.getenv("FEATURE_NEWS_LOOKBACK_DAYS", "7"))
+
+    def get_latest_dates(self, db: Session, symbols: List[str]) -> Dict[str, datetime]:
+        """Latest stored feature day of each symbol; symbols without features are left out"""
+        latest = {}
+        for batch in chunked(symbols):
+            latest.update(db.query(StockFeature.symbol, func.max(StockFeature.date)).filter(
+                StockFeature.symbol.in_(batch)
+            ).group_by(StockFeature.symbol).all())
+        return latest
+
+    def _load_news(self, db: Session, symbols: List[str], start_date: Optional[datetime]) -> pd.DataFrame:
+        """News of symbols, by primary symbol or watchlist tag, counted once per symbol"""
+        rows = []
+        for batch in chunked(symbols):
+            tagged = select(NewsStockTag.news_id, NewsStockTag.symbol).where(NewsStockTag.symbol.in_(batch)).subquery()
+            query = db.query(
+                News.id, func.coalesce(tagged.c.symbol, News.related_stock), News.published_date, News.sentiment_score
+            ).outerjoin(tagged, tagged.c.news_id == News.id).filter(
+                or_(News.related_stock.in_(batch), tagged.c.symbol.isnot(None))
+            )
+            if start_date is not None:
+                query = query.filter(News.published_date >= start_date)
+            rows.extend(query.all())
+        news = pd.DataFrame(rows, columns=['id', 'symbol', 'published_date', 'sentiment_score'])
+        news = news[news['symbol'].isin(symbols)]
+        return news.drop_duplicates(['id', 'symbol'])
+
+    def update(self, db: Session, symbols: List[str] = None, since: datetime = None) -> Dict[str, int]:
+        """
+        Recompute and upsert the features of symbols (default: the active
+        watchlist) from their latest stored feature day, or from `since` if
+        that is earlier. Returns {"symbols": n, "rows": n}.
+        """
+        if symbols is None:
+            symbols = self.watchlist_service.get_active_symbols(db)
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {"symbols": 0, "rows": 0}
+
+        try:
+            latest_dates = self.get_latest_dates(db, symbols)
+            starts: Dict[str, Optional[datetime]] = {}
+            for symbol in symbols:
+                start = latest_dates.get(symbol)
+                if start is not None:
+                    start = datetime.combine(start.date(), datetime.min.time())
+                    if since is not None:
+                        start = min(start, since)
+                starts[symbol] = start
+
+            # Symbols without features are built from their full history
+            frames = []
+            full = [symbol for symbol in symbols if starts[symbol] is None]
+            incremental = [symbol for symbol in symbols if starts[symbol] is not None]
+            for group, load_from in (
+                (full, None),
+                (incremental, min((starts[symbol] for symbol in incremental), default=None)),
+            ):
+                if not group:
+                    continue
+                query_start = None if load_from is None else load_from - timedelta(days=WARMUP_DAYS)
+                prices = self.stock_service.get_stocks_history_frame(db, group, query_start)
+                if prices.empty:
+                    continue
+                features = compute_features(prices, self._load_news(db, group, query_start))
+                start_by_row = features['symbol'].map(starts)
+                keep = start_by_row.isna() | (pd.to_datetime(features['date']) >= pd.to_datetime(start_by_row))
+                frames.append(features[keep])
+
+            if not frames:
+                return {"symbols": 0, "rows": 0}
+            features = pd.concat(frames, ignore_index=True)
+            features = features.astype(object).where(features.notna(), None)
+            rows = features.to_dict('records')
+            for row in rows:
+                row['date'] = pd.Timestamp(row['date']).to_pydatetime()
+            upsert_rows(db, StockFeature, rows, ['symbol', 'date'], FEATURE_COLUMNS)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error updating features for {len(symbols)} symbols: {str(e)}")
+            return {"symbols": 0, "rows": 0}
+
+        updated = features['symbol'].nunique()
+        logger.info(f"Updated {len(rows)} feature rows for {updated} symbols")
+        return {"symbols": int(updated), "rows": len(rows)}
+
+    def update_news(self, db: Session, symbols: List[str] = None) -> Dict[str, int]:
+        """Recompute the recent days whose news counts a news ingest may have changed"""
+        since = datetime.combine((datetime.now() - timedelta(days=self.news_lookback_days)).date(), datetime.min.time())
+        return self.update(db, symbols, since)
+
+    def get_history(self, db: Session, symbols: List[str], start_date: datetime = None) -> pd.DataFrame:
+        """Stored features of symbols (symbol, date and FEATURE_COLUMNS), ordered by symbol and date"""
+        columns = ['symbol', 'date'] + FEATURE_COLUMNS
+        rows = []
+        for batch in chunked(symbols):
+            query = select(*[getattr(StockFeature, column) for column in columns]).where(StockFeature.symbol.in_(batch))
+            if start_date is not None:
+                query = query.where(StockFeature.date >= start_date)
+            rows.extend(db.execute(query.order_by(StockFeature.symbol, StockFeature.date)).all())
+        return pd.DataFrame(rows, columns=columns)
+
+    def get_vectors(self, db: Session, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Latest stored feature vector of each symbol (date and FEATURE_COLUMNS)"""
+        latest_dates = self.get_latest_dates(db, symbols)
+        vectors = {}
+        for batch in chunked(list(latest_dates)):
+            rows = db.query(StockFeature).filter(
+                StockFeature.symbol.in_(batch),
+                StockFeature.date.in_({latest_dates[symbol] for symbol in batch})
+            ).all()
+            for row in rows:
+                if latest_dates.get(row.symbol) == row.date:
+                    vectors[row.symbol] = {
+                        'date': row.date.isoformat(),
+                        **{column: getattr(row, column) for column in FEATURE_COLUMNS}
+                    }
+        return vectors
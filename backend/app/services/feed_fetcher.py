@@ -0,0 +1,188 @@
+import requests
+from requests.adapters import HTTPAdapter
+import certifi
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, List, Dict, Any
+from urllib.parse import urlparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class FeedFetcher:
+    """
+    Concurrent RSS fetch engine.
+
+    Feeds are downloaded on a bounded thread pool through one pooled
+    requests.Session. Each host gets its own connection limit, and a global
+    deadline caps how long a whole refresh may take, so a refresh costs about
+    as much as the slowest feed instead of the sum of all of them.
+    """
+
+    def __init__(self, max_workers: int = None, per_host_limit: int = None,
+                 timeout: float = None, deadline: float = None):
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("FEED_FETCH_WORKERS", "16"))
+        self.per_host_limit = per_host_limit if per_host_limit is not None else int(os.getenv("FEED_FETCH_PER_HOST", "4"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("FEED_FETCH_TIMEOUT", "10"))
+        self.deadline = deadline if deadline is not None else float(os.getenv("FEED_FETCH_DEADLINE", "30"))
+
+        # Shared pooled session: keep-alive connections are reused across refreshes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.per_host_limit)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="feed-fetch")
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        # Per-host memory of whether TLS verification works (host -> bool)
+        self._tls_by_host: Dict[str, bool] = {}
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Return the semaphore limiting concurrent connections to the url's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def remember_tls(self, url: str, verified: Optional[bool]) -> None:
+        """Record whether TLS verification works for the url's host"""
+        if verified is None:
+            return
+        with self._lock:
+            self._tls_by_host[urlparse(url).netloc.lower()] = verified
+
+    def tls_verified(self, url: str) -> Optional[bool]:
+        """Whether TLS verification works for the url's host, None if unknown or plain http"""
+        if not url.lower().startswith("https://"):
+            return None
+        with self._lock:
+            return self._tls_by_host.get(urlparse(url).netloc.lower())
+
+    def _timeout(self, deadline_at: Optional[float]) -> float:
+        """Request timeout, cut short so the request ends by the monotonic deadline_at"""
+        if deadline_at is None:
+            return self.timeout
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout("fetch deadline exceeded")
+        return min(self.timeout, remaining)
+
+    def fetch(self, url: str, name: str = None, headers: Dict[str, str] = None,
+              deadline_at: float = None) -> requests.Response:
+        """
+        Fetch a single feed, trying proper SSL first and falling back to
+        unverified SSL for development. Hosts known to fail verification go
+        straight to the unverified request, and only SSL errors trigger the
+        fallback, so a dead feed costs one timeout. With deadline_at (a
+        time.monotonic() value) waiting for the host and every request end
+        by then. Raises on failure.
+        """
+        name = name or url
+        slot = self._host_slot(url)
+        acquired = slot.acquire() if deadline_at is None else slot.acquire(timeout=self._timeout(deadline_at))
+        if not acquired:
+            raise requests.exceptions.Timeout(f"no connection to the host of {name} before the deadline")
+        try:
+            if self.tls_verified(url) is False:
+                response = self.session.get(url, headers=headers, verify=False, timeout=self._timeout(deadline_at))
+                response.raise_for_status()
+                logger.info(f"Successfully fetched {name} without SSL verification")
+                return response
+            try:
+                response = self.session.get(url, headers=headers, verify=certifi.where(), timeout=self._timeout(deadline_at))
+                response.raise_for_status()
+                logger.info(f"Successfully fetched {name} with SSL verification")
+                if url.lower().startswith("https://"):
+                    self.remember_tls(url, True)
+            except requests.exceptions.SSLError as ssl_error:
+                logger.warning(f"SSL verification failed for {name}, trying without verification: {str(ssl_error)}")
+                response = self.session.get(url, headers=headers, verify=False, timeout=self._timeout(deadline_at))
+                response.raise_for_status()
+                logger.info(f"Successfully fetched {name} without SSL verification")
+                self.remember_tls(url, False)
+        finally:
+            slot.release()
+        return response
+
+    @staticmethod
+    def _empty_result(source: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "url": source["url"],
+            "name": source.get("name", source["url"]),
+            "content": None,
+            "content_hash": None,
+            "not_modified": False,
+            "etag": source.get("etag"),
+            "last_modified": source.get("last_modified"),
+            "tls_verified": None,
+            "error": None
+        }
+
+    def _fetch_result(self, source: Dict[str, Any], deadline_at: float = None) -> Dict[str, Any]:
+        url = source["url"]
+        name = source.get("name", url)
+        result = self._empty_result(source)
+
+        # Conditional GET: let the server answer 304 when the feed is unchanged
+        headers = {}
+        if source.get("etag"):
+            headers["If-None-Match"] = source["etag"]
+        if source.get("last_modified"):
+            headers["If-Modified-Since"] = source["last_modified"]
+
+        try:
+            response = self.fetch(url, name, headers=headers or None, deadline_at=deadline_at)
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+
+        result["tls_verified"] = self.tls_verified(url)
+        result["etag"] = response.headers.get("ETag", result["etag"])
+        result["last_modified"] = response.headers.get("Last-Modified", result["last_modified"])
+        if response.status_code == 304:
+            result["not_modified"] = True
+        else:
+            result["content"] = response.content
+            result["content_hash"] = hashlib.sha256(response.content).hexdigest()
+        return result
+
+    def fetch_all(self, sources: List[Dict[str, Any]], deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch all sources concurrently.
+
+        `sources` is a list of dicts with "url" and optional "name", "etag" and
+        "last_modified" validators. Returns one result dict per source, in the
+        same order, with "content" set on success, "not_modified" set on a 304,
+        or "error" set on failure. Feeds still running when the deadline
+        expires are reported as failed; their requests time out by then too,
+        so they do not hold pool threads or host slots past the deadline.
+        """
+        if not sources:
+            return []
+
+        deadline = self.deadline if deadline is None else deadline
+        started = time.monotonic()
+        deadline_at = started + deadline
+        futures = [self._executor.submit(self._fetch_result, source, deadline_at) for source in sources]
+        wait(futures, timeout=deadline)
+
+        results = []
+        for source, future in zip(sources, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                logger.warning(f"Fetch deadline of {deadline}s exceeded for {source['url']}")
+                result = self._empty_result(source)
+                result["error"] = f"deadline of {deadline}s exceeded"
+                results.append(result)
+
+        logger.info(f"Fetched {len(sources)} feeds in {time.monotonic() - started:.2f}s")
+        return results
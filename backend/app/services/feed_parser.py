@@ -0,0 +1,113 @@
+import feedparser
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def parse_feed(content: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse a feed body and normalize its entries into compact records with
+    title, description, link, published_date and dedup_key.
+
+    Module-level so it can run in a worker process; only the records are
+    sent back, never feedparser objects.
+    """
+    feed = feedparser.parse(content)
+    records = []
+    for entry in feed.entries:
+        # Parse publication date
+        # Undated entries count as published now, in UTC like the parsed dates
+        published_date = datetime.utcnow()
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            published_date = datetime(*entry.published_parsed[:6])
+        title = entry.title if hasattr(entry, 'title') else ''
+        # Deduplication key: title + date (ignore case/punct)
+        title_key = re.sub(r'[^a-zA-Z0-9 ]', '', title.lower())
+        records.append({
+            'title': title,
+            'description': entry.description if hasattr(entry, 'description') else '',
+            'link': entry.link if hasattr(entry, 'link') else '',
+            'published_date': published_date,
+            'dedup_key': f"{title_key}_{published_date.strftime('%Y-%m-%d')}"
+        })
+    return records
+
+class FeedParserPool:
+    """
+    Runs parse_feed in a process pool so CPU-bound feedparser work uses
+    several cores and stays off the API worker. FEED_PARSE_WORKERS=0 parses
+    inline instead.
+    """
+
+    def __init__(self, max_workers: int = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("FEED_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs fetch threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def parse_many(self, contents: List[Optional[bytes]]) -> List[Dict[str, Any]]:
+        """
+        Parse several feed bodies. Returns one dict per body, in order, with
+        "records" on success or "error" on failure; None bodies are skipped
+        and come back with empty records.
+        """
+        results = [{"records": [], "error": None} for _ in contents]
+        pending = [(position, content) for position, content in enumerate(contents) if content is not None]
+        if not pending:
+            return results
+
+        if self.max_workers <= 0:
+            for position, content in pending:
+                try:
+                    results[position]["records"] = parse_feed(content)
+                except Exception as e:
+                    results[position]["error"] = str(e)
+            return results
+
+        try:
+            executor = self._get_executor()
+            futures = [(position, executor.submit(parse_feed, content)) for position, content in pending]
+            for position, future in futures:
+                try:
+                    results[position]["records"] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[position]["error"] = str(e)
+        except BrokenProcessPool:
+            logger.error("Feed parser pool broke, parsing inline this time")
+            self._reset_executor()
+            for position, content in pending:
+                try:
+                    results[position] = {"records": parse_feed(content), "error": None}
+                except Exception as e:
+                    results[position] = {"records": [], "error": str(e)}
+        return results
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        self._reset_executor()
@@ -0,0 +1,224 @@
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any
+import logging
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from ..models import RSSSource
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: polls are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class FeedHealthPolicy:
+    """
+    Learns each feed's publish cadence and decides when it is polled next.
+
+    Feeds that publish often are polled about once per expected new item,
+    quiet feeds back off gradually, and feeds that keep failing open a
+    circuit breaker with exponential backoff.
+    """
+
+    def __init__(self):
+        self.min_interval = int(os.getenv("FEED_POLL_MIN_SECONDS", "300"))
+        self.max_interval = int(os.getenv("FEED_POLL_MAX_SECONDS", "21600"))
+        self.default_interval = int(os.getenv("FEED_POLL_DEFAULT_SECONDS", "900"))
+        self.failure_threshold = int(os.getenv("FEED_FAILURE_THRESHOLD", "3"))
+        self.backoff_base = int(os.getenv("FEED_BACKOFF_BASE_SECONDS", "600"))
+        self.backoff_max = int(os.getenv("FEED_BACKOFF_MAX_SECONDS", "86400"))
+        self.quiet_growth = 1.5  # Interval growth after a poll with nothing new
+        self.cadence_smoothing = 0.3  # EWMA weight of the newest cadence sample
+
+    def _clamp(self, seconds: float) -> int:
+        return int(min(max(seconds, self.min_interval), self.max_interval))
+
+    def is_available(self, rss_source: RSSSource, now: datetime = None) -> bool:
+        """Whether the feed's circuit breaker is closed (or its backoff has expired)"""
+        now = now or datetime.utcnow()
+        return rss_source.circuit_open_until is None or rss_source.circuit_open_until <= now
+
+    def record_success(self, rss_source: RSSSource, new_entry_dates: List[datetime],
+                       tls_verified: Optional[bool] = None, now: datetime = None) -> None:
+        """Update health stats and the next poll time after a successful poll"""
+        now = now or datetime.utcnow()
+        rss_source.last_polled_at = now
+        rss_source.last_success_at = now
+        rss_source.total_polls = (rss_source.total_polls or 0) + 1
+        rss_source.consecutive_failures = 0
+        rss_source.circuit_open_until = None
+        rss_source.last_error = None
+        if tls_verified is not None:
+            rss_source.tls_verified = tls_verified
+
+        interval = rss_source.poll_interval_seconds or self.default_interval
+        if new_entry_dates:
+            newest = max(new_entry_dates)
+            # Cadence sample: time per new item since the newest item we already had
+            if rss_source.last_entry_published_at is not None and newest > rss_source.last_entry_published_at:
+                sample = (newest - rss_source.last_entry_published_at).total_seconds() / len(new_entry_dates)
+            elif len(new_entry_dates) > 1:
+                sample = (newest - min(new_entry_dates)).total_seconds() / (len(new_entry_dates) - 1)
+            else:
+                sample = None
+            if sample is not None and sample > 0:
+                previous = rss_source.avg_publish_interval_seconds
+                rss_source.avg_publish_interval_seconds = sample if previous is None else (
+                    self.cadence_smoothing * sample + (1 - self.cadence_smoothing) * previous
+                )
+            if rss_source.last_entry_published_at is None or newest > rss_source.last_entry_published_at:
+                rss_source.last_entry_published_at = newest
+            if rss_source.avg_publish_interval_seconds:
+                interval = rss_source.avg_publish_interval_seconds
+        else:
+            interval = interval * self.quiet_growth
+
+        rss_source.poll_interval_seconds = self._clamp(interval)
+        rss_source.next_poll_at = now + timedelta(seconds=rss_source.poll_interval_seconds)
+
+    def record_failure(self, rss_source: RSSSource, error: str, now: datetime = None) -> None:
+        """Update health stats after a failed poll, opening the circuit if needed"""
+        now = now or datetime.utcnow()
+        rss_source.last_polled_at = now
+        rss_source.total_polls = (rss_source.total_polls or 0) + 1
+        rss_source.total_failures = (rss_source.total_failures or 0) + 1
+        rss_source.consecutive_failures = (rss_source.consecutive_failures or 0) + 1
+        rss_source.last_error = (error or '')[:500]
+
+        interval = rss_source.poll_interval_seconds or self.default_interval
+        if rss_source.consecutive_failures >= self.failure_threshold:
+            exponent = rss_source.consecutive_failures - self.failure_threshold
+            backoff = min(self.backoff_base * (2 ** exponent), self.backoff_max)
+            rss_source.circuit_open_until = now + timedelta(seconds=backoff)
+            rss_source.next_poll_at = rss_source.circuit_open_until
+            logger.warning(f"Circuit open for {rss_source.url} for {backoff}s after {rss_source.consecutive_failures} failures")
+        else:
+            rss_source.next_poll_at = now + timedelta(seconds=interval)
+
+    def health(self, rss_source: RSSSource, now: datetime = None) -> Dict[str, Any]:
+        """Health summary of a feed for the API"""
+        now = now or datetime.utcnow()
+        total_polls = rss_source.total_polls or 0
+        return {
+            "id": rss_source.id,
+            "url": rss_source.url,
+            "source": rss_source.source,
+            "status": "circuit_open" if not self.is_available(rss_source, now) else (
+                "failing" if rss_source.consecutive_failures else "ok"
+            ),
+            "last_polled_at": rss_source.last_polled_at,
+            "last_success_at": rss_source.last_success_at,
+            "next_poll_at": rss_source.next_poll_at,
+            "poll_interval_seconds": rss_source.poll_interval_seconds,
+            "avg_publish_interval_seconds": rss_source.avg_publish_interval_seconds,
+            "consecutive_failures": rss_source.consecutive_failures or 0,
+            "total_polls": total_polls,
+            "total_failures": rss_source.total_failures or 0,
+            "success_rate": round(1 - (rss_source.total_failures or 0) / total_polls, 3) if total_polls else None,
+            "circuit_open_until": rss_source.circuit_open_until,
+            "tls_verified": rss_source.tls_verified,
+            "last_error": rss_source.last_error
+        }
+
+class FeedScheduler:
+    """
+    Background poller that fetches each RSS source when it is due, according
+    to the FeedHealthPolicy stored on the source rows. One poll runs at a
+    time across all API workers; a tick that finds another poll running is
+    skipped.
+    """
+
+    def __init__(self, news_service):
+        self.news_service = news_service
+        self.policy = news_service.feed_health
+        self.tick_seconds = int(os.getenv("FEED_SCHEDULER_TICK_SECONDS", "60"))
+        self.enabled = os.getenv("FEED_SCHEDULER_ENABLED", "False").lower() == "true"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+        self.lock_path = os.getenv("FEED_SCHEDULER_LOCK_PATH") or os.path.join(
+            tempfile.gettempdir(), "alphasignal_feed_scheduler.lock"
+        )
+
+    def due_sources(self, db: Session, now: datetime = None) -> List[RSSSource]:
+        """Sources whose next poll time has passed and whose circuit is closed"""
+        now = now or datetime.utcnow()
+        return db.query(RSSSource).filter(
+            or_(RSSSource.next_poll_at == None, RSSSource.next_poll_at <= now),
+            or_(RSSSource.circuit_open_until == None, RSSSource.circuit_open_until <= now)
+        ).all()
+
+    @contextmanager
+    def _poll_lock(self):
+        """
+        Try to become the only poller across processes (flock on lock_path)
+        and threads; yields whether it succeeded, without waiting
+        """
+        if not self._run_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            with open(self.lock_path, "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._run_lock.release()
+
+    def run_due(self, db: Session) -> Dict[str, int]:
+        """
+        Poll every due source once, unless another poll is running. Returns
+        the number polled and raw news counts.
+        """
+        with self._poll_lock() as acquired:
+            if not acquired:
+                logger.info("Skipping feed poll: another poll is running")
+                return {"polled": 0, "inserted": 0, "skipped": 0}
+            sources = self.due_sources(db)
+            if not sources:
+                return {"polled": 0, "inserted": 0, "skipped": 0}
+            counts = self.news_service.fetch_and_store_raw_news(db, rss_sources=sources)
+            return {"polled": len(sources), **counts}
+
+    def _loop(self) -> None:
+        logger.info("Feed scheduler started")
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                self.run_due(db)
+            except Exception as e:
+                logger.error(f"Feed scheduler run failed: {str(e)}")
+            finally:
+                db.close()
+            self._stop.wait(self.tick_seconds)
+        logger.info("Feed scheduler stopped")
+
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="feed-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,279 @@
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishes are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Control block: [sequence, generation] as uint64, then the data segment name
+_CONTROL_WORDS = 2
+_NAME_BYTES = 64
+_CONTROL_SIZE = _CONTROL_WORDS * 8 + _NAME_BYTES
+_SYMBOL_BYTES = 32
+_PRICE_FIELDS = ['open_price', 'high_price', 'low_price', 'close_price']
+# Attempts to read a consistent control block while a publish is switching it
+_READ_ATTEMPTS = 1000
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing segment without handing it to this process's
+    resource tracker, which would otherwise unlink it when the process exits
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment
+
+def _layout(num_symbols: int, window: int) -> Dict[str, Tuple[int, tuple, Any]]:
+    """Offset, shape and dtype of every array in a data segment"""
+    layout = {}
+    offset = 0
+    for name, shape, dtype in [
+        ('header', (4,), np.int64),
+        ('symbols', (num_symbols,), f'S{_SYMBOL_BYTES}'),
+        ('lengths', (num_symbols,), np.int64),
+        ('date', (num_symbols, window), np.int64),
+        ('prices', (len(_PRICE_FIELDS), num_symbols, window), np.float64),
+        ('volume', (num_symbols, window), np.int64),
+    ]:
+        layout[name] = (offset, shape, dtype)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    layout['size'] = (offset, (), None)
+    return layout
+
+class SharedPriceWindow:
+    """
+    Hot window of the last `days` days of OHLCV per symbol, held as NumPy
+    arrays in shared memory so every uvicorn worker can read it without
+    querying SQL.
+
+    A loader publishes a complete, immutable data segment per generation and
+    then points a small control segment at it (guarded by a sequence
+    counter). Publishes are serialized across processes with a file lock
+    next to the segment. Readers map the current generation read-only and hand out
+    array slices of it; they remap only when the generation changes.
+    """
+
+    def __init__(self, name: str = None, days: int = None):
+        self.name = name or os.getenv("HOT_WINDOW_NAME", "alphasignal_prices")
+        self.days = days if days is not None else int(os.getenv("HOT_WINDOW_DAYS", "120"))
+        self._lock = threading.Lock()
+        self.lock_path = os.getenv("HOT_WINDOW_LOCK_PATH") or os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        self._control: Optional[shared_memory.SharedMemory] = None
+        self._owned: Dict[str, shared_memory.SharedMemory] = {}
+        # Segments no longer current that may still back arrays handed out
+        self._retired: List[shared_memory.SharedMemory] = []
+        # (generation, segment, arrays, row by symbol) of the mapped data segment
+        self._mapped: Optional[Tuple[int, shared_memory.SharedMemory, Dict[str, np.ndarray], Dict[str, int]]] = None
+
+    def _control_words(self, create: bool = False) -> Optional[np.ndarray]:
+        if self._control is None:
+            try:
+                self._control = _attach(self.name)
+            except FileNotFoundError:
+                if not create:
+                    return None
+                self._control = shared_memory.SharedMemory(name=self.name, create=True, size=_CONTROL_SIZE)
+                self._control.buf[:_CONTROL_SIZE] = bytes(_CONTROL_SIZE)
+                # The control block outlives the worker that happened to create
+                # it, since the other workers keep reading through it
+                resource_tracker.unregister(self._control._name, "shared_memory")
+        return np.ndarray((_CONTROL_WORDS,), dtype=np.uint64, buffer=self._control.buf)
+
+    def _read_control(self) -> Optional[Tuple[int, str]]:
+        """
+        Consistent (generation, data segment name), or None before the first
+        publish. A publish only holds the counter odd for a few stores, so
+        this retries without sleeping (it may run on the event loop) and
+        gives up, falling back to SQL, if the switch does not finish.
+        """
+        words = self._control_words()
+        if words is None:
+            return None
+        for _ in range(_READ_ATTEMPTS):
+            sequence = int(words[0])
+            if sequence % 2 == 0:
+                generation = int(words[1])
+                raw_name = bytes(self._control.buf[_CONTROL_WORDS * 8:_CONTROL_SIZE])
+                if int(words[0]) == sequence:
+                    if generation == 0:
+                        return None
+                    return generation, raw_name.rstrip(b'\0').decode()
+        return None
+
+    @contextmanager
+    def _publish_lock(self):
+        """Exclusive across processes (flock on lock_path) and threads"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def publish(self, prices: pd.DataFrame) -> int:
+        """
+        Publish a new generation from a frame of price rows (symbol, date and
+        OHLCV columns), keeping the last `days` days of every symbol. Returns
+        the new generation.
+        """
+        prices = prices.sort_values(['symbol', 'date'])
+        dates = pd.to_datetime(prices['date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        cutoff = pd.Timestamp.now() - pd.Timedelta(days=self.days)
+        keep = (dates >= cutoff).to_numpy()
+        prices = prices[keep]
+        dates = dates[keep]
+
+        symbols = list(dict.fromkeys(prices['symbol'].tolist()))
+        lengths = prices.groupby('symbol', sort=False).size().reindex(symbols).to_numpy(dtype=np.int64)
+        window = int(lengths.max()) if len(lengths) else 0
+
+        with self._publish_lock():
+            words = self._control_words(create=True)
+            generation = int(words[1]) + 1
+            segment_name = f"{self.name}_{os.getpid()}_{generation}"
+            layout = _layout(len(symbols), window)
+            segment = shared_memory.SharedMemory(name=segment_name, create=True, size=max(layout['size'][0], 1))
+            arrays = {
+                key: np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+                for key, (offset, shape, dtype) in layout.items() if key != 'size'
+            }
+            arrays['header'][:] = [len(symbols), window, generation, time.time_ns()]
+            arrays['symbols'][:] = [symbol.encode()[:_SYMBOL_BYTES] for symbol in symbols]
+            arrays['lengths'][:] = lengths
+
+            # Scatter the sorted rows into [symbol, position] cells
+            rows = np.repeat(np.arange(len(symbols)), lengths)
+            starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+            columns = np.arange(len(prices)) - starts
+            arrays['date'][rows, columns] = dates.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            for position, field in enumerate(_PRICE_FIELDS):
+                arrays['prices'][position][rows, columns] = prices[field].to_numpy(dtype=np.float64)
+            arrays['volume'][rows, columns] = prices['volume'].to_numpy(dtype=np.int64)
+            del arrays
+
+            # Point the control block at the new segment. The counter is set
+            # rather than incremented, so one left odd by a publisher that
+            # died mid-switch is repaired here
+            sequence = int(words[0]) | 1
+            words[0] = sequence
+            name_bytes = segment_name.encode()[:_NAME_BYTES].ljust(_NAME_BYTES, b'\0')
+            self._control.buf[_CONTROL_WORDS * 8:_CONTROL_SIZE] = name_bytes
+            words[1] = generation
+            words[0] = sequence + 1
+
+            # Unlink the previous segments this process published; readers
+            # that still map them keep their mapping until they move on
+            for old_name in list(self._owned):
+                old_segment = self._owned.pop(old_name)
+                old_segment.unlink()
+                self._retire(old_segment)
+            self._owned[segment_name] = segment
+
+        logger.info(f"Published hot price window generation {generation}: {len(symbols)} symbols, {len(prices)} rows")
+        return generation
+
+    def _retire(self, segment: shared_memory.SharedMemory = None) -> None:
+        """
+        Close segments that are no longer current. A segment whose arrays are
+        still referenced cannot be closed yet and is retried on a later call.
+        Caller holds the lock.
+        """
+        if segment is not None and all(segment is not retired for retired in self._retired):
+            self._retired.append(segment)
+        still_open = []
+        for retired in self._retired:
+            if self._mapped is not None and retired is self._mapped[1]:
+                still_open.append(retired)
+                continue
+            try:
+                retired.close()
+            except BufferError:
+                still_open.append(retired)
+        self._retired = still_open
+
+    def _current(self) -> Optional[Tuple[int, shared_memory.SharedMemory, Dict[str, np.ndarray], Dict[str, int]]]:
+        """Map the current generation read-only, reusing the mapping when unchanged"""
+        control = self._read_control()
+        if control is None:
+            return None
+        generation, segment_name = control
+        with self._lock:
+            if self._mapped is not None and self._mapped[0] == generation:
+                return self._mapped
+            segment = self._owned.get(segment_name)
+            if segment is None:
+                try:
+                    segment = _attach(segment_name)
+                except FileNotFoundError:
+                    return self._mapped
+            header = np.ndarray((4,), dtype=np.int64, buffer=segment.buf)
+            layout = _layout(int(header[0]), int(header[1]))
+            arrays = {}
+            for key, (offset, shape, dtype) in layout.items():
+                if key == 'size':
+                    continue
+                array = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+                array.flags.writeable = False
+                arrays[key] = array
+            rows = {symbol.decode(): row for row, symbol in enumerate(arrays['symbols'])}
+            previous = self._mapped
+            self._mapped = (generation, segment, arrays, rows)
+            if previous is not None and previous[1].name not in self._owned:
+                self._retire(previous[1])
+            return self._mapped
+
+    def read(self, symbol: str, days: int = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Read-only array slices (date, OHLCV) of the symbol's window, oldest
+        first, limited to the last `days` days. Returns None when the window
+        is not loaded, does not hold the symbol or does not reach back far
+        enough.
+        """
+        if days is not None and days > self.days:
+            return None
+        mapped = self._current()
+        if mapped is None or symbol not in mapped[3]:
+            return None
+        arrays = mapped[2]
+        row = mapped[3][symbol]
+        length = int(arrays['lengths'][row])
+        dates = arrays['date'][row, :length].view('datetime64[ns]')
+        start = 0
+        if days is not None:
+            cutoff = np.datetime64(pd.Timestamp.now() - pd.Timedelta(days=days), 'ns')
+            start = int(np.searchsorted(dates, cutoff))
+        window = {'date': dates[start:]}
+        for position, field in enumerate(_PRICE_FIELDS):
+            window[field] = arrays['prices'][position, row, start:length]
+        window['volume'] = arrays['volume'][row, start:length]
+        return window
+
+    def close(self) -> None:
+        """Release this process's mappings and the segments it published"""
+        with self._lock:
+            self._mapped = None
+            for segment in self._owned.values():
+                segment.unlink()
+                self._retired.append(segment)
+            self._owned.clear()
+            self._retire()
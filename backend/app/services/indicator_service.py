@@ -0,0 +1,288 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SMA_PERIOD = 20
+EMA_PERIOD = 20
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_PERIOD, BOLLINGER_WIDTH = 20, 2.0
+ATR_PERIOD = 14
+# Rolling window, so the value of a bar does not depend on where the loaded history starts
+VWAP_PERIOD = 20
+
+INDICATOR_COLUMNS = [
+    'sma_20', 'ema_20', 'rsi_14', 'macd', 'macd_signal', 'macd_histogram',
+    'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'atr_14', 'vwap'
+]
+
+def _ema_alpha(period: int) -> float:
+    return 2.0 / (period + 1)
+
+def _ewm(frame: pd.DataFrame, alpha: float) -> pd.DataFrame:
+    # adjust=False is the recursive form the incremental update uses
+    return frame.ewm(alpha=alpha, adjust=False).mean()
+
+def _rsi(avg_gain, avg_loss):
+    avg_gain, avg_loss = np.asarray(avg_gain, dtype=float), np.asarray(avg_loss, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+def compute_indicators(prices: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+    """
+    Compute every indicator over the full history of every symbol at once.
+
+    `prices` holds symbol, date and OHLCV columns. Each symbol's bars are laid
+    out left-aligned in one wide matrix (row = bar position, column = symbol),
+    so every indicator is a single vectorized pass over all symbols and
+    shorter histories are only padded at the end. Returns the indicator rows
+    (symbol, date, close and INDICATOR_COLUMNS) and the per-symbol state that
+    `update_indicator_state` continues from.
+    """
+    prices = prices.sort_values(['symbol', 'date']).reset_index(drop=True)
+    prices['position'] = prices.groupby('symbol').cumcount()
+
+    def wide(column: str) -> pd.DataFrame:
+        return prices.pivot(index='position', columns='symbol', values=column).astype(float)
+
+    close, high, low, volume = wide('close_price'), wide('high_price'), wide('low_price'), wide('volume')
+    previous_close = close.shift(1)
+
+    sma = close.rolling(SMA_PERIOD, min_periods=SMA_PERIOD).mean()
+    ema = _ewm(close, _ema_alpha(EMA_PERIOD))
+
+    change = close.diff()
+    avg_gain = _ewm(change.clip(lower=0), 1.0 / RSI_PERIOD)
+    avg_loss = _ewm((-change).clip(lower=0), 1.0 / RSI_PERIOD)
+    rsi = pd.DataFrame(_rsi(avg_gain.to_numpy(), avg_loss.to_numpy()), index=close.index, columns=close.columns)
+    rsi[avg_gain.isna()] = np.nan
+
+    ema_fast = _ewm(close, _ema_alpha(MACD_FAST))
+    ema_slow = _ewm(close, _ema_alpha(MACD_SLOW))
+    macd = ema_fast - ema_slow
+    macd_signal = _ewm(macd, _ema_alpha(MACD_SIGNAL))
+
+    bollinger_middle = close.rolling(BOLLINGER_PERIOD, min_periods=BOLLINGER_PERIOD).mean()
+    bollinger_std = close.rolling(BOLLINGER_PERIOD, min_periods=BOLLINGER_PERIOD).std(ddof=0)
+
+    true_range = np.maximum(high - low, np.maximum((high - previous_close).abs(), (low - previous_close).abs()))
+    true_range = true_range.fillna(high - low)
+    atr = _ewm(true_range, 1.0 / ATR_PERIOD)
+
+    typical_pv = (high + low + close) / 3.0 * volume
+    window_pv = typical_pv.rolling(VWAP_PERIOD, min_periods=VWAP_PERIOD).sum()
+    window_volume = volume.rolling(VWAP_PERIOD, min_periods=VWAP_PERIOD).sum()
+    vwap = window_pv / window_volume.replace(0, np.nan)
+
+    columns = {
+        'sma_20': sma, 'ema_20': ema, 'rsi_14': rsi, 'macd': macd, 'macd_signal': macd_signal,
+        'macd_histogram': macd - macd_signal,
+        'bollinger_upper': bollinger_middle + BOLLINGER_WIDTH * bollinger_std,
+        'bollinger_middle': bollinger_middle,
+        'bollinger_lower': bollinger_middle - BOLLINGER_WIDTH * bollinger_std,
+        'atr_14': atr, 'vwap': vwap,
+    }
+    # Back to long form: one row per stored bar
+    long = pd.DataFrame({name: frame.stack(future_stack=True) for name, frame in columns.items()})
+    long = long.reindex(pd.MultiIndex.from_arrays([prices['position'], prices['symbol']]))
+    result = pd.DataFrame({'symbol': prices['symbol'], 'date': prices['date'], 'close': prices['close_price']})
+    for name in INDICATOR_COLUMNS:
+        result[name] = long[name].to_numpy()
+
+    # State after each symbol's last bar, and before it (so a revised last
+    # bar can be re-applied)
+    dates = prices.pivot(index='position', columns='symbol', values='date')
+    lengths = prices.groupby('symbol').size()
+    states = {}
+    for symbol, length in lengths.items():
+        states[symbol] = _state_at(
+            symbol, length - 1, dates, close, ema, avg_gain, avg_loss,
+            ema_fast, ema_slow, macd_signal, atr, typical_pv, volume
+        )
+    return result, states
+
+def _state_at(symbol, position, dates, close, ema, avg_gain, avg_loss,
+              ema_fast, ema_slow, macd_signal, atr, typical_pv, volume) -> Dict[str, Any]:
+    """Recursion state of one symbol after the bar at `position` (and before it)"""
+    def at(frame, row):
+        value = frame.at[row, symbol]
+        return None if pd.isna(value) else float(value)
+
+    def snapshot(row):
+        if row < 0:
+            return None
+        start = max(0, row - BOLLINGER_PERIOD + 1)
+        vwap_start = max(0, row - VWAP_PERIOD + 1)
+        return {
+            'date': dates.at[row, symbol],
+            'close': at(close, row),
+            'ema': at(ema, row), 'avg_gain': at(avg_gain, row), 'avg_loss': at(avg_loss, row),
+            'ema_fast': at(ema_fast, row), 'ema_slow': at(ema_slow, row), 'macd_signal': at(macd_signal, row),
+            'atr': at(atr, row),
+            # Closes, price x volume and volumes needed to extend the rolling windows by one bar
+            'window': close[symbol].to_numpy()[start:row + 1].tolist(),
+            'pv_window': typical_pv[symbol].to_numpy()[vwap_start:row + 1].tolist(),
+            'volume_window': volume[symbol].to_numpy()[vwap_start:row + 1].tolist(),
+            'bars': row + 1,
+        }
+
+    state = snapshot(position)
+    state['previous'] = snapshot(position - 1)
+    return state
+
+def update_indicator_state(state: Optional[Dict[str, Any]], bar: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Apply one bar (date, open/high/low/close_price, volume) to a symbol's
+    state in O(1). A bar with the same date as the state's last bar replaces
+    that bar. Returns the new state and the indicator row of the bar.
+    """
+    if state is not None and bar['date'] == state['date']:
+        state = state['previous']
+    close_price = float(bar['close_price'])
+    high, low, volume = float(bar['high_price']), float(bar['low_price']), float(bar['volume'])
+    typical_pv = (high + low + close_price) / 3.0 * volume
+
+    if state is None:
+        new = {
+            'ema': close_price, 'avg_gain': None, 'avg_loss': None,
+            'ema_fast': close_price, 'ema_slow': close_price, 'macd_signal': 0.0,
+            'atr': high - low,
+            'window': [close_price], 'pv_window': [typical_pv], 'volume_window': [volume], 'bars': 1,
+        }
+    else:
+        change = close_price - state['close']
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        rsi_alpha = 1.0 / RSI_PERIOD
+
+        def step(previous, value, alpha):
+            return value if previous is None else previous + alpha * (value - previous)
+
+        ema_fast = step(state['ema_fast'], close_price, _ema_alpha(MACD_FAST))
+        ema_slow = step(state['ema_slow'], close_price, _ema_alpha(MACD_SLOW))
+        true_range = max(high - low, abs(high - state['close']), abs(low - state['close']))
+        new = {
+            'ema': step(state['ema'], close_price, _ema_alpha(EMA_PERIOD)),
+            'avg_gain': step(state['avg_gain'], gain, rsi_alpha),
+            'avg_loss': step(state['avg_loss'], loss, rsi_alpha),
+            'ema_fast': ema_fast, 'ema_slow': ema_slow,
+            'macd_signal': step(state['macd_signal'], ema_fast - ema_slow, _ema_alpha(MACD_SIGNAL)),
+            'atr': step(state['atr'], true_range, 1.0 / ATR_PERIOD),
+            'window': (state['window'] + [close_price])[-BOLLINGER_PERIOD:],
+            'pv_window': (state['pv_window'] + [typical_pv])[-VWAP_PERIOD:],
+            'volume_window': (state['volume_window'] + [volume])[-VWAP_PERIOD:],
+            'bars': state['bars'] + 1,
+        }
+    new['date'] = bar['date']
+    new['close'] = close_price
+    new['previous'] = state
+    # The previous state only needs to support one revision
+    if state is not None:
+        state['previous'] = None
+
+    window = np.array(new['window'])
+    full = len(window) >= BOLLINGER_PERIOD
+    middle = float(window.mean()) if full else None
+    std = float(window.std()) if full else None
+    macd = new['ema_fast'] - new['ema_slow']
+    window_volume = sum(new['volume_window'])
+    vwap_full = len(new['volume_window']) >= VWAP_PERIOD and window_volume > 0
+    row = {
+        'date': bar['date'], 'close': close_price,
+        'sma_20': float(window[-SMA_PERIOD:].mean()) if len(window) >= SMA_PERIOD else None,
+        'ema_20': new['ema'],
+        'rsi_14': float(_rsi(new['avg_gain'], new['avg_loss'])) if new['avg_gain'] is not None else None,
+        'macd': macd, 'macd_signal': new['macd_signal'], 'macd_histogram': macd - new['macd_signal'],
+        'bollinger_upper': middle + BOLLINGER_WIDTH * std if full else None,
+        'bollinger_middle': middle,
+        'bollinger_lower': middle - BOLLINGER_WIDTH * std if full else None,
+        'atr_14': new['atr'],
+        'vwap': sum(new['pv_window']) / window_volume if vwap_full else None,
+    }
+    return new, row
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+class IndicatorService:
+    """
+    Technical indicators (SMA, EMA, RSI, MACD, Bollinger bands, ATR and a
+    rolling VWAP) over stored prices.
+
+    The first request for a symbol computes its whole history in one
+    vectorized pass, together with any other uncached symbols. The resulting
+    recursion state is kept in memory, so later requests only apply the bars
+    stored since then.
+    """
+
+    def __init__(self, stock_service):
+        self.stock_service = stock_service
+        self.history_days = int(os.getenv("INDICATOR_HISTORY_DAYS", "365"))
+        # symbol -> (state, latest indicator row)
+        self._states: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _full_compute(self, db: Session, symbols: List[str]) -> pd.DataFrame:
+        start_date = datetime.now() - timedelta(days=self.history_days)
+        prices = self.stock_service.get_stocks_history_frame(db, symbols, start_date)
+        if prices.empty:
+            return pd.DataFrame(columns=['symbol', 'date', 'close'] + INDICATOR_COLUMNS)
+        result, states = compute_indicators(prices)
+        last_rows = result.groupby('symbol').tail(1)
+        with self._lock:
+            for row in last_rows.to_dict('records'):
+                self._states[row['symbol']] = (states[row['symbol']], row)
+        return result
+
+    def _catch_up(self, db: Session, symbols: List[str]) -> None:
+        """Apply the bars stored since each cached symbol's last bar, including a revised last bar"""
+        with self._lock:
+            last_dates = {symbol: self._states[symbol][0]['date'] for symbol in symbols}
+        prices = self.stock_service.get_stocks_history_frame(db, symbols, min(last_dates.values()))
+        prices = prices.sort_values(['symbol', 'date'])
+        with self._lock:
+            for bar in prices.to_dict('records'):
+                symbol = bar['symbol']
+                if bar['date'] < last_dates[symbol]:
+                    continue
+                state, _ = self._states[symbol]
+                self._states[symbol] = update_indicator_state(state, bar)
+
+    def get_indicators(self, db: Session, symbols: List[str], days: int = None) -> Dict[str, Any]:
+        """
+        Get the latest indicator values of each symbol, or the values of every
+        bar of the last `days` days (which always recomputes the history).
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if days is not None:
+            result = self._full_compute(db, symbols)
+            cutoff = datetime.now() - timedelta(days=days)
+            result = result[result['date'] >= cutoff]
+            return {
+                symbol: [{key: _clean(value) for key, value in row.items() if key != 'symbol'}
+                         for row in result[result['symbol'] == symbol].to_dict('records')]
+                for symbol in symbols
+            }
+
+        with self._lock:
+            cached = [symbol for symbol in symbols if symbol in self._states]
+        uncached = [symbol for symbol in symbols if symbol not in cached]
+        if cached:
+            self._catch_up(db, cached)
+        if uncached:
+            self._full_compute(db, uncached)
+
+        with self._lock:
+            return {
+                symbol: {key: _clean(value) for key, value in self._states[symbol][1].items() if key != 'symbol'}
+                if symbol in self._states else None
+                for symbol in symbols
+            }
@@ -0,0 +1,172 @@
+import json
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Dict, Any
+import logging
+import os
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# Columns of a Yahoo Finance style history frame (indexed by 'Date')
+HISTORY_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class MarketDataProvider(ABC):
+    """
+    Source of market data for StockService.
+
+    History frames are Yahoo Finance shaped (a 'Date' index and the
+    HISTORY_COLUMNS) and quotes are Yahoo `info` shaped dicts, so providers
+    can be swapped without touching the normalization in StockService.
+    Failures are raised as exceptions.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def history(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Daily bars of one symbol from start_date (inclusive) to end_date (exclusive)"""
+
+    @abstractmethod
+    def download(self, symbols: List[str], start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+        """Daily bars of several symbols in one batched call; symbols without data are left out"""
+
+    @abstractmethod
+    def info(self, symbol: str) -> Dict[str, Any]:
+        """Quote and company info of one symbol"""
+
+class YahooProvider(MarketDataProvider):
+    """Market data from Yahoo Finance through yfinance"""
+
+    name = "yahoo"
+
+    def history(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(start=start_date, end=end_date)
+
+    def download(self, symbols: List[str], start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+        data = yf.download(
+            symbols,
+            start=start_date,
+            end=end_date,
+            group_by='ticker',
+            auto_adjust=True,
+            threads=True,
+            progress=False
+        )
+        frames = {}
+        if data is None or data.empty:
+            return frames
+
+        downloaded = set(data.columns.get_level_values(0)) if isinstance(data.columns, pd.MultiIndex) else set()
+        for symbol in symbols:
+            if symbol not in downloaded:
+                continue
+            # Days on which only other symbols traded come back as NaN rows
+            symbol_data = data[symbol].dropna(subset=['Close'])
+            if not symbol_data.empty:
+                frames[symbol] = symbol_data
+        return frames
+
+    def info(self, symbol: str) -> Dict[str, Any]:
+        return yf.Ticker(symbol).info
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline provider serving recorded fixtures from disk, for benchmarks and
+    load tests:
+
+    - `<root>/history/<SYMBOL>.csv` with a Date column and HISTORY_COLUMNS
+    - `<root>/quotes/<SYMBOL>.json` with a Yahoo `info` style dict
+
+    Every call sleeps for `latency` seconds and fails with probability
+    `error_rate` (drawn from a seeded generator, so runs are repeatable).
+    """
+
+    name = "replay"
+
+    def __init__(self, root: str = None, latency: float = None, error_rate: float = None, seed: int = None):
+        self.root = root or os.getenv("REPLAY_FIXTURES_PATH", "./fixtures/market_data")
+        self.latency = latency if latency is not None else float(os.getenv("REPLAY_LATENCY_MS", "0")) / 1000.0
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("REPLAY_ERROR_RATE", "0"))
+        self._random = random.Random(seed if seed is not None else int(os.getenv("REPLAY_SEED", "0")))
+        self._history: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _simulate_call(self, what: str) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise ConnectionError(f"Injected replay error for {what}")
+
+    def _load_history(self, symbol: str) -> pd.DataFrame:
+        with self._lock:
+            if symbol not in self._history:
+                path = os.path.join(self.root, "history", f"{symbol}.csv")
+                if os.path.exists(path):
+                    frame = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+                else:
+                    frame = pd.DataFrame(columns=HISTORY_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+                self._history[symbol] = frame.sort_index()
+            return self._history[symbol]
+
+    def _slice(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        frame = self._load_history(symbol)
+        return frame[(frame.index >= pd.Timestamp(start_date)) & (frame.index < pd.Timestamp(end_date))].copy()
+
+    def history(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        self._simulate_call(symbol)
+        return self._slice(symbol, start_date, end_date)
+
+    def download(self, symbols: List[str], start_date: datetime, end_date: datetime) -> Dict[str, pd.DataFrame]:
+        self._simulate_call(f"{len(symbols)} symbols")
+        frames = {}
+        for symbol in symbols:
+            frame = self._slice(symbol, start_date, end_date)
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def info(self, symbol: str) -> Dict[str, Any]:
+        self._simulate_call(symbol)
+        path = os.path.join(self.root, "quotes", f"{symbol}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as quote_file:
+            return json.load(quote_file)
+
+def record_fixtures(source: MarketDataProvider, root: str, symbols: List[str],
+                    start_date: datetime, end_date: datetime) -> Dict[str, int]:
+    """
+    Record history and quotes of symbols from a provider (e.g. YahooProvider)
+    into a ReplayProvider fixture directory. Returns the bars written per symbol.
+    """
+    os.makedirs(os.path.join(root, "history"), exist_ok=True)
+    os.makedirs(os.path.join(root, "quotes"), exist_ok=True)
+    written = {}
+    for symbol, frame in source.download(symbols, start_date, end_date).items():
+        frame = frame[HISTORY_COLUMNS].copy()
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        frame.index.name = 'Date'
+        frame.to_csv(os.path.join(root, "history", f"{symbol}.csv"))
+        written[symbol] = len(frame)
+    for symbol in symbols:
+        info = source.info(symbol)
+        with open(os.path.join(root, "quotes", f"{symbol}.json"), "w") as quote_file:
+            json.dump(info, quote_file, default=str)
+    return written
+
+def get_provider(name: str = None) -> MarketDataProvider:
+    """Provider selected by MARKET_DATA_PROVIDER (yahoo or replay)"""
+    name = (name or os.getenv("MARKET_DATA_PROVIDER", "yahoo")).lower()
+    if name == "replay":
+        return ReplayProvider()
+    if name != "yahoo":
+        logger.warning(f"Unknown market data provider {name}, using yahoo")
+    return YahooProvider()
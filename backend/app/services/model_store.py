@@ -0,0 +1,324 @@
+import json
+import multiprocessing
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+import os
+import numpy as np
+from sqlalchemy.orm import Session
+from .predictors import Predictor, get_predictor_class, training_data
+
+try:
+    import fcntl
+except ImportError:  # Windows: LATEST updates are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Training jobs kept, in memory and as status files
+_KEPT_JOBS = 100
+
+class ModelStore:
+    """
+    Versioned trained models on disk:
+    `<root>/<algorithm>/<symbol>/<days_ahead>d/v<version>.npz`, next to a
+    LATEST file naming the current version. Files are written to a temporary
+    name and renamed, so readers never see a partial model.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or os.getenv("MODEL_STORE_PATH", "./data/models")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _latest_lock(self, directory: str):
+        """Exclusive across processes (flock on <directory>/LATEST.lock) and threads"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, "LATEST.lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _directory(self, algorithm: str, symbol: str, days_ahead: int) -> str:
+        return os.path.join(self.root, algorithm, symbol, f"{days_ahead}d")
+
+    def latest_version(self, algorithm: str, symbol: str, days_ahead: int) -> Optional[int]:
+        try:
+            with open(os.path.join(self._directory(algorithm, symbol, days_ahead), "LATEST")) as latest_file:
+                return int(latest_file.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, algorithm: str, symbol: str, days_ahead: int, predictor: Predictor, meta: Dict[str, Any]) -> int:
+        """
+        Write a model as the next version and make it the latest one. The
+        version is reserved by creating its file exclusively, so concurrent
+        trainings of the same model get distinct versions.
+        """
+        directory = self._directory(algorithm, symbol, days_ahead)
+        os.makedirs(directory, exist_ok=True)
+        version = (self.latest_version(algorithm, symbol, days_ahead) or 0) + 1
+        while True:
+            path = os.path.join(directory, f"v{version}.npz")
+            try:
+                open(path, "x").close()
+                break
+            except FileExistsError:
+                version += 1
+        meta = {**meta, "version": version}
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as model_file:
+            np.savez(model_file, meta=np.array(json.dumps(meta)), **predictor.get_state())
+        os.replace(tmp_path, path)
+
+        # A concurrent training that reserved a later version may finish
+        # first, so LATEST is compared and replaced under the lock
+        with self._latest_lock(directory):
+            if version > (self.latest_version(algorithm, symbol, days_ahead) or 0):
+                latest_path = os.path.join(directory, "LATEST")
+                with open(f"{latest_path}.{os.getpid()}.tmp", "w") as latest_file:
+                    latest_file.write(str(version))
+                os.replace(f"{latest_path}.{os.getpid()}.tmp", latest_path)
+        return version
+
+    def load(self, algorithm: str, symbol: str, days_ahead: int, version: int) -> Tuple[Predictor, Dict[str, Any]]:
+        path = os.path.join(self._directory(algorithm, symbol, days_ahead), f"v{version}.npz")
+        with np.load(path, allow_pickle=False) as archive:
+            state = {name: archive[name] for name in archive.files if name != "meta"}
+            meta = json.loads(str(archive["meta"]))
+        return get_predictor_class(algorithm).from_state(state), meta
+
+class ModelCache:
+    """
+    Per-process LRU of loaded models. Each model version is read from disk
+    once; a lookup only checks the LATEST pointer, so a newly trained version
+    replaces the cached one on its next use.
+    """
+
+    def __init__(self, store: ModelStore, max_entries: int = None):
+        self.store = store
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("MODEL_CACHE_SIZE", "128"))
+        # (algorithm, symbol, days_ahead) -> (version, predictor, meta), least recently used first
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, algorithm: str, symbol: str, days_ahead: int) -> Optional[Tuple[Predictor, Dict[str, Any]]]:
+        """Latest trained model and its metadata, or None when none is trained"""
+        version = self.store.latest_version(algorithm, symbol, days_ahead)
+        if version is None:
+            return None
+        key = (algorithm, symbol, days_ahead)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        try:
+            predictor, meta = self.store.load(algorithm, symbol, days_ahead, version)
+        except Exception as e:
+            logger.error(f"Error loading {algorithm} model v{version} for {symbol}: {str(e)}")
+            return None
+        with self._lock:
+            self._entries[key] = (version, predictor, meta)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return predictor, meta
+
+def train_model(root: str, algorithm: str, symbol: str, days_ahead: int,
+                features: np.ndarray, targets: np.ndarray, trained_through: str) -> Dict[str, Any]:
+    """
+    Fit one model and save it as a new version. Module-level so it can run
+    in a worker process. Returns the saved model's metadata.
+    """
+    predictor = get_predictor_class(algorithm)().fit(features, targets)
+    residual = targets - predictor.predict(features)
+    total = targets - targets.mean()
+    r2 = 1 - float(residual @ residual) / float(total @ total) if float(total @ total) > 0 else 0.0
+    meta = {
+        "algorithm": algorithm,
+        "symbol": symbol,
+        "days_ahead": days_ahead,
+        "samples": int(len(targets)),
+        "r2": r2,
+        "trained_through": trained_through,
+        "trained_at": datetime.now().isoformat(),
+    }
+    meta["version"] = ModelStore(root).save(algorithm, symbol, days_ahead, predictor, meta)
+    return meta
+
+class ModelTrainer:
+    """
+    Trains models from the feature store in a background process pool of
+    MODEL_TRAIN_WORKERS processes (0 trains inline), one task per symbol.
+    Submitting returns a job at once; its status is updated as the symbols
+    finish and saved under `<model store>/jobs`, so any API worker can report
+    it.
+    """
+
+    def __init__(self, feature_store, model_store: ModelStore, max_workers: int = None):
+        self.feature_store = feature_store
+        self.model_store = model_store
+        if max_workers is None:
+            max_workers = int(os.getenv("MODEL_TRAIN_WORKERS", str(min(2, os.cpu_count() or 1))))
+        self.max_workers = max_workers
+        self.min_samples = int(os.getenv("MODEL_MIN_SAMPLES", "60"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs API threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.model_store.root, "jobs", f"{job_id}.json")
+
+    def _save_job(self, job: Dict[str, Any]) -> None:
+        """Write the job status file; called under self._lock"""
+        path = self._job_path(job["id"])
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.{os.getpid()}.tmp", "w") as job_file:
+                json.dump(job, job_file, default=lambda value: value.isoformat())
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError as e:
+            logger.error(f"Error saving training job {job['id']}: {str(e)}")
+
+    def _prune_jobs(self) -> None:
+        """Remove all but the newest status files"""
+        directory = os.path.dirname(self._job_path("job"))
+        try:
+            paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+            for path in sorted(paths, key=os.path.getmtime)[:-_KEPT_JOBS]:
+                os.remove(path)
+        except OSError as e:
+            logger.error(f"Error pruning training jobs: {str(e)}")
+
+    def _finish(self, job: Dict[str, Any], symbol: str, future: Future) -> None:
+        try:
+            meta = future.result()
+            outcome = ("trained", {"symbol": symbol, "version": meta["version"], "samples": meta["samples"], "r2": meta["r2"]})
+        except Exception as e:
+            logger.error(f"Training {job['algorithm']} for {symbol} failed: {str(e)}")
+            outcome = ("failed", {"symbol": symbol, "error": str(e)})
+            if isinstance(e, BrokenProcessPool):
+                self._reset_executor()
+        with self._lock:
+            job[outcome[0]].append(outcome[1])
+            job["pending"] -= 1
+            if job["pending"] == 0:
+                job["status"] = "completed"
+                job["finished_at"] = datetime.now()
+            self._save_job(job)
+
+    def submit(self, db: Session, symbols: List[str] = None, algorithm: str = "ridge_regression",
+               days_ahead: int = 1) -> Dict[str, Any]:
+        """
+        Start training `algorithm` for symbols (default: the active watchlist)
+        on their stored features. Symbols with fewer than MODEL_MIN_SAMPLES
+        usable days are skipped. Returns the job.
+        """
+        get_predictor_class(algorithm)
+        if symbols is None:
+            symbols = self.feature_store.watchlist_service.get_active_symbols(db)
+        history = self.feature_store.get_history(db, symbols)
+
+        tasks = []
+        skipped = []
+        for symbol, features in history.groupby('symbol', sort=False):
+            inputs, targets = training_data(features, days_ahead)
+            if len(targets) < self.min_samples:
+                skipped.append(symbol)
+                continue
+            trained_through = features['date'].iloc[-1].isoformat()
+            tasks.append((symbol, inputs, targets, trained_through))
+        skipped.extend(symbol for symbol in symbols if symbol not in set(history['symbol']))
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "running" if tasks else "completed",
+            "algorithm": algorithm,
+            "days_ahead": days_ahead,
+            "submitted_at": datetime.now(),
+            "finished_at": None if tasks else datetime.now(),
+            "pending": len(tasks),
+            "trained": [],
+            "failed": [],
+            "skipped": skipped,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+            while len(self._jobs) > _KEPT_JOBS:
+                self._jobs.popitem(last=False)
+            self._save_job(job)
+        self._prune_jobs()
+
+        for symbol, inputs, targets, trained_through in tasks:
+            args = (self.model_store.root, algorithm, symbol, days_ahead, inputs, targets, trained_through)
+            if self.max_workers <= 0:
+                future = Future()
+                try:
+                    future.set_result(train_model(*args))
+                except Exception as e:
+                    future.set_exception(e)
+                self._finish(job, symbol, future)
+                continue
+            try:
+                future = self._get_executor().submit(train_model, *args)
+            except BrokenProcessPool:
+                self._reset_executor()
+                future = self._get_executor().submit(train_model, *args)
+            future.add_done_callback(lambda done, symbol=symbol: self._finish(job, symbol, done))
+
+        logger.info(f"Training job {job['id']}: {len(tasks)} {algorithm} models, {len(skipped)} symbols skipped")
+        return self.get_job(job["id"])
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Snapshot of a training job, or None if it is unknown. Jobs submitted
+        to another worker are read from their status file.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return {**job, "trained": list(job["trained"]), "failed": list(job["failed"]), "skipped": list(job["skipped"])}
+        if not all(char in "0123456789abcdef" for char in job_id):
+            return None
+        try:
+            with open(self._job_path(job_id)) as job_file:
+                return json.load(job_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        self._reset_executor()
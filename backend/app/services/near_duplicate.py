@@ -0,0 +1,108 @@
+import difflib
+import zlib
+import numpy as np
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+# Prime just above 2**32, used as the modulus of the MinHash permutations
+_HASH_PRIME = np.uint64(4294967311)
+
+class NearDuplicateIndex:
+    """
+    Near-duplicate headline index, bucketed by publication date.
+
+    Each headline gets a MinHash signature over its character shingles, and
+    the signature is split into LSH bands. A lookup only runs the exact
+    `difflib.SequenceMatcher` check against headlines that share at least one
+    band on the same date, instead of against every headline seen so far.
+    Candidates are checked in insertion order, so the first stored headline
+    above the threshold wins, as in the pairwise scan this replaces.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_bands: int = 40, rows_per_band: int = 3,
+                 shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        self.shingle_size = shingle_size
+
+        num_perm = num_bands * rows_per_band
+        rng = np.random.RandomState(seed)
+        # a < 2**31 and shingle hashes < 2**32 keep a * h + b inside uint64
+        self._a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+        # date -> {"titles": [...], "payloads": [...], "bands": [dict per band]}
+        self._buckets: Dict[date, Dict[str, Any]] = {}
+        self._last_signature: Optional[Tuple[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return sum(len(bucket["titles"]) for bucket in self._buckets.values())
+
+    def _shingles(self, text: str) -> List[str]:
+        size = self.shingle_size
+        if len(text) <= size:
+            return [text]
+        return list({text[i:i + size] for i in range(len(text) - size + 1)})
+
+    def _signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the (already lowercased) text"""
+        if self._last_signature is not None and self._last_signature[0] == text:
+            return self._last_signature[1]
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self._shingles(text)),
+            dtype=np.uint64
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _HASH_PRIME
+        signature = permuted.min(axis=1)
+        self._last_signature = (text, signature)
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows_per_band
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.num_bands)]
+
+    @staticmethod
+    def _date_key(published_date) -> date:
+        return published_date.date() if isinstance(published_date, datetime) else published_date
+
+    def match(self, title: str, published_date) -> Optional[Any]:
+        """
+        Return the payload of the first stored headline on the same date whose
+        similarity ratio with `title` exceeds the threshold, or None.
+        """
+        bucket = self._buckets.get(self._date_key(published_date))
+        if bucket is None:
+            return None
+
+        text = title.lower()
+        candidates = set()
+        for band_table, key in zip(bucket["bands"], self._band_keys(self._signature(text))):
+            candidates.update(band_table.get(key, ()))
+
+        text_length = len(text)
+        for position in sorted(candidates):
+            other = bucket["titles"][position]
+            # Upper bound of SequenceMatcher.ratio() from the lengths alone
+            total = text_length + len(other)
+            if total and 2.0 * min(text_length, len(other)) / total <= self.threshold:
+                continue
+            matcher = difflib.SequenceMatcher(None, text, other)
+            if matcher.quick_ratio() > self.threshold and matcher.ratio() > self.threshold:
+                return bucket["payloads"][position]
+        return None
+
+    def add(self, title: str, published_date, payload: Any) -> None:
+        """Store a headline and its payload (e.g. the aggregated cluster it heads)"""
+        date_key = self._date_key(published_date)
+        bucket = self._buckets.get(date_key)
+        if bucket is None:
+            bucket = {"titles": [], "payloads": [], "bands": [{} for _ in range(self.num_bands)]}
+            self._buckets[date_key] = bucket
+
+        text = title.lower()
+        position = len(bucket["titles"])
+        bucket["titles"].append(text)
+        bucket["payloads"].append(payload)
+        for band_table, key in zip(bucket["bands"], self._band_keys(self._signature(text))):
+            band_table.setdefault(key, []).append(position)
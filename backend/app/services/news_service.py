@@ -1,22 +1,28 @@
-import feedparser
-import requests
-import ssl
-import certifi
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import logging
-from sqlalchemy.orm import Session
-from ..models import News, RSSSource, RawNews, AggregatedNews
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from ..models import News, RSSSource, RawNews, AggregatedNews, PipelineWatermark, NewsStockTag
+from .feed_fetcher import FeedFetcher
+from .feed_parser import FeedParserPool
+from .bulk_writer import insert_missing, chunked
+from .near_duplicate import NearDuplicateIndex
+from .feed_scheduler import FeedHealthPolicy
+from .watchlist_service import WatchlistService, WatchlistMatcher, default_aliases
 import os
 import re
-import difflib
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Watermark name for the incremental raw -> aggregated news step
+AGGREGATION_WATERMARK = "aggregated_news"
+
 class NewsService:
-    def __init__(self):
+    def __init__(self, watchlist_service: WatchlistService = None):
         # List of curated RSS feeds (discovered from various sources)
         self.rss_sources = [
             # Direct from publisher (working)
@@ -35,6 +41,13 @@ class NewsService:
         ]
         self.default_stock = os.getenv("STOCK_SYMBOL", "TATAELXSI.NS")
         self.stock_name = os.getenv("STOCK_NAME", "Tata Elxsi")
+        self.feed_fetcher = FeedFetcher()
+        self.feed_parser = FeedParserPool()
+        self.feed_health = FeedHealthPolicy()
+        self.watchlist_service = watchlist_service or WatchlistService()
+        # Raw news ids below the watermark that are scanned again, since a
+        # concurrent poller can commit a lower id after a higher one
+        self.aggregation_id_margin = int(os.getenv("AGGREGATION_ID_MARGIN", "500"))
     
     def fetch_news_from_all_sources(self) -> (List[Dict[str, Any]], List[Dict[str, Any]]):
         """
@@ -45,62 +58,42 @@ class NewsService:
         sources_status = []
         seen = {}
         
-        for source in self.rss_sources:
+        # Download every feed concurrently; results come back in source order
+        results = self.feed_fetcher.fetch_all(self.rss_sources)
+        # Parse and normalize the bodies in the parser process pool
+        parsed = self.feed_parser.parse_many([result["content"] for result in results])
+        
+        for source, result, parsed_feed in zip(self.rss_sources, results, parsed):
             url = source["url"]
             name = source["name"]
             try:
-                # Try with proper SSL first
-                try:
-                    response = requests.get(url, verify=certifi.where(), timeout=10)
-                    response.raise_for_status()
-                    logger.info(f"Successfully fetched {name} with SSL verification")
-                except Exception as ssl_error:
-                    # Fall back to unverified SSL for development
-                    logger.warning(f"SSL verification failed for {name}, trying without verification: {str(ssl_error)}")
-                    response = requests.get(url, verify=False, timeout=10)
-                    response.raise_for_status()
-                    logger.info(f"Successfully fetched {name} without SSL verification")
-                
-                # Parse the content with feedparser
-                feed = feedparser.parse(response.content)
+                if result["error"] is not None:
+                    raise Exception(result["error"])
+                if parsed_feed["error"] is not None:
+                    raise Exception(parsed_feed["error"])
                 
-                if not feed.entries:
+                if not parsed_feed["records"]:
                     sources_status.append({"name": name, "url": url, "status": "failed"})
                     continue
                 sources_status.append({"name": name, "url": url, "status": "ok"})
-                for entry in feed.entries:
-                    # Parse publication date
-                    published_date = datetime.now()
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        published_date = datetime(*entry.published_parsed[:6])
-                    # Deduplication key: title + date (ignore case/punct)
-                    title_key = re.sub(r'[^a-zA-Z0-9 ]', '', entry.title.lower()) if hasattr(entry, 'title') else ''
-                    date_key = published_date.strftime('%Y-%m-%d')
-                    dedup_key = f"{title_key}_{date_key}"
-                    # Prepare news item
-                    news_item = {
-                        'title': entry.title if hasattr(entry, 'title') else '',
-                        'description': entry.description if hasattr(entry, 'description') else '',
-                        'link': entry.link if hasattr(entry, 'link') else '',
-                        'published_date': published_date,
-                        'source': name
-                    }
+                for record in parsed_feed["records"]:
+                    dedup_key = record['dedup_key']
                     # Deduplication logic
                     if dedup_key in seen:
                         # Merge sources and extra info
                         seen[dedup_key]['sources'].append(name)
                         # If this source has more info, add to additional_info
-                        if len(entry.description if hasattr(entry, 'description') else '') > len(seen[dedup_key]['description']):
+                        if len(record['description']) > len(seen[dedup_key]['description']):
                             seen[dedup_key]['additional_info'] = {
                                 'source': name,
-                                'details': entry.description
+                                'details': record['description']
                             }
                     else:
                         seen[dedup_key] = {
-                            'title': news_item['title'],
-                            'description': news_item['description'],
-                            'link': news_item['link'],
-                            'published_date': news_item['published_date'],
+                            'title': record['title'],
+                            'description': record['description'],
+                            'link': record['link'],
+                            'published_date': record['published_date'],
                             'sources': [name],
                             'additional_info': None
                         }
@@ -113,6 +106,14 @@ class NewsService:
             deduped_news.append(item)
         return deduped_news, sources_status
     
+    def _stock_keywords(self, stock_symbol: str, stock_name: str = None) -> List[str]:
+        """Create search keywords for a single stock"""
+        keywords = default_aliases(stock_symbol, stock_name)
+        keywords.append(stock_symbol.lower().replace('.ns', '').replace('.bo', ''))
+        if stock_symbol == self.watchlist_service.default_symbol:
+            keywords.extend(self.watchlist_service.default_extra_aliases)
+        return keywords
+    
     def filter_news_by_stock(self, news_items: List[Dict[str, Any]], stock_symbol: str = None, stock_name: str = None) -> List[Dict[str, Any]]:
         """
         Filter news items that are related to the specified stock
@@ -126,31 +127,12 @@ class NewsService:
         try:
             logger.info(f"Filtering news for stock: {stock_name} ({stock_symbol})")
             
-            # Create search keywords
-            keywords = [
-                stock_name.lower(),
-                stock_symbol.lower().replace('.ns', '').replace('.bo', ''),
-                'tata elxsi',
-                'elxsi'
-            ]
-            
-            # Remove common suffixes for broader matching
-            base_symbol = stock_symbol.split('.')[0].lower()
-            keywords.append(base_symbol)
+            matcher = WatchlistMatcher({stock_symbol: self._stock_keywords(stock_symbol, stock_name)})
+            filtered_news = matcher.tag(news_items)
             
-            filtered_news = []
-            
-            for news_item in news_items:
-                title = news_item.get('title', '').lower()
-                description = news_item.get('description', '').lower()
-                
-                # Check if any keyword is present in title or description
-                is_related = any(keyword in title or keyword in description for keyword in keywords)
-                
-                if is_related:
-                    news_item['related_stock'] = stock_symbol
-                    filtered_news.append(news_item)
-                    logger.info(f"Found related news: {news_item.get('title', '')[:50]}...")
+            for news_item in filtered_news:
+                news_item['related_stock'] = stock_symbol
+                logger.info(f"Found related news: {news_item.get('title', '')[:50]}...")
             
             logger.info(f"Filtered {len(filtered_news)} news items related to {stock_name}")
             return filtered_news
@@ -159,46 +141,100 @@ class NewsService:
             logger.error(f"Error filtering news: {str(e)}")
             return []
     
+    def tag_news_with_watchlist(self, db: Session, news_items: List[Dict[str, Any]], stock_symbol: str = None) -> List[Dict[str, Any]]:
+        """
+        Tag news items with every watchlist symbol they mention, in one pass per
+        item. Returns the items related to at least one symbol, with
+        'related_stocks' set and 'related_stock' set to the primary symbol.
+        """
+        matcher = self.watchlist_service.get_matcher(db)
+        
+        # A requested symbol outside the watchlist is matched alongside it
+        if stock_symbol is not None and stock_symbol not in matcher.symbols:
+            stock_name = self.stock_name if stock_symbol == self.default_stock else None
+            matcher = self.watchlist_service.get_matcher(
+                db, extra={stock_symbol: self._stock_keywords(stock_symbol, stock_name)}
+            )
+        
+        tagged = matcher.tag(news_items)
+        
+        for news_item in tagged:
+            if stock_symbol in news_item['related_stocks']:
+                news_item['related_stock'] = stock_symbol
+            else:
+                news_item['related_stock'] = news_item['related_stocks'][0]
+        
+        logger.info(f"Tagged {len(tagged)} of {len(news_items)} news items with watchlist symbols")
+        return tagged
+    
     def save_news_to_db(self, db: Session, news_items: List[Dict[str, Any]]) -> bool:
         """
         Save news items to database
         """
+        return self.bulk_save_news(db, news_items) is not None
+    
+    def bulk_save_news(self, db: Session, news_items: List[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+        """
+        Save news items to database in bulk, skipping links that already exist.
+        Returns inserted/skipped counts, or None on failure.
+        """
         try:
             logger.info(f"Saving {len(news_items)} news items to database")
             
-            saved_count = 0
-            
-            for news_item in news_items:
-                # Check if news already exists (by link)
-                existing_news = db.query(News).filter(
-                    News.link == news_item['link']
-                ).first()
-                
-                if existing_news:
-                    logger.debug(f"News already exists: {news_item.get('title', '')[:30]}...")
-                    continue
-                
-                # Create new news record
-                news = News(
-                    title=news_item['title'],
-                    description=news_item.get('description', ''),
-                    link=news_item['link'],
-                    published_date=news_item['published_date'],
-                    source=news_item['source'],
-                    related_stock=news_item.get('related_stock')
-                )
-                
-                db.add(news)
-                saved_count += 1
+            rows = [
+                {
+                    'title': news_item['title'],
+                    'description': news_item.get('description', ''),
+                    'link': news_item['link'],
+                    'published_date': news_item['published_date'],
+                    'source': news_item['source'],
+                    'related_stock': news_item.get('related_stock')
+                }
+                for news_item in news_items
+            ]
+            counts = insert_missing(db, News, rows, key='link')
+            self._save_news_tags(db, news_items)
             
             db.commit()
-            logger.info(f"Successfully saved {saved_count} new news items to database")
-            return True
+            logger.info(f"Successfully saved {counts['inserted']} new news items to database ({counts['skipped']} already existed)")
+            return counts
             
         except Exception as e:
             logger.error(f"Error saving news to database: {str(e)}")
             db.rollback()
-            return False
+            return None
+    
+    def _save_news_tags(self, db: Session, news_items: List[Dict[str, Any]]) -> int:
+        """Store the 'related_stocks' tags of saved news items, skipping existing ones"""
+        symbols_by_link = {
+            news_item['link']: news_item['related_stocks']
+            for news_item in news_items if news_item.get('related_stocks')
+        }
+        if not symbols_by_link:
+            return 0
+        
+        rows = []
+        for links in chunked(list(symbols_by_link)):
+            news_ids = dict(db.query(News.link, News.id).filter(News.link.in_(links)).all())
+            existing = set(db.query(NewsStockTag.news_id, NewsStockTag.symbol).filter(
+                NewsStockTag.news_id.in_(news_ids.values())
+            ).all())
+            for link, news_id in news_ids.items():
+                for symbol in symbols_by_link[link]:
+                    if (news_id, symbol) not in existing:
+                        rows.append({'news_id': news_id, 'symbol': symbol})
+        if rows:
+            db.execute(insert(NewsStockTag), rows)
+        return len(rows)
+    
+    def _news_query(self, stock_symbol: str, limit: int, days: int):
+        """Latest news whose primary symbol matches, or that is tagged with it"""
+        start_date = datetime.now() - timedelta(days=days)
+        tagged_news_ids = select(NewsStockTag.news_id).where(NewsStockTag.symbol == stock_symbol)
+        return select(News).where(
+            or_(News.related_stock == stock_symbol, News.id.in_(tagged_news_ids)),
+            News.published_date >= start_date
+        ).order_by(News.published_date.desc()).limit(limit)
     
     def get_news_from_db(self, db: Session, stock_symbol: str = None, limit: int = 5, days: int = 7) -> List[News]:
         """
@@ -208,17 +244,26 @@ class NewsService:
             stock_symbol = self.default_stock
         
         try:
-            # Calculate start date
-            start_date = datetime.now() - timedelta(days=days)
+            news_items = db.execute(self._news_query(stock_symbol, limit, days)).scalars().all()
             
-            # Query database
-            news_items = db.query(News).filter(
-                News.related_stock == stock_symbol,
-                News.published_date >= start_date
-            ).order_by(News.published_date.desc()).limit(limit).all()
+            logger.info(f"Retrieved {len(news_items)} news items from database for {stock_symbol}")
+            return list(news_items)
             
+        except Exception as e:
+            logger.error(f"Error retrieving news from database: {str(e)}")
+            return []
+    
+    async def get_news_from_db_async(self, db: AsyncSession, stock_symbol: str = None, limit: int = 5, days: int = 7) -> List[News]:
+        """
+        Async variant of get_news_from_db
+        """
+        if stock_symbol is None:
+            stock_symbol = self.default_stock
+        
+        try:
+            news_items = (await db.execute(self._news_query(stock_symbol, limit, days))).scalars().all()
             logger.info(f"Retrieved {len(news_items)} news items from database for {stock_symbol}")
-            return news_items
+            return list(news_items)
             
         except Exception as e:
             logger.error(f"Error retrieving news from database: {str(e)}")
@@ -233,13 +278,16 @@ class NewsService:
         
         try:
             # Fetch news from RSS
-            news_items = self.fetch_news_from_rss()
+            news_items, _ = self.fetch_news_from_all_sources()
             
-            if news_items is None:
+            if not news_items:
                 return False
             
-            # Filter news for the specific stock
-            filtered_news = self.filter_news_by_stock(news_items, stock_symbol)
+            for news_item in news_items:
+                news_item.setdefault('source', news_item['sources'][0])
+            
+            # Tag news with every watchlist symbol it mentions
+            filtered_news = self.tag_news_with_watchlist(db, news_items, stock_symbol)
             
             if not filtered_news:
                 logger.info("No relevant news found for the stock")
@@ -261,37 +309,50 @@ class NewsService:
         
         try:
             news_items = self.get_news_from_db(db, stock_symbol, limit)
+            return self._summarize_news(stock_symbol, news_items)
             
-            summary = {
-                'stock_symbol': stock_symbol,
-                'total_news': len(news_items),
-                'latest_news_date': None,
-                'news_items': []
-            }
-            
-            if news_items:
-                summary['latest_news_date'] = news_items[0].published_date
-                
-                for news in news_items:
-                    summary['news_items'].append({
-                        'id': news.id,
-                        'title': news.title,
-                        'description': news.description,
-                        'link': news.link,
-                        'published_date': news.published_date,
-                        'source': news.source
-                    })
-            
-            return summary
+        except Exception as e:
+            logger.error(f"Error getting news summary: {str(e)}")
+            return self._summarize_news(stock_symbol, [])
+    
+    async def get_latest_news_summary_async(self, db: AsyncSession, stock_symbol: str = None, limit: int = 5) -> Dict[str, Any]:
+        """
+        Async variant of get_latest_news_summary
+        """
+        if stock_symbol is None:
+            stock_symbol = self.default_stock
+        
+        try:
+            news_items = await self.get_news_from_db_async(db, stock_symbol, limit)
+            return self._summarize_news(stock_symbol, news_items)
             
         except Exception as e:
             logger.error(f"Error getting news summary: {str(e)}")
-            return {
-                'stock_symbol': stock_symbol,
-                'total_news': 0,
-                'latest_news_date': None,
-                'news_items': []
-            } 
+            return self._summarize_news(stock_symbol, [])
+    
+    def _summarize_news(self, stock_symbol: str, news_items: List[News]) -> Dict[str, Any]:
+        summary = {
+            'stock_symbol': stock_symbol,
+            'total_news': len(news_items),
+            'latest_news_date': None,
+            'news_items': []
+        }
+        
+        if news_items:
+            summary['latest_news_date'] = news_items[0].published_date
+            
+            for news in news_items:
+                summary['news_items'].append({
+                    'id': news.id,
+                    'title': news.title,
+                    'description': news.description,
+                    'link': news.link,
+                    'published_date': news.published_date,
+                    'source': news.source
+                })
+        
+        return summary
+
 
     def discover_and_store_rss_sources(self, db: Session):
         """
@@ -319,24 +380,77 @@ class NewsService:
                     db.add(rss_source)
         db.commit()
 
-    def deduplicate_and_store_aggregated_news(self, db: Session):
+    def _get_watermark(self, db: Session, name: str) -> PipelineWatermark:
+        """
+        Get the persisted high-water mark of a pipeline step, creating it
+        with last_id 0 if missing (saved when the caller commits)
+        """
+        watermark = db.query(PipelineWatermark).filter(PipelineWatermark.name == name).first()
+        if watermark is None:
+            watermark = PipelineWatermark(name=name, last_id=0)
+            db.add(watermark)
+        return watermark
+
+    def deduplicate_and_store_aggregated_news(self, db: Session) -> Dict[str, int]:
         """
         Deduplicate raw news and store in aggregated_news table (rule-based: title+date+fuzzy).
+        Only raw news above the persisted watermark is processed, plus the
+        last aggregation_id_margin ids below it so rows committed late are not
+        skipped; it is merged into the existing aggregated clusters of the
+        same dates. Returns processed/created/merged counts.
         """
-        raw_news = db.query(RawNews).all()
+        watermark = self._get_watermark(db, AGGREGATION_WATERMARK)
+        # On the first incremental run the table may hold clusters written by
+        # full re-dedup runs, which already account for the raw news they match
+        bootstrap = watermark.id is None
+        last_id = watermark.last_id or 0
+        
+        raw_news = db.query(RawNews).options(joinedload(RawNews.rss_source)).filter(
+            RawNews.id > max(last_id - self.aggregation_id_margin, 0)
+        ).order_by(RawNews.id).all()
+        
+        counts = {"processed": 0, "created": 0, "merged": 0}
+        if not raw_news:
+            db.commit()
+            return counts
+        
+        # Near-duplicate index: only same-date LSH candidates get the fuzzy title check
+        index = NearDuplicateIndex(threshold=0.85)
+        
+        # Seed the index with the stored clusters of the dates being processed
+        dates = {news.published_date.date() for news in raw_news}
+        range_start = datetime.combine(min(dates), datetime.min.time())
+        range_end = datetime.combine(max(dates), datetime.min.time()) + timedelta(days=1)
+        existing = []
+        for aggregated in db.query(AggregatedNews).filter(
+            AggregatedNews.published_date >= range_start,
+            AggregatedNews.published_date < range_end
+        ).order_by(AggregatedNews.id):
+            if aggregated.published_date.date() not in dates:
+                continue
+            agg = {
+                'row': aggregated,
+                'description': aggregated.description,
+                'sources': list(aggregated.sources or []),
+                'additional_info': aggregated.additional_info,
+                'changed': False
+            }
+            existing.append(agg)
+            index.add(aggregated.title, aggregated.published_date, agg)
+        
         seen = []
         for news in raw_news:
             # Try to find a similar news in seen (title+date+fuzzy)
-            found = None
-            for agg in seen:
-                # Fuzzy match on title
-                ratio = difflib.SequenceMatcher(None, news.title.lower(), agg['title'].lower()).ratio()
-                same_date = news.published_date.date() == agg['published_date'].date()
-                if ratio > 0.85 and same_date:
-                    found = agg
-                    break
+            found = index.match(news.title, news.published_date)
+            if found and news.id <= last_id and news.rss_source.source in found['sources']:
+                # Rescanned row that was aggregated by an earlier run
+                continue
+            counts['processed'] += 1
             if found:
+                if bootstrap and found['row'] is not None:
+                    continue
                 found['sources'].append(news.rss_source.source)
+                found['changed'] = True
                 # If this news has more info, update additional_info
                 if len(news.description or '') > len(found['description'] or ''):
                     found['additional_info'] = {
@@ -344,65 +458,169 @@ class NewsService:
                         'details': news.description
                     }
             else:
-                seen.append({
+                agg = {
+                    'row': None,
                     'title': news.title,
                     'description': news.description,
                     'published_date': news.published_date,
                     'sources': [news.rss_source.source],
                     'additional_info': None
-                })
-        # Store in aggregated_news table
-        for agg in seen:
-            exists = db.query(AggregatedNews).filter(
-                AggregatedNews.title == agg['title'],
-                AggregatedNews.published_date == agg['published_date']
-            ).first()
-            if not exists:
-                aggregated = AggregatedNews(
-                    title=agg['title'],
-                    description=agg['description'],
-                    published_date=agg['published_date'],
-                    sources=agg['sources'],
-                    additional_info=agg['additional_info']
-                )
-                db.add(aggregated)
-        db.commit() 
+                }
+                seen.append(agg)
+                index.add(news.title, news.published_date, agg)
+        
+        # Merge new sources into the stored clusters
+        for agg in existing:
+            if agg['changed']:
+                agg['row'].sources = agg['sources']
+                agg['row'].additional_info = agg['additional_info']
+                counts['merged'] += 1
+        
+        # Store new clusters in aggregated_news table
+        if seen:
+            db.execute(insert(AggregatedNews), [
+                {
+                    'title': agg['title'],
+                    'description': agg['description'],
+                    'published_date': agg['published_date'],
+                    'sources': agg['sources'],
+                    'additional_info': agg['additional_info']
+                }
+                for agg in seen
+            ])
+            counts['created'] = len(seen)
+        
+        watermark.last_id = max(last_id, raw_news[-1].id)
+        db.commit()
+        logger.info(f"Aggregated {counts['processed']} raw news items: {counts['created']} new clusters, {counts['merged']} merged")
+        return counts
 
-    def fetch_and_store_raw_news(self, db: Session):
+    def _store_raw_news(self, db: Session, rows: List[Dict[str, Any]], polled: List[tuple], now: datetime) -> Dict[str, int]:
+        """
+        Insert new raw news rows and record a successful poll of each
+        (rss_source, fetch result, changed) entry, in one transaction.
+        Raises on failure; the caller rolls back.
+        """
+        inserted_rows = []
+        counts = insert_missing(db, RawNews, rows, key='link', inserted_rows=inserted_rows)
+        
+        # Learn each feed's cadence from the entries that were new
+        new_entry_dates = {}
+        for row in inserted_rows:
+            new_entry_dates.setdefault(row['rss_source_id'], []).append(row['published_date'])
+        for rss_source, result, is_changed in polled:
+            # Validators are committed with the entries, so a failed insert
+            # refetches the feed on the next poll
+            rss_source.etag = result["etag"]
+            rss_source.last_modified = result["last_modified"]
+            if is_changed:
+                rss_source.content_hash = result["content_hash"]
+            self.feed_health.record_success(
+                rss_source, new_entry_dates.get(rss_source.id, []), result["tls_verified"], now
+            )
+        db.commit()
+        return counts
+    
+    def fetch_and_store_raw_news(self, db: Session, rss_sources: List[RSSSource] = None) -> Dict[str, int]:
         """
         Fetch news from all RSS sources in DB, store raw news in raw_news table.
+        Sources with an open circuit breaker are skipped unless passed
+        explicitly. Poll health is recorded on each source row.
+        Returns inserted/skipped counts for the whole refresh.
         """
-        rss_sources = db.query(RSSSource).all()
+        now = datetime.utcnow()
+        if rss_sources is None:
+            rss_sources = [
+                rss_source for rss_source in db.query(RSSSource).all()
+                if self.feed_health.is_available(rss_source, now)
+            ]
+        # Share what we know about each host's TLS setup with the fetcher
         for rss_source in rss_sources:
+            self.feed_fetcher.remember_tls(rss_source.url, rss_source.tls_verified)
+        
+        results = self.feed_fetcher.fetch_all([
+            {
+                "url": rss_source.url,
+                "name": rss_source.url,
+                "etag": rss_source.etag,
+                "last_modified": rss_source.last_modified
+            }
+            for rss_source in rss_sources
+        ])
+        # Parse only the feeds that were fetched and changed since the last poll
+        changed = [
+            result["error"] is None and not result["not_modified"]
+            and result["content_hash"] != rss_source.content_hash
+            for rss_source, result in zip(rss_sources, results)
+        ]
+        parsed = self.feed_parser.parse_many([
+            result["content"] if is_changed else None
+            for result, is_changed in zip(results, changed)
+        ])
+        
+        rows = []
+        polled = {}
+        failed = 0
+        for rss_source, result, is_changed, parsed_feed in zip(rss_sources, results, changed, parsed):
             try:
-                # Try with proper SSL first
-                try:
-                    response = requests.get(rss_source.url, verify=certifi.where(), timeout=10)
-                    response.raise_for_status()
-                except Exception as ssl_error:
-                    # Fall back to unverified SSL for development
-                    logger.warning(f"SSL verification failed for {rss_source.url}, trying without verification: {str(ssl_error)}")
-                    response = requests.get(rss_source.url, verify=False, timeout=10)
-                    response.raise_for_status()
+                if result["error"] is not None:
+                    raise Exception(result["error"])
                 
-                # Parse the content with feedparser
-                feed = feedparser.parse(response.content)
-                
-                for entry in feed.entries:
-                    published_date = datetime.now()
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        published_date = datetime(*entry.published_parsed[:6])
-                    # Check if already exists (by link)
-                    exists = db.query(RawNews).filter(RawNews.link == entry.link).first()
-                    if not exists:
-                        raw_news = RawNews(
-                            rss_source_id=rss_source.id,
-                            title=entry.title if hasattr(entry, 'title') else '',
-                            description=entry.description if hasattr(entry, 'description') else '',
-                            link=entry.link if hasattr(entry, 'link') else '',
-                            published_date=published_date
-                        )
-                        db.add(raw_news)
+                # Skip parsing when the feed is unchanged since the last poll
+                if not is_changed:
+                    logger.info(f"Feed unchanged, skipping parse: {rss_source.url}")
+                elif parsed_feed["error"] is not None:
+                    raise Exception(parsed_feed["error"])
+                else:
+                    for record in parsed_feed["records"]:
+                        rows.append({
+                            'rss_source_id': rss_source.id,
+                            'title': record['title'],
+                            'description': record['description'],
+                            'link': record['link'],
+                            'published_date': record['published_date']
+                        })
+                polled[rss_source.id] = (rss_source, result, is_changed)
+            except Exception as e:
+                logger.error(f"Error fetching news from {rss_source.url}: {str(e)}")
+                self.feed_health.record_failure(rss_source, str(e), now)
+                failed += 1
+        
+        # Failure counts are committed on their own, so a failed insert below
+        # cannot roll them back and keep the circuit breaker from opening
+        if failed:
+            try:
                 db.commit()
             except Exception as e:
-                logger.error(f"Error fetching news from {rss_source.url}: {str(e)}") 
\ No newline at end of file
+                logger.error(f"Error storing feed health: {str(e)}")
+                db.rollback()
+        
+        # One set-based existence check and executemany insert for the whole
+        # refresh; if one feed's rows break it, store feed by feed so only
+        # that feed is lost
+        try:
+            counts = self._store_raw_news(db, rows, list(polled.values()), now)
+        except Exception as e:
+            logger.warning(f"Bulk raw news insert failed, storing feed by feed: {str(e)}")
+            db.rollback()
+            rows_by_source = {}
+            for row in rows:
+                rows_by_source.setdefault(row['rss_source_id'], []).append(row)
+            counts = {"inserted": 0, "skipped": 0}
+            for source_id, entry in polled.items():
+                try:
+                    source_counts = self._store_raw_news(db, rows_by_source.get(source_id, []), [entry], now)
+                    counts["inserted"] += source_counts["inserted"]
+                    counts["skipped"] += source_counts["skipped"]
+                except Exception as e:
+                    db.rollback()
+                    rss_source = entry[0]
+                    logger.error(f"Error storing raw news from {rss_source.url}: {str(e)}")
+                    self.feed_health.record_failure(rss_source, f"Error storing entries: {str(e)}", now)
+                    try:
+                        db.commit()
+                    except Exception as e:
+                        logger.error(f"Error storing feed health: {str(e)}")
+                        db.rollback()
+        logger.info(f"Stored {counts['inserted']} new raw news items ({counts['skipped']} already existed)")
+        return counts
@@ -0,0 +1,353 @@
+import hashlib
+import json
+from datetime import datetime, date, time, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import Prediction, PredictionAccuracy
+from .bulk_writer import chunked, upsert_rows
+from .predictors import MODEL_FEATURES
+
+logger = logging.getLogger(__name__)
+
+# Days of stored history the trend model looks at, and the closes it uses
+PREDICTION_LOOKBACK_DAYS = 10
+TREND_WINDOW = 3
+TREND_ALGORITHM = "simple_trend_analysis"
+# Predictions for a non-trading day are resolved with the next close within this many days
+ACCURACY_MATCH_DAYS = 7
+
+def simple_trend(closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trend model over a (symbols x TREND_WINDOW) matrix of closes, oldest
+    first: the next price extrapolates the mean daily change and the
+    confidence grows with the trend strength (capped at 0.8). Returns the
+    predicted prices and confidence scores, one per row.
+    """
+    closes = np.asarray(closes, dtype=float)
+    changes = np.diff(closes, axis=1) / closes[:, :-1]
+    avg_change = changes.mean(axis=1)
+    predicted = closes[:, -1] * (1 + avg_change)
+    confidence = np.minimum(np.abs(avg_change) * 10, 0.8)
+    return predicted, confidence
+
+def input_version(dates, closes) -> str:
+    """
+    Fingerprint of the bars a prediction is made from. It changes when a new
+    bar arrives or the latest bar is revised, and only then.
+    """
+    digest = hashlib.sha1()
+    for bar_date, close in zip(dates, closes):
+        digest.update(f"{pd.Timestamp(bar_date).date().isoformat()}={float(close):.6f};".encode())
+    return digest.hexdigest()[:16]
+
+def target_date(days_ahead: int) -> datetime:
+    """Day a prediction made today for `days_ahead` days is for"""
+    return datetime.combine(date.today() + timedelta(days=days_ahead), time.min)
+
+class PredictionService:
+    """
+    Trend predictions memoized per (symbol, target date, days_ahead,
+    algorithm, input version): a prediction is only computed and written
+    when its key is new, so repeated requests are plain reads until new
+    price data arrives.
+    """
+
+    def __init__(self, stock_service, watchlist_service, feature_store=None, model_cache=None):
+        self.stock_service = stock_service
+        self.watchlist_service = watchlist_service
+        self.feature_store = feature_store
+        self.model_cache = model_cache
+        self.accuracy_window = int(os.getenv("PREDICTION_ACCURACY_WINDOW", "30"))
+
+    def _feature_snapshots(self, db: Session, symbols: List[str]) -> Dict[str, str]:
+        """JSON of the latest stored feature vector of each symbol, as recorded in features_used"""
+        if self.feature_store is None:
+            return {}
+        return {symbol: json.dumps(vector) for symbol, vector in self.feature_store.get_vectors(db, symbols).items()}
+
+    def _prediction_rows(self, symbols: List[str], closes: np.ndarray, versions: List[str],
+                         days_ahead: int, features: Dict[str, str] = None) -> List[Dict[str, Any]]:
+        predicted, confidence = simple_trend(closes)
+        prediction_date = target_date(days_ahead)
+        features = features or {}
+        return [
+            {
+                "stock_symbol": symbol,
+                "prediction_date": prediction_date,
+                "predicted_price": round(float(price), 2),
+                "confidence_score": round(float(score), 3),
+                "prediction_type": "daily",
+                "algorithm_used": TREND_ALGORITHM,
+                "days_ahead": days_ahead,
+                "input_version": version,
+                "features_used": features.get(symbol),
+            }
+            for symbol, price, score, version in zip(symbols, predicted, confidence, versions)
+        ]
+
+    def _find(self, db: Session, symbol: str, days_ahead: int, version: str,
+              algorithm: str = TREND_ALGORITHM) -> Optional[Prediction]:
+        return db.query(Prediction).filter(
+            Prediction.stock_symbol == symbol,
+            Prediction.prediction_date == target_date(days_ahead),
+            Prediction.days_ahead == days_ahead,
+            Prediction.algorithm_used == algorithm,
+            Prediction.input_version == version
+        ).first()
+
+    def _store(self, db: Session, row: Dict[str, Any]) -> Optional[Prediction]:
+        prediction = Prediction(**row)
+        db.add(prediction)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request stored the same prediction first
+            db.rollback()
+            return self._find(db, row["stock_symbol"], row["days_ahead"], row["input_version"], row["algorithm_used"])
+        return prediction
+
+    def latest_closes(self, db: Session, symbols: List[str]) -> Tuple[List[str], np.ndarray, List[str]]:
+        """
+        Get the last TREND_WINDOW closes of every symbol as one matrix (row =
+        symbol, oldest first) from a single history query, with the input
+        version of each row. Symbols with fewer stored closes are left out.
+        """
+        start_date = datetime.now() - timedelta(days=PREDICTION_LOOKBACK_DAYS)
+        prices = self.stock_service.get_stocks_history_frame(db, symbols, start_date)
+        if prices.empty:
+            return [], np.empty((0, TREND_WINDOW)), []
+
+        recent = prices.groupby('symbol', sort=False).tail(TREND_WINDOW)
+        recent = recent.assign(position=recent.groupby('symbol', sort=False).cumcount())
+        closes = recent.pivot(index='symbol', columns='position', values='close_price').dropna()
+        if closes.shape[1] < TREND_WINDOW:
+            return [], np.empty((0, TREND_WINDOW)), []
+        dates = recent.pivot(index='symbol', columns='position', values='date').loc[closes.index]
+
+        closes_matrix = closes.to_numpy(dtype=float)
+        versions = [input_version(row_dates, row_closes) for row_dates, row_closes in zip(dates.to_numpy(), closes_matrix)]
+        return closes.index.tolist(), closes_matrix, versions
+
+    def predict(self, db: Session, symbol: str, prices: Dict[str, np.ndarray], days_ahead: int = 1) -> Optional[Prediction]:
+        """
+        Predict one symbol from its recent date and close_price columns (oldest
+        first). The stored prediction for the same inputs is returned as is;
+        otherwise a new one is computed and stored.
+        """
+        if len(prices['close_price']) < TREND_WINDOW:
+            return None
+        closes = np.asarray(prices['close_price'][-TREND_WINDOW:], dtype=float)
+        version = input_version(prices['date'][-TREND_WINDOW:], closes)
+
+        existing = self._find(db, symbol, days_ahead, version)
+        if existing is not None:
+            return existing
+
+        row = self._prediction_rows(
+            [symbol], closes[None, :], [version], days_ahead, self._feature_snapshots(db, [symbol])
+        )[0]
+        return self._store(db, row)
+
+    def predict_with_model(self, db: Session, symbol: str, days_ahead: int, algorithm: str) -> Optional[Prediction]:
+        """
+        Predict one symbol with the latest trained model of `algorithm`, from
+        the cached model and the symbol's latest stored feature vector. Returns
+        None when no model is trained or the features are incomplete, or older
+        than the latest price bar (the prediction is made from today, so stale
+        features would be mislabeled). The prediction is memoized on the model
+        version and the feature vector.
+        """
+        if self.model_cache is None or self.feature_store is None:
+            return None
+        model = self.model_cache.get(algorithm, symbol, days_ahead)
+        vector = self.feature_store.get_vectors(db, [symbol]).get(symbol)
+        if model is None or vector is None or any(vector[column] is None for column in MODEL_FEATURES):
+            return None
+        latest_bar = self.stock_service.get_latest_dates(db, [symbol]).get(symbol)
+        if latest_bar is not None and datetime.fromisoformat(vector['date']).date() < latest_bar.date():
+            logger.warning(f"Features of {symbol} end on {vector['date'][:10]}, before its latest price bar {latest_bar.date()}")
+            return None
+        predictor, meta = model
+
+        features_used = json.dumps(vector)
+        version = hashlib.sha1(f"{meta['version']};{features_used}".encode()).hexdigest()[:16]
+        existing = self._find(db, symbol, days_ahead, version, algorithm)
+        if existing is not None:
+            return existing
+
+        expected_return = float(predictor.predict(np.array([[vector[column] for column in MODEL_FEATURES]]))[0])
+        return self._store(db, {
+            "stock_symbol": symbol,
+            "prediction_date": target_date(days_ahead),
+            "predicted_price": round(vector['close_price'] * (1 + expected_return), 2),
+            "confidence_score": round(min(max(meta.get('r2', 0.0), 0.0), 1.0), 3),
+            "prediction_type": "daily",
+            "algorithm_used": algorithm,
+            "days_ahead": days_ahead,
+            "input_version": version,
+            "features_used": features_used,
+        })
+
+    def predict_batch(self, db: Session, symbols: List[str] = None, days_ahead: int = 1) -> Dict[str, Any]:
+        """
+        Predict every symbol (default: the active watchlist) in one vectorized
+        pass over their price matrix and store the new predictions with one
+        bulk insert. Symbols whose prediction for the same inputs is already
+        stored are reused. Returns {"predicted": [...], "reused": [...],
+        "skipped": [...], "predictions": new rows}.
+        """
+        if symbols is None:
+            symbols = self.watchlist_service.get_active_symbols(db)
+        symbols = list(dict.fromkeys(symbols))
+
+        try:
+            candidates, closes, versions = self.latest_closes(db, symbols)
+
+            stored = set()
+            for batch in chunked(candidates):
+                stored.update(db.query(Prediction.stock_symbol, Prediction.input_version).filter(
+                    Prediction.stock_symbol.in_(batch),
+                    Prediction.prediction_date == target_date(days_ahead),
+                    Prediction.days_ahead == days_ahead,
+                    Prediction.algorithm_used == TREND_ALGORITHM
+                ).all())
+            new = np.array([(symbol, version) not in stored for symbol, version in zip(candidates, versions)], dtype=bool)
+            predicted = [symbol for symbol, is_new in zip(candidates, new) if is_new]
+            reused = [symbol for symbol, is_new in zip(candidates, new) if not is_new]
+
+            rows = []
+            if predicted:
+                rows = self._prediction_rows(
+                    predicted, closes[new], [version for version, is_new in zip(versions, new) if is_new],
+                    days_ahead, self._feature_snapshots(db, predicted)
+                )
+                for batch in chunked(rows):
+                    db.execute(insert(Prediction), batch)
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error generating batch predictions for {len(symbols)} symbols: {str(e)}")
+            return {"predicted": [], "reused": [], "skipped": symbols, "predictions": []}
+
+        covered = set(candidates)
+        skipped = [symbol for symbol in symbols if symbol not in covered]
+        logger.info(f"Stored predictions for {len(rows)} of {len(symbols)} symbols ({len(reused)} reused)")
+        return {"predicted": predicted, "reused": reused, "skipped": skipped, "predictions": rows}
+
+    def backfill_accuracy(self, db: Session) -> Dict[str, Any]:
+        """
+        Resolve every prediction whose target day has a closed price bar.
+
+        Unresolved predictions are matched to the first stored close on or
+        after their target day with one as-of join per symbol, their actual
+        price and accuracy (1 - absolute percentage error, floored at 0) are
+        written with one bulk update, and the rolling accuracy of every
+        affected symbol is refreshed. Returns {"resolved": n, "pending": n}.
+        """
+        today = datetime.combine(date.today(), time.min)
+        try:
+            pending = pd.DataFrame(
+                db.query(Prediction.id, Prediction.stock_symbol, Prediction.prediction_date, Prediction.predicted_price)
+                .filter(Prediction.actual_price.is_(None), Prediction.prediction_date < today)
+                .all(),
+                columns=['id', 'symbol', 'target', 'predicted_price']
+            )
+            if pending.empty:
+                return {"resolved": 0, "pending": 0}
+            pending['target'] = pd.to_datetime(pending['target']).dt.normalize()
+
+            # Today's bar may still be intraday, so only earlier closes count
+            prices = self.stock_service.get_stocks_history_frame(
+                db, pending['symbol'].unique().tolist(), pending['target'].min().to_pydatetime()
+            )
+            prices = prices.assign(date=pd.to_datetime(prices['date']))
+            prices = prices[prices['date'] < today]
+
+            matched = pd.merge_asof(
+                pending.sort_values('target'),
+                prices[['symbol', 'date', 'close_price']].sort_values('date'),
+                left_on='target', right_on='date', by='symbol',
+                direction='forward', tolerance=pd.Timedelta(days=ACCURACY_MATCH_DAYS)
+            ).dropna(subset=['close_price'])
+
+            actual = matched['close_price'].to_numpy(dtype=float)
+            predicted = matched['predicted_price'].to_numpy(dtype=float)
+            accuracy = np.clip(1 - np.abs(predicted - actual) / actual, 0, 1)
+            updates = [
+                {"id": int(prediction_id), "actual_price": float(actual_price), "accuracy": round(float(score), 4)}
+                for prediction_id, actual_price, score in zip(matched['id'], actual, accuracy)
+            ]
+            for batch in chunked(updates):
+                db.execute(update(Prediction), batch)
+            if updates:
+                self._refresh_accuracy(db, matched['symbol'].unique().tolist())
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error backfilling prediction accuracy: {str(e)}")
+            return {"resolved": 0, "pending": 0}
+
+        logger.info(f"Resolved {len(updates)} of {len(pending)} pending predictions")
+        return {"resolved": len(updates), "pending": len(pending) - len(updates)}
+
+    def _refresh_accuracy(self, db: Session, symbols: List[str]) -> None:
+        """Recompute the materialized rolling accuracy of symbols from their last resolved predictions"""
+        resolved = []
+        for batch in chunked(symbols):
+            resolved.extend(
+                db.query(Prediction.stock_symbol, Prediction.algorithm_used, Prediction.prediction_date,
+                         Prediction.predicted_price, Prediction.actual_price, Prediction.accuracy)
+                .filter(Prediction.stock_symbol.in_(batch), Prediction.actual_price.isnot(None))
+                .all()
+            )
+        frame = pd.DataFrame(resolved, columns=[
+            'stock_symbol', 'algorithm_used', 'prediction_date', 'predicted_price', 'actual_price', 'accuracy'
+        ])
+        if frame.empty:
+            return
+
+        keys = ['stock_symbol', 'algorithm_used']
+        recent = frame.sort_values('prediction_date').groupby(keys).tail(self.accuracy_window)
+        absolute_error = (recent['predicted_price'] - recent['actual_price']).abs()
+        recent = recent.assign(
+            absolute_error=absolute_error,
+            absolute_percentage_error=absolute_error / recent['actual_price']
+        )
+        summary = recent.groupby(keys).agg(
+            sample_count=('accuracy', 'size'),
+            mean_accuracy=('accuracy', 'mean'),
+            mean_absolute_error=('absolute_error', 'mean'),
+            mean_absolute_percentage_error=('absolute_percentage_error', 'mean'),
+        ).reset_index()
+        upsert_rows(
+            db, PredictionAccuracy, summary.to_dict('records'), keys,
+            ['sample_count', 'mean_accuracy', 'mean_absolute_error', 'mean_absolute_percentage_error']
+        )
+
+    def get_historical_accuracy(self, db: Session, symbol: str, algorithm: str = TREND_ALGORITHM) -> Optional[float]:
+        """Rolling mean accuracy of a symbol's resolved predictions, read from the materialized table"""
+        return db.query(PredictionAccuracy.mean_accuracy).filter(
+            PredictionAccuracy.stock_symbol == symbol,
+            PredictionAccuracy.algorithm_used == algorithm
+        ).scalar()
+
+    async def get_historical_accuracy_async(self, db: AsyncSession, symbol: str,
+                                            algorithm: str = TREND_ALGORITHM) -> Optional[float]:
+        """Async variant of get_historical_accuracy"""
+        return await db.scalar(select(PredictionAccuracy.mean_accuracy).where(
+            PredictionAccuracy.stock_symbol == symbol,
+            PredictionAccuracy.algorithm_used == algorithm
+        ))
+
+    async def get_latest_prediction_async(self, db: AsyncSession, symbol: str) -> Optional[Prediction]:
+        """Most recently created prediction of a symbol"""
+        return await db.scalar(select(Prediction).where(
+            Prediction.stock_symbol == symbol
+        ).order_by(Prediction.created_at.desc()).limit(1))
@@ -0,0 +1,116 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple, Type
+import os
+import numpy as np
+import pandas as pd
+
+# Feature store columns a model predicts from
+MODEL_FEATURES = ['return_1d', 'return_5d', 'return_20d', 'volatility_20d', 'volume_zscore_20d', 'news_count']
+
+class Predictor(ABC):
+    """
+    Plug-in prediction model. A predictor maps feature vectors (rows of
+    MODEL_FEATURES) to the return expected `days_ahead` bars later. Its
+    learned state is a dict of NumPy arrays so it can be saved to and loaded
+    from disk without pickling.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def fit(self, features: np.ndarray, targets: np.ndarray) -> "Predictor":
+        """Train on a (samples x features) matrix and the matching returns"""
+
+    @abstractmethod
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Expected returns of a (samples x features) matrix"""
+
+    @abstractmethod
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Learned state as named arrays"""
+
+    @classmethod
+    @abstractmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "Predictor":
+        """Rebuild a trained predictor from get_state()"""
+
+PREDICTORS: Dict[str, Type[Predictor]] = {}
+
+def register_predictor(cls: Type[Predictor]) -> Type[Predictor]:
+    """Class decorator adding a predictor to the registry under its name"""
+    PREDICTORS[cls.name] = cls
+    return cls
+
+def get_predictor_class(name: str) -> Type[Predictor]:
+    if name not in PREDICTORS:
+        raise ValueError(f"Unknown predictor {name}, expected one of {', '.join(sorted(PREDICTORS))}")
+    return PREDICTORS[name]
+
+@register_predictor
+class RidgePredictor(Predictor):
+    """Ridge regression on standardized features, solved in closed form"""
+
+    name = "ridge_regression"
+
+    def __init__(self, alpha: float = None):
+        self.alpha = alpha if alpha is not None else float(os.getenv("RIDGE_ALPHA", "1.0"))
+        self.mean = None
+        self.scale = None
+        self.coef = None
+        self.intercept = 0.0
+
+    def fit(self, features: np.ndarray, targets: np.ndarray) -> "RidgePredictor":
+        features = np.asarray(features, dtype=float)
+        targets = np.asarray(targets, dtype=float)
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        standardized = (features - self.mean) / self.scale
+        self.intercept = float(targets.mean())
+        gram = standardized.T @ standardized + self.alpha * np.eye(standardized.shape[1])
+        # lstsq also copes with a singular system when alpha is 0
+        self.coef = np.linalg.lstsq(gram, standardized.T @ (targets - self.intercept), rcond=None)[0]
+        return self
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        standardized = (np.asarray(features, dtype=float) - self.mean) / self.scale
+        return standardized @ self.coef + self.intercept
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {
+            "alpha": np.array(self.alpha),
+            "mean": self.mean,
+            "scale": self.scale,
+            "coef": self.coef,
+            "intercept": np.array(self.intercept),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "RidgePredictor":
+        predictor = cls(alpha=float(state["alpha"]))
+        predictor.mean = state["mean"]
+        predictor.scale = state["scale"]
+        predictor.coef = state["coef"]
+        predictor.intercept = float(state["intercept"])
+        return predictor
+
+@register_predictor
+class LinearPredictor(RidgePredictor):
+    """Ordinary least squares linear regression (ridge without a penalty)"""
+
+    name = "linear_regression"
+
+    def __init__(self, alpha: float = None):
+        super().__init__(alpha=0.0)
+
+def training_data(features: pd.DataFrame, days_ahead: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Training pairs of one symbol's stored features (oldest first): each
+    day's MODEL_FEATURES and the return over the next `days_ahead` bars.
+    Days with missing features or no future close yet are left out.
+    """
+    close = features['close_price'].astype(float)
+    target = close.shift(-days_ahead) / close - 1
+    matrix = features[MODEL_FEATURES].astype(float)
+    usable = matrix.notna().all(axis=1) & target.notna()
+    return matrix[usable].to_numpy(), target[usable].to_numpy()
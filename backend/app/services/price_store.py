@@ -0,0 +1,158 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+import logging
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# OHLCV columns kept in the columnar store, in file order
+STORE_COLUMNS = ['date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']
+
+STORE_SCHEMA = pa.schema([
+    ('date', pa.timestamp('ns')),
+    ('open_price', pa.float64()),
+    ('high_price', pa.float64()),
+    ('low_price', pa.float64()),
+    ('close_price', pa.float64()),
+    ('volume', pa.int64()),
+])
+
+class ParquetPriceStore:
+    """
+    Columnar copy of the stock_prices table, for history reads without ORM
+    objects.
+
+    Prices are stored as one Parquet file per symbol and year
+    (`<root>/symbol=<SYMBOL>/year=<YYYY>/prices.parquet`) and read back with
+    memory-mapped files. The SQL table stays the source of truth; the store
+    is updated after every committed upsert.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or os.getenv("PRICE_STORE_PATH", "./data/prices")
+        self._lock = threading.Lock()
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, f"symbol={symbol.replace(os.sep, '_')}")
+
+    def _partition_path(self, symbol: str, year: int) -> str:
+        return os.path.join(self._symbol_dir(symbol), f"year={year}", "prices.parquet")
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive across processes (flock on <root>/.lock) and threads"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stale_path(self, symbol: str) -> str:
+        return os.path.join(self._symbol_dir(symbol), "STALE")
+
+    def has_symbol(self, symbol: str) -> bool:
+        """
+        Whether the prices of symbol are stored and current. A symbol marked
+        stale is treated as absent until its history is written again.
+        """
+        return os.path.isdir(self._symbol_dir(symbol)) and not os.path.exists(self._stale_path(symbol))
+
+    def mark_stale(self, symbols: List[str]) -> None:
+        """Mark symbols whose stored prices may lag SQL, e.g. after a failed write"""
+        for symbol in symbols:
+            os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+            open(self._stale_path(symbol), "a").close()
+
+    def clear_stale(self, symbols: List[str]) -> None:
+        """Mark symbols current again once their whole history was rewritten"""
+        for symbol in symbols:
+            try:
+                os.remove(self._stale_path(symbol))
+            except FileNotFoundError:
+                pass
+
+    def _years(self, symbol: str) -> List[int]:
+        years = []
+        for entry in os.listdir(self._symbol_dir(symbol)):
+            if entry.startswith("year="):
+                years.append(int(entry[len("year="):]))
+        return sorted(years)
+
+    def _read_partition(self, path: str) -> pd.DataFrame:
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def write(self, prices: pd.DataFrame) -> int:
+        """
+        Merge prices (with a 'symbol' column and the STORE_COLUMNS) into the
+        store. Rows replace stored rows of the same symbol and date. Returns
+        the number of partitions rewritten.
+        """
+        if prices.empty:
+            return 0
+        prices = prices[['symbol'] + STORE_COLUMNS].copy()
+        prices['date'] = pd.to_datetime(prices['date'])
+        if prices['date'].dt.tz is not None:
+            # Keep exchange-local wall time, as the SQL table does
+            prices['date'] = prices['date'].dt.tz_localize(None)
+
+        written = 0
+        # Another process (API worker, ingestion job) may merge into the same
+        # partitions, so the read-merge-replace runs under the store lock
+        with self._write_lock():
+            for (symbol, year), partition in prices.groupby([prices['symbol'], prices['date'].dt.year]):
+                path = self._partition_path(symbol, int(year))
+                partition = partition[STORE_COLUMNS]
+                if os.path.exists(path):
+                    partition = pd.concat([self._read_partition(path), partition], ignore_index=True)
+                partition = partition.drop_duplicates(subset='date', keep='last').sort_values('date')
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                table = pa.Table.from_pandas(partition, schema=STORE_SCHEMA, preserve_index=False)
+                # Write next to the partition and swap it in, so readers never
+                # map a half-written file
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                pq.write_table(table, temp_path)
+                os.replace(temp_path, path)
+                written += 1
+        return written
+
+    def read(self, symbol: str, start_date: datetime = None, end_date: datetime = None) -> pd.DataFrame:
+        """
+        Read the stored prices of symbol between start_date and end_date
+        (inclusive), oldest first. Returns an empty frame for unknown symbols.
+        """
+        if not self.has_symbol(symbol):
+            return pd.DataFrame(columns=STORE_COLUMNS)
+
+        frames = []
+        for year in self._years(symbol):
+            if start_date is not None and year < start_date.year:
+                continue
+            if end_date is not None and year > end_date.year:
+                continue
+            frames.append(self._read_partition(self._partition_path(symbol, year)))
+        if not frames:
+            return pd.DataFrame(columns=STORE_COLUMNS)
+
+        prices = pd.concat(frames, ignore_index=True)
+        if start_date is not None:
+            prices = prices[prices['date'] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            prices = prices[prices['date'] <= pd.Timestamp(end_date)]
+        return prices.reset_index(drop=True)
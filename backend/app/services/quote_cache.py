@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Hashable
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class QuoteCache:
+    """
+    In-memory cache of quotes keyed by symbol, with a TTL and LRU eviction.
+
+    - Fresh entries (younger than `ttl`) are returned as is.
+    - Stale entries (younger than `ttl + stale_ttl`) are returned immediately
+      while one background refresh replaces them (stale-while-revalidate).
+    - Misses are single-flight: callers asking for a key that is already
+      being loaded wait for that load instead of starting another.
+
+    Failed loads (None) are not cached, so a stale value keeps being served
+    until it expires.
+    """
+
+    def __init__(self, ttl: float = None, stale_ttl: float = None, max_entries: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "30"))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv("QUOTE_CACHE_STALE_SECONDS", "300"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "256"))
+        # key -> (stored_at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # key -> {"event": Event, "value": loaded value} for loads in progress
+        self._in_flight: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quote-refresh")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        # Caller holds the lock
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], flight: Dict[str, Any]) -> Any:
+        """Run the loader for a flight this thread owns and publish its result"""
+        value = None
+        try:
+            value = loader()
+        except Exception as e:
+            logger.error(f"Error loading quote for {key}: {str(e)}")
+        with self._lock:
+            if value is not None:
+                self._store(key, value)
+            self._in_flight.pop(key, None)
+        flight["value"] = value
+        flight["event"].set()
+        return value
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Get the cached value of key, calling loader() to (re)load it when needed"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age >= self.ttl and key not in self._in_flight:
+                        # Serve the stale value and refresh it in the background
+                        flight = {"event": threading.Event(), "value": None}
+                        self._in_flight[key] = flight
+                        self._refresher.submit(self._load, key, loader, flight)
+                    return entry[1]
+                del self._entries[key]
+
+            flight = self._in_flight.get(key)
+            owner = flight is None
+            if owner:
+                flight = {"event": threading.Event(), "value": None}
+                self._in_flight[key] = flight
+
+        if owner:
+            return self._load(key, loader, flight)
+        flight["event"].wait()
+        return flight["value"]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value loaded elsewhere (e.g. by a streaming poller) as fresh"""
+        if value is None:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one key, or every key"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Dict, Any, Set
+import logging
+import os
+from fastapi.encoders import jsonable_encoder
+from .blocking_io import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Quote fields that are compared to decide whether a quote changed
+_TRACKED_FIELDS = ['current_price', 'previous_close', 'change_percent', 'volume', 'market_cap']
+
+class QuoteBroadcaster:
+    """
+    Fans live quotes out to streaming clients.
+
+    Each subscribed symbol has exactly one background poller, no matter how
+    many clients follow it, so upstream load depends on the number of symbols
+    only. A new subscriber gets the latest quote as a snapshot; after that
+    only the fields that changed are sent. Pollers stop when their last
+    subscriber leaves.
+    """
+
+    def __init__(self, stock_service):
+        self.stock_service = stock_service
+        self.interval = float(os.getenv("QUOTE_STREAM_INTERVAL_SECONDS", "5"))
+        self.queue_size = int(os.getenv("QUOTE_STREAM_QUEUE_SIZE", "100"))
+        # Symbols one client may follow, since every symbol has a poller
+        self.max_symbols = int(os.getenv("QUOTE_STREAM_MAX_SYMBOLS", "20"))
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def new_queue(self) -> asyncio.Queue:
+        """Queue that receives the messages of every symbol a client follows"""
+        return asyncio.Queue(maxsize=self.queue_size)
+
+    def _send(self, queue: asyncio.Queue, message: Dict[str, Any]) -> None:
+        # A slow client loses its oldest messages rather than stalling the poller
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(message)
+
+    def subscribe(self, symbol: str, queue: asyncio.Queue) -> None:
+        """Follow a symbol, starting its poller if it is the first subscriber"""
+        self._subscribers.setdefault(symbol, set()).add(queue)
+        if symbol in self._latest:
+            self._send(queue, {"type": "snapshot", "symbol": symbol, "quote": self._latest[symbol]})
+        if symbol not in self._pollers:
+            self._pollers[symbol] = asyncio.create_task(self._poll(symbol))
+            logger.info(f"Started quote poller for {symbol}")
+
+    def unsubscribe(self, symbol: str, queue: asyncio.Queue) -> None:
+        """Stop following a symbol, stopping its poller after the last subscriber"""
+        subscribers = self._subscribers.get(symbol)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[symbol]
+            poller = self._pollers.pop(symbol, None)
+            if poller is not None:
+                poller.cancel()
+            self._latest.pop(symbol, None)
+            logger.info(f"Stopped quote poller for {symbol}")
+
+    def subscriber_count(self, symbol: str) -> int:
+        return len(self._subscribers.get(symbol, ()))
+
+    def _publish(self, symbol: str, quote: Dict[str, Any]) -> None:
+        previous = self._latest.get(symbol)
+        self._latest[symbol] = quote
+        if previous is None:
+            message = {"type": "snapshot", "symbol": symbol, "quote": quote}
+        else:
+            changes = {field: quote.get(field) for field in _TRACKED_FIELDS if quote.get(field) != previous.get(field)}
+            if not changes:
+                return
+            changes['last_updated'] = quote.get('last_updated')
+            message = {"type": "delta", "symbol": symbol, "changes": changes}
+        for queue in list(self._subscribers.get(symbol, ())):
+            self._send(queue, message)
+
+    async def _poll(self, symbol: str) -> None:
+        while True:
+            try:
+                quote = await run_blocking(self.stock_service.refresh_current_price, symbol)
+                if quote is not None:
+                    self._publish(symbol, jsonable_encoder(quote))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quote poller for {symbol} failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        """Cancel every poller"""
+        pollers = list(self._pollers.values())
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._latest.clear()
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
@@ -1,25 +1,44 @@
-import yfinance as yf
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import logging
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from ..models import StockPrice
 from ..schemas import StockPriceCreate
+from .bulk_writer import upsert_rows, chunked
+from .quote_cache import QuoteCache
+from .price_store import ParquetPriceStore
+from .hot_window import SharedPriceWindow
+from .downsampling import resample_ohlcv, decimate_ohlcv
+from .market_data import MarketDataProvider, get_provider
+from .blocking_io import run_blocking
 import os
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# StockPrice columns written from a fetched DataFrame, unique key first
+PRICE_COLUMNS = ['symbol', 'date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']
+
 class StockService:
-    def __init__(self):
+    def __init__(self, provider: MarketDataProvider = None):
+        self.provider = provider or get_provider()
         self.default_symbol = os.getenv("STOCK_SYMBOL", "TATAELXSI.NS")
         self.historical_days = int(os.getenv("HISTORICAL_DAYS", "30"))
+        self.download_batch_size = int(os.getenv("STOCK_DOWNLOAD_BATCH_SIZE", "100"))
+        self.quote_cache = QuoteCache()
+        self.price_store = ParquetPriceStore() if os.getenv("PRICE_STORE_ENABLED", "False").lower() == "true" else None
+        self.hot_window = SharedPriceWindow() if os.getenv("HOT_WINDOW_ENABLED", "False").lower() == "true" else None
     
-    def fetch_stock_data(self, symbol: str = None, days: int = None) -> Optional[pd.DataFrame]:
+    def fetch_stock_data(self, symbol: str = None, days: int = None, start_date: datetime = None) -> Optional[pd.DataFrame]:
         """
-        Fetch stock data from Yahoo Finance
+        Fetch stock data from the market data provider, either for the last
+        `days` days or from `start_date` onwards
         """
         if symbol is None:
             symbol = self.default_symbol
@@ -28,38 +47,21 @@ class StockService:
             days = self.historical_days
         
         try:
-            logger.info(f"Fetching stock data for {symbol} for the last {days} days")
-            
-            # Calculate start date
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            if start_date is None:
+                logger.info(f"Fetching stock data for {symbol} for the last {days} days")
+                start_date = end_date - timedelta(days=days)
+            else:
+                logger.info(f"Fetching stock data for {symbol} since {start_date.date()}")
             
-            # Fetch data from Yahoo Finance
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(start=start_date, end=end_date)
+            # Fetch data from the market data provider
+            data = self.provider.history(symbol, start_date, end_date)
             
             if data.empty:
                 logger.warning(f"No data found for {symbol}")
                 return None
             
-            # Reset index to make date a column
-            data = data.reset_index()
-            
-            # Rename columns to match our schema
-            data = data.rename(columns={
-                'Date': 'date',
-                'Open': 'open_price',
-                'High': 'high_price',
-                'Low': 'low_price',
-                'Close': 'close_price',
-                'Volume': 'volume'
-            })
-            
-            # Add symbol column
-            data['symbol'] = symbol
-            
-            # Convert date to datetime if it's not already
-            data['date'] = pd.to_datetime(data['date'])
+            data = self._prepare_history(data, symbol)
             
             logger.info(f"Successfully fetched {len(data)} records for {symbol}")
             return data
@@ -68,18 +70,91 @@ class StockService:
             logger.error(f"Error fetching stock data for {symbol}: {str(e)}")
             return None
     
+    def _prepare_history(self, data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """Turn a Yahoo Finance history frame into StockPrice-shaped columns"""
+        # Reset index to make date a column
+        data = data.reset_index()
+        
+        # Rename columns to match our schema
+        data = data.rename(columns={
+            'Date': 'date',
+            'Open': 'open_price',
+            'High': 'high_price',
+            'Low': 'low_price',
+            'Close': 'close_price',
+            'Volume': 'volume'
+        })
+        
+        # Add symbol column
+        data['symbol'] = symbol
+        
+        # Convert date to datetime if it's not already
+        data['date'] = pd.to_datetime(data['date'])
+        return data
+    
+    def fetch_stocks_data(self, symbols: List[str], days: int = None, start_date: datetime = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch several symbols with one batched provider download (a threaded
+        multi-ticker call for Yahoo Finance), one frame per symbol. Symbols
+        without data are left out of the result.
+        """
+        if days is None:
+            days = self.historical_days
+        
+        end_date = datetime.now()
+        if start_date is None:
+            start_date = end_date - timedelta(days=days)
+        
+        try:
+            logger.info(f"Downloading stock data for {len(symbols)} symbols since {start_date.date()}")
+            downloaded = self.provider.download(symbols, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error downloading stock data for {len(symbols)} symbols: {str(e)}")
+            return {}
+        
+        frames = {
+            symbol: self._prepare_history(symbol_data, symbol)
+            for symbol, symbol_data in downloaded.items()
+        }
+        
+        logger.info(f"Downloaded data for {len(frames)} of {len(symbols)} symbols")
+        return frames
+    
     def get_current_price(self, symbol: str = None) -> Optional[Dict[str, Any]]:
         """
-        Get current stock price and basic info
+        Get current stock price and basic info, served from the quote cache
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        quote = self.quote_cache.get(symbol, lambda: self._fetch_current_price(symbol))
+        # Callers may modify the result, keep the cached dict intact
+        return dict(quote) if quote is not None else None
+    
+    async def get_current_price_async(self, symbol: str = None) -> Optional[Dict[str, Any]]:
+        """Async variant of get_current_price; a cache miss fetches on the blocking I/O executor"""
+        return await run_blocking(self.get_current_price, symbol)
+    
+    def refresh_current_price(self, symbol: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the current price bypassing the cache's TTL, and store it in the
+        quote cache for later readers
         """
         if symbol is None:
             symbol = self.default_symbol
         
+        quote = self._fetch_current_price(symbol)
+        self.quote_cache.put(symbol, quote)
+        return dict(quote) if quote is not None else None
+    
+    def _fetch_current_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch current stock price and basic info from the market data provider
+        """
         try:
             logger.info(f"Fetching current price for {symbol}")
             
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = self.provider.info(symbol)
             
             # Get current price
             current_price = info.get('currentPrice', info.get('regularMarketPrice'))
@@ -117,35 +192,26 @@ class StockService:
         try:
             logger.info(f"Saving {len(stock_data)} stock records to database")
             
-            for _, row in stock_data.iterrows():
-                # Check if record already exists
-                existing_record = db.query(StockPrice).filter(
-                    StockPrice.symbol == row['symbol'],
-                    StockPrice.date == row['date']
-                ).first()
-                
-                if existing_record:
-                    # Update existing record
-                    existing_record.open_price = row['open_price']
-                    existing_record.high_price = row['high_price']
-                    existing_record.low_price = row['low_price']
-                    existing_record.close_price = row['close_price']
-                    existing_record.volume = row['volume']
-                else:
-                    # Create new record
-                    stock_price = StockPrice(
-                        symbol=row['symbol'],
-                        date=row['date'],
-                        open_price=row['open_price'],
-                        high_price=row['high_price'],
-                        low_price=row['low_price'],
-                        close_price=row['close_price'],
-                        volume=row['volume']
-                    )
-                    db.add(stock_price)
+            # Build the rows column-wise from NumPy arrays instead of iterrows()
+            rows = [
+                dict(zip(PRICE_COLUMNS, values))
+                for values in zip(
+                    stock_data['symbol'].to_numpy().tolist(),
+                    stock_data['date'].dt.to_pydatetime().tolist(),
+                    stock_data['open_price'].to_numpy(dtype=float).tolist(),
+                    stock_data['high_price'].to_numpy(dtype=float).tolist(),
+                    stock_data['low_price'].to_numpy(dtype=float).tolist(),
+                    stock_data['close_price'].to_numpy(dtype=float).tolist(),
+                    stock_data['volume'].to_numpy(dtype='int64').tolist()
+                )
+            ]
+            
+            # One INSERT ... ON CONFLICT (symbol, date) DO UPDATE per batch
+            upsert_rows(db, StockPrice, rows, ['symbol', 'date'], PRICE_COLUMNS[2:])
             
             db.commit()
             logger.info("Successfully saved stock data to database")
+            self._sync_price_store(db, rows)
             return True
             
         except Exception as e:
@@ -153,6 +219,143 @@ class StockService:
             db.rollback()
             return False
     
+    def _sync_price_store(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """Mirror committed price rows into the columnar store, if enabled"""
+        if self.price_store is None or not rows:
+            return
+        prices = pd.DataFrame(rows, columns=PRICE_COLUMNS)
+        symbols = list(prices['symbol'].unique())
+        try:
+            new_symbols = [symbol for symbol in symbols if not self.price_store.has_symbol(symbol)]
+            if new_symbols:
+                # The first write of a symbol, or the next one after a failed
+                # write, copies its whole SQL history
+                prices = pd.concat([
+                    prices[~prices['symbol'].isin(new_symbols)],
+                    self._query_history(db, new_symbols)
+                ], ignore_index=True)
+            self.price_store.write(prices)
+            self.price_store.clear_stale(new_symbols)
+        except Exception as e:
+            logger.error(f"Error syncing price store: {str(e)}")
+            # Reads fall back to SQL for these symbols until a write succeeds
+            try:
+                self.price_store.mark_stale(symbols)
+            except Exception as e:
+                logger.error(f"Error marking price store symbols stale: {str(e)}")
+    
+    def _history_query(self, symbols: List[str] = None, start_date: datetime = None):
+        query = select(*[getattr(StockPrice, column) for column in PRICE_COLUMNS])
+        if symbols is not None:
+            query = query.where(StockPrice.symbol.in_(symbols))
+        if start_date is not None:
+            query = query.where(StockPrice.date >= start_date)
+        return query.order_by(StockPrice.symbol, StockPrice.date)
+    
+    def _query_history(self, db: Session, symbols: List[str] = None, start_date: datetime = None) -> pd.DataFrame:
+        """Read price columns from SQL straight into a DataFrame, oldest first"""
+        result = db.execute(self._history_query(symbols, start_date))
+        return pd.DataFrame(result.all(), columns=PRICE_COLUMNS)
+    
+    async def _query_history_async(self, db: AsyncSession, symbols: List[str] = None, start_date: datetime = None) -> pd.DataFrame:
+        result = await db.execute(self._history_query(symbols, start_date))
+        return pd.DataFrame(result.all(), columns=PRICE_COLUMNS)
+    
+    def get_stock_chart(self, db: Session, symbol: str = None, days: int = None,
+                        interval: str = '1d', max_points: int = None) -> List[Dict[str, Any]]:
+        """
+        Get chart bars, newest first: daily prices resampled to `interval`
+        (1d, 1w or 1mo) and, with max_points, decimated with LTTB
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        return self._chart_bars(self.get_stock_history_frame(db, symbol, days), symbol, interval, max_points)
+    
+    async def get_stock_chart_async(self, db: AsyncSession, symbol: str = None, days: int = None,
+                                    interval: str = '1d', max_points: int = None) -> List[Dict[str, Any]]:
+        """Async variant of get_stock_chart"""
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        prices = await self.get_stock_history_frame_async(db, symbol, days)
+        return self._chart_bars(prices, symbol, interval, max_points)
+    
+    def _chart_bars(self, prices: pd.DataFrame, symbol: str, interval: str, max_points: int = None) -> List[Dict[str, Any]]:
+        prices = resample_ohlcv(prices[PRICE_COLUMNS[1:]], interval)
+        if max_points:
+            prices = decimate_ohlcv(prices, max_points)
+        prices = prices.iloc[::-1]
+        prices.insert(0, 'symbol', symbol)
+        return prices.to_dict('records')
+    
+    def get_stocks_history_frame(self, db: Session, symbols: List[str], start_date: datetime = None) -> pd.DataFrame:
+        """
+        Get the stored prices of several symbols since start_date as one
+        DataFrame, ordered by symbol and date
+        """
+        return self._query_history(db, symbols, start_date)
+    
+    def get_stock_history_frame(self, db: Session, symbol: str = None, days: int = None) -> pd.DataFrame:
+        """
+        Get stock history as a DataFrame of price columns, oldest first, read
+        from the columnar price store when enabled and from SQL otherwise
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        if days is None:
+            days = self.historical_days
+        
+        start_date = datetime.now() - timedelta(days=days)
+        try:
+            window = self.hot_window.read(symbol, days) if self.hot_window is not None else None
+            if window is not None:
+                prices = pd.DataFrame(window)
+                prices.insert(0, 'symbol', symbol)
+                return prices
+            if self.price_store is not None and self.price_store.has_symbol(symbol):
+                prices = self.price_store.read(symbol, start_date)
+                prices.insert(0, 'symbol', symbol)
+                return prices
+            return self._query_history(db, [symbol], start_date)
+            
+        except Exception as e:
+            logger.error(f"Error retrieving stock history frame for {symbol}: {str(e)}")
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+    
+    async def get_stock_history_frame_async(self, db: AsyncSession, symbol: str = None, days: int = None) -> pd.DataFrame:
+        """
+        Async variant of get_stock_history_frame; the hot window and price
+        store files are read in the threadpool
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        if days is None:
+            days = self.historical_days
+        
+        try:
+            window = await run_in_threadpool(self.hot_window.read, symbol, days) if self.hot_window is not None else None
+            if window is not None:
+                prices = pd.DataFrame(window)
+                prices.insert(0, 'symbol', symbol)
+                return prices
+            return await self._stored_history_frame_async(db, symbol, days)
+            
+        except Exception as e:
+            logger.error(f"Error retrieving stock history frame for {symbol}: {str(e)}")
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+    
+    async def _stored_history_frame_async(self, db: AsyncSession, symbol: str, days: int) -> pd.DataFrame:
+        """History of symbol from the price store, or from SQL for symbols it lacks"""
+        start_date = datetime.now() - timedelta(days=days)
+        if self.price_store is not None and self.price_store.has_symbol(symbol):
+            prices = await run_in_threadpool(self.price_store.read, symbol, start_date)
+            prices.insert(0, 'symbol', symbol)
+            return prices
+        return await self._query_history_async(db, [symbol], start_date)
+    
     def get_stock_history_from_db(self, db: Session, symbol: str = None, days: int = None) -> List[StockPrice]:
         """
         Get stock history from database
@@ -180,22 +383,137 @@ class StockService:
             logger.error(f"Error retrieving stock history from database: {str(e)}")
             return []
     
-    def update_stock_data(self, db: Session, symbol: str = None) -> bool:
+    async def get_stock_history_from_db_async(self, db: AsyncSession, symbol: str = None, days: int = None) -> List[StockPrice]:
         """
-        Update stock data by fetching latest data and saving to database
+        Async variant of get_stock_history_from_db
         """
         if symbol is None:
             symbol = self.default_symbol
         
+        if days is None:
+            days = self.historical_days
+        
         try:
-            # Fetch latest data
-            stock_data = self.fetch_stock_data(symbol, self.historical_days)
+            start_date = datetime.now() - timedelta(days=days)
+            result = await db.execute(select(StockPrice).where(
+                StockPrice.symbol == symbol,
+                StockPrice.date >= start_date
+            ).order_by(StockPrice.date.desc()))
+            stock_prices = list(result.scalars().all())
             
-            if stock_data is None:
-                return False
+            logger.info(f"Retrieved {len(stock_prices)} stock records from database for {symbol}")
+            return stock_prices
             
-            # Save to database
-            return self.save_stock_data_to_db(db, stock_data)
+        except Exception as e:
+            logger.error(f"Error retrieving stock history from database: {str(e)}")
+            return []
+    
+    def get_stock_history_arrays(self, db: Session, symbol: str = None, days: int = None) -> Dict[str, np.ndarray]:
+        """
+        Get stock history as NumPy columns (date and OHLCV), oldest first. These
+        are zero-copy read-only slices of the shared hot window when it holds
+        the range, and columns of get_stock_history_frame otherwise.
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        if days is None:
+            days = self.historical_days
+        
+        window = self.hot_window.read(symbol, days) if self.hot_window is not None else None
+        if window is not None:
+            return window
+        prices = self.get_stock_history_frame(db, symbol, days)
+        return {column: prices[column].to_numpy() for column in PRICE_COLUMNS[1:]}
+    
+    async def get_stock_history_arrays_async(self, db: AsyncSession, symbol: str = None, days: int = None) -> Dict[str, np.ndarray]:
+        """Async variant of get_stock_history_arrays"""
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        if days is None:
+            days = self.historical_days
+        
+        try:
+            window = await run_in_threadpool(self.hot_window.read, symbol, days) if self.hot_window is not None else None
+            if window is not None:
+                return window
+            prices = await self._stored_history_frame_async(db, symbol, days)
+        except Exception as e:
+            logger.error(f"Error retrieving stock history arrays for {symbol}: {str(e)}")
+            prices = pd.DataFrame(columns=PRICE_COLUMNS)
+        return {column: prices[column].to_numpy() for column in PRICE_COLUMNS[1:]}
+    
+    def publish_hot_window(self, db: Session) -> None:
+        """Load the recent prices of every symbol from SQL into the shared hot window"""
+        if self.hot_window is None:
+            return
+        try:
+            start_date = datetime.now() - timedelta(days=self.hot_window.days)
+            self.hot_window.publish(self._query_history(db, start_date=start_date))
+        except Exception as e:
+            logger.error(f"Error publishing hot price window: {str(e)}")
+    
+    def get_latest_dates(self, db: Session, symbols: List[str]) -> Dict[str, datetime]:
+        """
+        Get the latest stored price date of each symbol with one grouped query.
+        Symbols without stored prices are left out.
+        """
+        rows = db.query(StockPrice.symbol, func.max(StockPrice.date)).filter(
+            StockPrice.symbol.in_(symbols)
+        ).group_by(StockPrice.symbol).all()
+        return {symbol: latest_date for symbol, latest_date in rows}
+    
+    def update_stocks_data(self, db: Session, symbols: List[str]) -> Dict[str, Any]:
+        """
+        Refresh several symbols in one pass. Each symbol is fetched from its
+        latest stored date onwards (the last stored day is fetched again, as it
+        may have been an intraday bar), or over the full historical window on
+        first load. Symbols are downloaded in batched multi-ticker calls and
+        all rows are then written with one bulk upsert.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        latest_dates = self.get_latest_dates(db, symbols)
+        
+        # Symbols sharing a start date are downloaded together in batches
+        symbols_by_start: Dict[Optional[datetime], List[str]] = {}
+        for symbol in symbols:
+            latest_date = latest_dates.get(symbol)
+            start_date = None if latest_date is None else datetime.combine(latest_date.date(), datetime.min.time())
+            symbols_by_start.setdefault(start_date, []).append(symbol)
+        
+        fetched: Dict[str, pd.DataFrame] = {}
+        for start_date, start_symbols in symbols_by_start.items():
+            for batch in chunked(start_symbols, self.download_batch_size):
+                fetched.update(self.fetch_stocks_data(batch, self.historical_days, start_date))
+        
+        frames = [fetched[symbol] for symbol in symbols if symbol in fetched]
+        updated = [symbol for symbol in symbols if symbol in fetched]
+        failed = [symbol for symbol in symbols if symbol not in fetched]
+        
+        rows = sum(len(frame) for frame in frames)
+        if frames and not self.save_stock_data_to_db(db, pd.concat(frames, ignore_index=True)):
+            failed.extend(updated)
+            updated = []
+            rows = 0
+        
+        if updated:
+            self.publish_hot_window(db)
+        
+        logger.info(f"Refreshed {len(updated)} of {len(symbols)} symbols ({rows} rows)")
+        return {"updated": updated, "failed": failed, "rows": rows}
+    
+    def update_stock_data(self, db: Session, symbol: str = None) -> bool:
+        """
+        Update stock data by fetching the data missing since the last update
+        and saving it to database
+        """
+        if symbol is None:
+            symbol = self.default_symbol
+        
+        try:
+            result = self.update_stocks_data(db, [symbol])
+            return symbol in result["updated"]
             
         except Exception as e:
             logger.error(f"Error updating stock data for {symbol}: {str(e)}")
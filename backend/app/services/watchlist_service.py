@@ -0,0 +1,162 @@
+import re
+from typing import Optional, List, Dict, Any, Tuple
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import WatchlistStock
+import os
+
+logger = logging.getLogger(__name__)
+
+class WatchlistMatcher:
+    """
+    Tags text with every watchlist symbol it mentions.
+
+    All aliases are compiled into one regex alternation with word boundaries,
+    longest alias first, so a headline is scanned once no matter how many
+    symbols are tracked.
+    """
+
+    def __init__(self, aliases_by_symbol: Dict[str, List[str]]):
+        self.symbols = list(aliases_by_symbol)
+        self._symbols_by_alias: Dict[str, List[str]] = {}
+        for symbol, aliases in aliases_by_symbol.items():
+            for alias in aliases:
+                alias = ' '.join(alias.lower().split())
+                if not alias:
+                    continue
+                owners = self._symbols_by_alias.setdefault(alias, [])
+                if symbol not in owners:
+                    owners.append(symbol)
+
+        self._order = {symbol: position for position, symbol in enumerate(self.symbols)}
+        if self._symbols_by_alias:
+            alternation = '|'.join(
+                re.escape(alias) for alias in sorted(self._symbols_by_alias, key=len, reverse=True)
+            )
+            self._pattern = re.compile(rf'(?<![a-z0-9])(?:{alternation})(?![a-z0-9])')
+        else:
+            self._pattern = None
+
+    def match(self, text: str) -> List[str]:
+        """Return the symbols mentioned in text, in watchlist order"""
+        if self._pattern is None or not text:
+            return []
+        found = set()
+        # Whitespace is collapsed as in the aliases, so "Tata  Elxsi" or an
+        # alias broken across lines still matches
+        for hit in self._pattern.finditer(' '.join(text.lower().split())):
+            found.update(self._symbols_by_alias[hit.group(0)])
+        return sorted(found, key=self._order.__getitem__)
+
+    def tag(self, news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Set 'related_stocks' on every news item and return the items that
+        mention at least one symbol
+        """
+        tagged = []
+        for news_item in news_items:
+            text = f"{news_item.get('title') or ''}\n{news_item.get('description') or ''}"
+            news_item['related_stocks'] = self.match(text)
+            if news_item['related_stocks']:
+                tagged.append(news_item)
+        return tagged
+
+def default_aliases(symbol: str, name: str = None) -> List[str]:
+    """Aliases derived from a symbol and company name (e.g. TATAELXSI.NS, Tata Elxsi)"""
+    aliases = [symbol.split('.')[0]]
+    if name:
+        aliases.append(name)
+    return aliases
+
+class WatchlistService:
+    def __init__(self):
+        self.default_symbol = os.getenv("STOCK_SYMBOL", "TATAELXSI.NS")
+        self.default_name = os.getenv("STOCK_NAME", "Tata Elxsi")
+        self.default_extra_aliases = [
+            alias.strip() for alias in os.getenv("STOCK_ALIASES", "tata elxsi,elxsi").split(",") if alias.strip()
+        ]
+        self._matcher: Optional[WatchlistMatcher] = None
+        self._matcher_key: Optional[Tuple] = None
+
+    def ensure_default_stock(self, db: Session) -> None:
+        """Seed the watchlist with the configured default stock if it is empty"""
+        if db.query(WatchlistStock.id).first() is not None:
+            return
+        db.add(WatchlistStock(
+            symbol=self.default_symbol,
+            name=self.default_name,
+            aliases=self.default_extra_aliases
+        ))
+        db.commit()
+
+    def get_active_stocks(self, db: Session) -> List[WatchlistStock]:
+        """Get all active watchlist stocks"""
+        self.ensure_default_stock(db)
+        return db.query(WatchlistStock).filter(
+            WatchlistStock.is_active == True
+        ).order_by(WatchlistStock.id).all()
+
+    def get_active_symbols(self, db: Session) -> List[str]:
+        """Get the symbols of all active watchlist stocks"""
+        return [stock.symbol for stock in self.get_active_stocks(db)]
+
+    async def ensure_default_stock_async(self, db: AsyncSession) -> None:
+        """Async variant of ensure_default_stock"""
+        if (await db.execute(select(WatchlistStock.id).limit(1))).first() is not None:
+            return
+        db.add(WatchlistStock(
+            symbol=self.default_symbol,
+            name=self.default_name,
+            aliases=self.default_extra_aliases
+        ))
+        await db.commit()
+
+    async def get_active_stocks_async(self, db: AsyncSession) -> List[WatchlistStock]:
+        """Async variant of get_active_stocks"""
+        await self.ensure_default_stock_async(db)
+        result = await db.execute(select(WatchlistStock).where(
+            WatchlistStock.is_active == True
+        ).order_by(WatchlistStock.id))
+        return list(result.scalars().all())
+
+    async def get_active_symbols_async(self, db: AsyncSession) -> List[str]:
+        """Async variant of get_active_symbols"""
+        return [stock.symbol for stock in await self.get_active_stocks_async(db)]
+
+    def add_stock(self, db: Session, symbol: str, name: str = None, aliases: List[str] = None) -> WatchlistStock:
+        """Add a stock to the watchlist, or reactivate and update it if present"""
+        self.ensure_default_stock(db)
+        stock = db.query(WatchlistStock).filter(WatchlistStock.symbol == symbol).first()
+        if stock is None:
+            stock = WatchlistStock(symbol=symbol)
+            db.add(stock)
+        stock.name = name or stock.name
+        stock.aliases = aliases if aliases is not None else (stock.aliases or [])
+        stock.is_active = True
+        db.commit()
+        return stock
+
+    def get_matcher(self, db: Session, extra: Dict[str, List[str]] = None) -> WatchlistMatcher:
+        """
+        Get the matcher for the active watchlist. It is compiled once and only
+        rebuilt when the watchlist changes. Passing `extra` symbol aliases
+        builds a one-off matcher covering them as well.
+        """
+        stocks = self.get_active_stocks(db)
+        aliases_by_symbol = {
+            stock.symbol: default_aliases(stock.symbol, stock.name) + list(stock.aliases or [])
+            for stock in stocks
+        }
+        if extra:
+            for symbol, aliases in extra.items():
+                aliases_by_symbol[symbol] = aliases_by_symbol.get(symbol, []) + list(aliases)
+            return WatchlistMatcher(aliases_by_symbol)
+
+        key = tuple((stock.symbol, stock.name, tuple(stock.aliases or [])) for stock in stocks)
+        if self._matcher is None or key != self._matcher_key:
+            self._matcher = WatchlistMatcher(aliases_by_symbol)
+            self._matcher_key = key
+            logger.info(f"Compiled watchlist matcher for {len(stocks)} symbols")
+        return self._matcher
@@ -0,0 +1,36 @@
+"""
+Tests for the walk-forward backtesting engine
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import numpy as np
+
+from app.services.backtest import BacktestEngine, walk_forward
+from app.services.prediction_service import simple_trend
+
+
+def test_walk_forward_only_uses_past_closes():
+    closes = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, 50)))
+    predicted, actual, base = walk_forward(closes, window=4, days_ahead=2)
+
+    assert len(predicted) == len(closes) - 4 - 2 + 1
+    for row, day in enumerate(range(3, len(closes) - 2)):
+        expected, _ = simple_trend(closes[day - 3:day + 1][None, :])
+        assert np.isclose(predicted[row], expected[0])
+        assert actual[row] == closes[day + 2]
+        assert base[row] == closes[day]
+
+
+def test_grid_results_cover_every_symbol_and_setting():
+    dates = np.arange('2024-01-01', '2024-03-01', dtype='datetime64[D]').astype('datetime64[ns]')
+    series = {symbol: (dates, np.linspace(100, 120, len(dates))) for symbol in ['A', 'B', 'C']}
+    engine = BacktestEngine(stock_service=None, max_workers=0, shard_size=2)
+
+    result = engine.run_series(series, {"window": [2, 3], "days_ahead": [1, 5]})
+
+    assert len(result["results"]) == 3 * 4
+    assert [entry["symbols"] for entry in result["summary"]] == [3, 3, 3, 3]
+    assert all(entry["hit_rate"] == 1.0 for entry in result["summary"])
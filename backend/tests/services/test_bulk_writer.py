@@ -0,0 +1,81 @@
+"""
+Tests for the set-based bulk insert helper
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import RawNews
+from app.services.bulk_writer import insert_missing
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def raw_news(link, title='Title'):
+    return {'title': title, 'description': '', 'link': link, 'published_date': datetime(2024, 3, 1)}
+
+
+def test_existing_keys_are_skipped():
+    """Rows whose key is already stored are skipped, across batches"""
+    db = make_session()
+    insert_missing(db, RawNews, [raw_news('https://example.com/1')])
+    db.commit()
+
+    inserted_rows = []
+    counts = insert_missing(
+        db, RawNews, [raw_news(f'https://example.com/{number}') for number in range(1, 6)],
+        batch_size=2, inserted_rows=inserted_rows
+    )
+    db.commit()
+
+    assert counts == {"inserted": 4, "skipped": 1}
+    assert [row['link'] for row in inserted_rows] == [f'https://example.com/{number}' for number in range(2, 6)]
+    assert db.query(RawNews).count() == 5
+    db.close()
+
+
+def test_duplicate_keys_within_rows_are_inserted_once():
+    """A key repeated in the rows, within or across batches, is inserted once"""
+    db = make_session()
+    rows = [raw_news('https://example.com/a', 'First'), raw_news('https://example.com/a', 'Again'),
+            raw_news('https://example.com/b'), raw_news('https://example.com/a', 'Later')]
+
+    counts = insert_missing(db, RawNews, rows, batch_size=3)
+    db.commit()
+
+    assert counts == {"inserted": 2, "skipped": 2}
+    assert db.query(RawNews.title).filter(RawNews.link == 'https://example.com/a').scalar() == 'First'
+    db.close()
+
+
+def test_row_stored_concurrently_does_not_fail_the_batch():
+    """A link stored by another writer between lookup and insert is ignored"""
+    db = make_session()
+    stored = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def store_concurrently(orm_execute_state):
+        # Runs the lookup, then stores a link it did not see
+        if orm_execute_state.is_select and not stored:
+            stored.append(1)
+            lookup = orm_execute_state.invoke_statement().freeze()
+            orm_execute_state.session.connection().execute(insert(RawNews), [raw_news('https://example.com/a', 'Other')])
+            return lookup()
+
+    insert_missing(db, RawNews, [raw_news('https://example.com/a'), raw_news('https://example.com/b')])
+    db.commit()
+
+    assert db.query(RawNews).count() == 2
+    assert db.query(RawNews.title).filter(RawNews.link == 'https://example.com/a').scalar() == 'Other'
+    db.close()
@@ -0,0 +1,83 @@
+"""
+Tests for OHLCV resampling and LTTB decimation of chart bars
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import numpy as np
+import pandas as pd
+
+from app.services.downsampling import resample_ohlcv, lttb_indices, decimate_ohlcv
+
+
+def make_bars(start, days, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, days))
+    return pd.DataFrame({
+        'date': pd.bdate_range(start, periods=days),
+        'open_price': close + rng.normal(0, 0.5, days),
+        'high_price': close + 2,
+        'low_price': close - 2,
+        'close_price': close,
+        'volume': rng.integers(100, 1000, days),
+    })
+
+
+def test_weekly_bars_aggregate_ohlcv():
+    """A weekly bar opens with Monday, closes with Friday and spans the week's range and volume"""
+    bars = make_bars('2024-03-04', 10)
+    weekly = resample_ohlcv(bars, '1w')
+
+    assert list(weekly['date']) == [pd.Timestamp('2024-03-04'), pd.Timestamp('2024-03-11')]
+    for week, days in zip(weekly.to_dict('records'), [bars.iloc[:5], bars.iloc[5:]]):
+        assert week['open_price'] == days['open_price'].iloc[0]
+        assert week['high_price'] == days['high_price'].max()
+        assert week['low_price'] == days['low_price'].min()
+        assert week['close_price'] == days['close_price'].iloc[-1]
+        assert week['volume'] == days['volume'].sum()
+
+
+def test_monthly_bars_are_dated_by_month_start():
+    """Monthly bars start on the 1st and skip months without bars"""
+    bars = pd.concat([make_bars('2024-01-15', 20), make_bars('2024-04-01', 5, seed=1)], ignore_index=True)
+    monthly = resample_ohlcv(bars, '1mo')
+
+    assert list(monthly['date']) == [pd.Timestamp(day) for day in ('2024-01-01', '2024-02-01', '2024-04-01')]
+    february = bars[bars['date'].dt.month == 2]
+    assert monthly['open_price'].iloc[1] == february['open_price'].iloc[0]
+    assert monthly['close_price'].iloc[1] == february['close_price'].iloc[-1]
+    assert monthly['volume'].iloc[1] == february['volume'].sum()
+    assert resample_ohlcv(bars, '1d') is bars
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    """LTTB returns exactly `threshold` increasing indices including both ends"""
+    rng = np.random.default_rng(3)
+    for length, threshold in [(10, 3), (10, 9), (100, 7), (1000, 50), (257, 256)]:
+        x = np.arange(length)
+        y = rng.normal(size=length)
+        indices = lttb_indices(x, y, threshold)
+        assert len(indices) == threshold
+        assert indices[0] == 0 and indices[-1] == length - 1
+        assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    """A single outlier survives decimation"""
+    y = np.zeros(500)
+    y[123] = 50.0
+    assert 123 in lttb_indices(np.arange(500), y, 20)
+
+
+def test_decimate_is_noop_when_points_fit():
+    """max_points at or above the number of bars returns the bars unchanged"""
+    bars = make_bars('2024-01-01', 30)
+    assert decimate_ohlcv(bars, 30) is bars
+    assert decimate_ohlcv(bars, 100) is bars
+
+    decimated = decimate_ohlcv(bars, 10)
+    assert len(decimated) == 10
+    assert decimated['date'].iloc[0] == bars['date'].iloc[0]
+    assert decimated['date'].iloc[-1] == bars['date'].iloc[-1]
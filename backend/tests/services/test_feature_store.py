@@ -0,0 +1,100 @@
+"""
+Tests for the daily feature computation and the incremental feature store
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import News, StockFeature, StockPrice
+from app.services.feature_store import FeatureStore, FEATURE_COLUMNS, compute_features
+from app.services.stock_service import StockService
+from app.services.watchlist_service import WatchlistService
+
+
+def test_features_returns_and_weekend_news():
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    prices = pd.DataFrame({
+        'symbol': 'AAPL',
+        'date': dates,
+        'close_price': np.linspace(100, 129, 30),
+        'volume': np.arange(30) * 10 + 1000,
+    })
+    news = pd.DataFrame({
+        'symbol': ['AAPL', 'AAPL'],
+        'published_date': [pd.Timestamp('2024-01-06 10:00'), pd.Timestamp('2024-01-08 09:00')],
+        'sentiment_score': [0.5, None],
+    })
+
+    features = compute_features(prices, news).set_index('date')
+
+    assert np.isclose(features.loc[dates[5], 'return_5d'], prices['close_price'][5] / prices['close_price'][0] - 1)
+    assert np.isnan(features.loc[dates[4], 'return_5d'])
+    # Saturday's news lands on Monday together with Monday's own news
+    assert features.loc[pd.Timestamp('2024-01-08'), 'news_count'] == 2
+    assert features.loc[pd.Timestamp('2024-01-08'), 'news_sentiment'] == 0.5
+    assert features['news_count'].sum() == 2
+
+
+def make_feature_store():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    stock_service = StockService()
+    stock_service.hot_window = None
+    stock_service.price_store = None
+    return sessionmaker(bind=engine)(), FeatureStore(stock_service, WatchlistService())
+
+
+def add_bars(db, dates):
+    rng = np.random.default_rng(len(dates))
+    db.add_all([
+        StockPrice(symbol='AAPL', date=date.to_pydatetime(), open_price=100.0, high_price=101.0, low_price=99.0,
+                   close_price=100.0 + rng.normal(), volume=int(1000 + rng.integers(0, 500)))
+        for date in dates
+    ])
+    db.commit()
+
+
+def add_news(db, link, published_date, sentiment):
+    db.add(News(title=link, link=link, published_date=published_date, related_stock='AAPL', sentiment_score=sentiment))
+    db.commit()
+
+
+def stored_features(db):
+    rows = db.query(StockFeature).order_by(StockFeature.date).all()
+    return pd.DataFrame([{'date': row.date, **{column: getattr(row, column) for column in FEATURE_COLUMNS}} for row in rows])
+
+
+def test_incremental_update_matches_full_rebuild():
+    """New bars and late news recomputed incrementally give the rows of a full rebuild"""
+    db, store = make_feature_store()
+    dates = pd.bdate_range('2024-01-01', periods=70)
+    add_bars(db, dates[:60])
+    add_news(db, 'https://example.com/1', datetime(2024, 2, 1, 10), 0.4)
+    assert store.update(db, ['AAPL'])['rows'] == 60
+
+    # Two new bars and news published a week ago, ingested late
+    add_bars(db, dates[60:62])
+    add_news(db, 'https://example.com/2', dates[55].to_pydatetime(), -0.2)
+    add_news(db, 'https://example.com/3', dates[61].to_pydatetime(), 0.6)
+    counts = store.update(db, ['AAPL'], since=dates[54].to_pydatetime())
+    assert counts == {"symbols": 1, "rows": 8}
+    incremental = stored_features(db)
+
+    db.query(StockFeature).delete()
+    db.commit()
+    store.update(db, ['AAPL'])
+    rebuilt = stored_features(db)
+
+    assert len(incremental) == 62
+    assert incremental['news_count'].sum() == 3
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+    db.close()
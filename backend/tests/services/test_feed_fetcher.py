@@ -0,0 +1,98 @@
+"""
+Tests for the concurrent feed fetcher's deadline and host limits
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import threading
+import time
+
+import requests
+
+from app.services.feed_fetcher import FeedFetcher
+
+
+class FakeResponse:
+    def __init__(self, content=b'<rss/>', status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Stands in for requests.Session: slow urls sleep until their timeout, like a hung server"""
+
+    def __init__(self, slow=()):
+        self.slow = set(slow)
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, verify=True, timeout=None):
+        with self._lock:
+            self.timeouts.append((url, timeout))
+        if url in self.slow:
+            time.sleep(timeout)
+            raise requests.exceptions.ReadTimeout(f"read timed out after {timeout}s")
+        return FakeResponse(headers={'ETag': '"v1"'})
+
+
+def test_fetch_all_returns_results_in_order():
+    """Results come back per source, in order, with validators and a content hash"""
+    fetcher = FeedFetcher(max_workers=4, timeout=5, deadline=5)
+    fetcher.session = FakeSession()
+
+    results = fetcher.fetch_all([{"url": f"http://example.com/{number}"} for number in range(3)])
+
+    assert [result["url"] for result in results] == [f"http://example.com/{number}" for number in range(3)]
+    assert all(result["error"] is None and result["etag"] == '"v1"' for result in results)
+    assert results[0]["content_hash"] is not None
+
+
+def test_deadline_bounds_in_flight_requests():
+    """Slow requests get the remaining deadline as timeout and release their host slot"""
+    fetcher = FeedFetcher(max_workers=4, per_host_limit=1, timeout=30, deadline=0.3)
+    fetcher.session = FakeSession(slow={"http://slow.example.com/feed"})
+
+    started = time.monotonic()
+    results = fetcher.fetch_all([{"url": "http://slow.example.com/feed"}, {"url": "http://fast.example.com/feed"}])
+    assert time.monotonic() - started < 1
+    assert results[0]["error"] is not None
+    assert results[1]["error"] is None
+    assert all(timeout <= 0.3 for _, timeout in fetcher.session.timeouts)
+
+    # The host slot is free again once the deadline has passed
+    time.sleep(0.1)
+    assert fetcher._host_slot("http://slow.example.com/feed").acquire(blocking=False)
+
+
+def test_host_limit_queueing_ends_at_deadline():
+    """A request still waiting for its host's slot at the deadline fails without a request"""
+    fetcher = FeedFetcher(max_workers=4, per_host_limit=1, timeout=30)
+    fetcher.session = FakeSession()
+    slot = fetcher._host_slot("http://busy.example.com/feed")
+    slot.acquire()
+    try:
+        result = fetcher._fetch_result({"url": "http://busy.example.com/feed"}, time.monotonic() + 0.1)
+    finally:
+        slot.release()
+
+    assert "deadline" in result["error"]
+    assert fetcher.session.timeouts == []
+
+
+def test_explicit_zero_is_not_replaced_by_the_environment(monkeypatch):
+    """Only unset arguments fall back to the environment; an explicit 0 deadline fails fast"""
+    monkeypatch.setenv("FEED_FETCH_DEADLINE", "30")
+    fetcher = FeedFetcher(max_workers=2, timeout=5, deadline=0)
+    fetcher.session = FakeSession()
+    assert fetcher.deadline == 0
+    assert FeedFetcher(max_workers=2).deadline == 30
+
+    results = fetcher.fetch_all([{"url": "http://example.com/feed"}])
+    assert results[0]["error"] is not None
+    assert fetcher.session.timeouts == []
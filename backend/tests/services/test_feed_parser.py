@@ -0,0 +1,76 @@
+"""
+Tests for feed parsing in the parser process pool
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from app.services.feed_parser import FeedParserPool, parse_feed
+
+
+def make_feed(*titles):
+    items = "".join(
+        f"<item><title>{title}</title><link>https://example.com/{number}</link>"
+        f"<description>About {title}</description><pubDate>Fri, 01 Mar 2024 09:30:00 GMT</pubDate></item>"
+        for number, title in enumerate(titles)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Test</title>{items}</channel></rss>'.encode()
+
+
+FEEDS = [make_feed('Tata Elxsi wins a contract', 'Markets close higher'), None, make_feed('Results beat estimates')]
+
+
+def test_parse_feed_normalizes_entries():
+    """Entries become records with a date-scoped dedup key"""
+    records = parse_feed(make_feed('Tata Elxsi: wins a contract!'))
+    assert records == [{
+        'title': 'Tata Elxsi: wins a contract!',
+        'description': 'About Tata Elxsi: wins a contract!',
+        'link': 'https://example.com/0',
+        'published_date': datetime(2024, 3, 1, 9, 30),
+        'dedup_key': 'tata elxsi wins a contract_2024-03-01',
+    }]
+
+
+def test_inline_and_pool_parse_match_parse_feed():
+    """Inline parsing and the spawn pool return parse_feed's records in input order"""
+    expected = [{"records": parse_feed(content) if content is not None else [], "error": None} for content in FEEDS]
+    assert FeedParserPool(max_workers=0).parse_many(FEEDS) == expected
+
+    pool = FeedParserPool(max_workers=2)
+    try:
+        assert pool.parse_many(FEEDS) == expected
+        # A body that fails to parse only fails its own position
+        results = pool.parse_many([FEEDS[0], 123])
+        assert results[0] == expected[0]
+        assert results[1]["records"] == [] and results[1]["error"]
+    finally:
+        pool.shutdown()
+
+
+class BrokenExecutor:
+    """Executor whose worker processes died: every result raises BrokenProcessPool"""
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_broken_pool_falls_back_to_inline_parsing():
+    """A broken pool is discarded and the bodies are parsed inline"""
+    pool = FeedParserPool(max_workers=2)
+    pool._executor = BrokenExecutor()
+
+    results = pool.parse_many(FEEDS)
+
+    assert results == FeedParserPool(max_workers=0).parse_many(FEEDS)
+    assert pool._executor is None
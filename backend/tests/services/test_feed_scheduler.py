@@ -0,0 +1,204 @@
+"""
+Tests for feed cadence learning, backoff and the circuit breaker
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import RSSSource
+from app.services.feed_scheduler import FeedHealthPolicy, FeedScheduler
+from app.services.news_service import NewsService
+
+NOW = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def make_policy():
+    policy = FeedHealthPolicy()
+    policy.min_interval = 300
+    policy.max_interval = 21600
+    policy.default_interval = 900
+    policy.failure_threshold = 3
+    policy.backoff_base = 600
+    policy.backoff_max = 86400
+    return policy
+
+
+def test_success_learns_cadence():
+    """New entries set the interval to the time per new item since the newest known one"""
+    policy = make_policy()
+    source = RSSSource(url='https://example.com/feed', source='test', last_entry_published_at=NOW - timedelta(hours=2))
+
+    policy.record_success(source, [NOW - timedelta(hours=1), NOW], now=NOW)
+
+    assert source.avg_publish_interval_seconds == 3600
+    assert source.poll_interval_seconds == 3600
+    assert source.next_poll_at == NOW + timedelta(seconds=3600)
+    assert source.last_entry_published_at == NOW
+    assert source.total_polls == 1
+
+
+def test_quiet_feed_backs_off_within_bounds():
+    """Polls with nothing new grow the interval up to the maximum"""
+    policy = make_policy()
+    source = RSSSource(url='https://example.com/feed', source='test', poll_interval_seconds=1000)
+
+    policy.record_success(source, [], now=NOW)
+    assert source.poll_interval_seconds == 1500
+    source.poll_interval_seconds = 20000
+    policy.record_success(source, [], now=NOW)
+    assert source.poll_interval_seconds == 21600
+
+
+def test_failures_open_circuit_with_exponential_backoff():
+    """The circuit opens at the threshold and its backoff doubles per further failure"""
+    policy = make_policy()
+    source = RSSSource(url='https://example.com/feed', source='test')
+
+    for _ in range(2):
+        policy.record_failure(source, 'timeout', now=NOW)
+    assert source.circuit_open_until is None
+    assert policy.is_available(source, NOW)
+
+    policy.record_failure(source, 'timeout', now=NOW)
+    assert source.circuit_open_until == NOW + timedelta(seconds=600)
+    assert not policy.is_available(source, NOW)
+    assert policy.is_available(source, NOW + timedelta(seconds=600))
+
+    policy.record_failure(source, 'timeout', now=NOW)
+    assert source.circuit_open_until == NOW + timedelta(seconds=1200)
+
+    policy.record_success(source, [], now=NOW)
+    assert source.consecutive_failures == 0
+    assert source.circuit_open_until is None
+
+
+def test_due_sources():
+    """Only sources past their next poll time with a closed circuit are due"""
+    db = make_session()
+    db.add_all([
+        RSSSource(url='https://example.com/new', source='test'),
+        RSSSource(url='https://example.com/due', source='test', next_poll_at=NOW - timedelta(minutes=1)),
+        RSSSource(url='https://example.com/later', source='test', next_poll_at=NOW + timedelta(minutes=1)),
+        RSSSource(url='https://example.com/open', source='test', next_poll_at=NOW - timedelta(minutes=1),
+                  circuit_open_until=NOW + timedelta(minutes=5)),
+    ])
+    db.commit()
+
+    scheduler = FeedScheduler(NewsService())
+    due = {source.url for source in scheduler.due_sources(db, now=NOW)}
+    assert due == {'https://example.com/new', 'https://example.com/due'}
+    db.close()
+
+
+def make_news_service(records_by_url):
+    """NewsService whose fetcher serves `records_by_url` (None: connection error) without a network"""
+    news_service = NewsService()
+
+    def fetch_all(sources):
+        results = []
+        for source in sources:
+            result = news_service.feed_fetcher._empty_result(source)
+            if records_by_url[source['url']] is None:
+                result['error'] = 'connection refused'
+            else:
+                result.update(content=source['url'].encode(), content_hash='abc', etag='"v2"')
+            results.append(result)
+        return results
+
+    news_service.feed_fetcher.fetch_all = fetch_all
+    news_service.feed_parser.parse_many = lambda contents: [
+        {"records": records_by_url[content.decode()] if content is not None else [], "error": None}
+        for content in contents
+    ]
+    return news_service
+
+
+def test_failure_counts_survive_failed_insert():
+    """Poll failures are committed even when storing the other feeds' entries fails"""
+    db = make_session()
+    db.add_all([
+        RSSSource(url='https://example.com/broken', source='test'),
+        RSSSource(url='https://example.com/bad-rows', source='test'),
+    ])
+    db.commit()
+
+    # A row violating NOT NULL makes the insert fail
+    news_service = make_news_service({
+        'https://example.com/broken': None,
+        'https://example.com/bad-rows': [
+            {'title': None, 'description': '', 'link': 'https://example.com/a', 'published_date': NOW}
+        ],
+    })
+
+    assert news_service.fetch_and_store_raw_news(db) == {"inserted": 0, "skipped": 0}
+
+    broken = db.query(RSSSource).filter(RSSSource.url == 'https://example.com/broken').one()
+    assert broken.consecutive_failures == 1
+    assert broken.last_error == 'connection refused'
+    # Validators are only stored with the entries, so the feed is fetched again
+    bad_rows = db.query(RSSSource).filter(RSSSource.url == 'https://example.com/bad-rows').one()
+    assert bad_rows.etag is None
+    assert bad_rows.content_hash is None
+    assert bad_rows.consecutive_failures == 1
+    db.close()
+
+
+def test_bad_feed_does_not_lose_other_feeds():
+    """When the bulk insert fails, the other feeds' entries are stored feed by feed"""
+    db = make_session()
+    db.add_all([
+        RSSSource(url='https://example.com/good', source='test'),
+        RSSSource(url='https://example.com/bad-rows', source='test'),
+    ])
+    db.commit()
+
+    news_service = make_news_service({
+        'https://example.com/good': [
+            {'title': 'First', 'description': '', 'link': 'https://example.com/1', 'published_date': NOW},
+            {'title': 'Second', 'description': '', 'link': 'https://example.com/2', 'published_date': NOW},
+        ],
+        'https://example.com/bad-rows': [
+            {'title': None, 'description': '', 'link': 'https://example.com/3', 'published_date': NOW}
+        ],
+    })
+
+    assert news_service.fetch_and_store_raw_news(db) == {"inserted": 2, "skipped": 0}
+
+    good = db.query(RSSSource).filter(RSSSource.url == 'https://example.com/good').one()
+    assert good.etag == '"v2"'
+    assert good.consecutive_failures == 0
+    bad_rows = db.query(RSSSource).filter(RSSSource.url == 'https://example.com/bad-rows').one()
+    assert bad_rows.etag is None
+    assert bad_rows.last_error.startswith('Error storing entries')
+    db.close()
+
+
+def test_poll_is_skipped_while_another_worker_polls(tmp_path):
+    """A scheduler sharing the lock file skips its tick while another one is polling"""
+    db = make_session()
+    db.add(RSSSource(url='https://example.com/good', source='test'))
+    db.commit()
+    news_service = make_news_service({'https://example.com/good': [
+        {'title': 'First', 'description': '', 'link': 'https://example.com/1', 'published_date': NOW},
+    ]})
+    polling, waiting = FeedScheduler(news_service), FeedScheduler(news_service)
+    polling.lock_path = waiting.lock_path = str(tmp_path / 'scheduler.lock')
+
+    with polling._poll_lock() as acquired:
+        assert acquired
+        assert waiting.run_due(db) == {"polled": 0, "inserted": 0, "skipped": 0}
+    assert waiting.run_due(db) == {"polled": 1, "inserted": 1, "skipped": 0}
+    db.close()
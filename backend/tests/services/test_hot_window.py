@@ -0,0 +1,126 @@
+"""
+Tests for the shared-memory hot price window
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from app.services.hot_window import SharedPriceWindow
+
+
+def make_prices(symbols, days=5, base=100.0):
+    dates = pd.date_range(pd.Timestamp.now().normalize() - pd.Timedelta(days=days - 1), periods=days)
+    frames = []
+    for offset, symbol in enumerate(symbols):
+        closes = base + offset * 10 + np.arange(days)
+        frames.append(pd.DataFrame({
+            'symbol': symbol, 'date': dates,
+            'open_price': closes, 'high_price': closes + 1, 'low_price': closes - 1,
+            'close_price': closes, 'volume': np.arange(days) + 1000,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def new_window(name=None, days=30):
+    return SharedPriceWindow(name=name or f"test_hot_{uuid.uuid4().hex[:8]}", days=days)
+
+
+def discard(window):
+    """Close a window and remove the control block and lock file it leaves behind"""
+    window.close()
+    if window._control is not None:
+        window._control.unlink()
+        window._control.close()
+        if os.path.exists(window.lock_path):
+            os.remove(window.lock_path)
+
+
+def test_publish_then_read():
+    """A published window is read back per symbol, oldest first"""
+    window = new_window()
+    try:
+        assert window.read('AAPL') is None
+        assert window.publish(make_prices(['AAPL', 'MSFT'])) == 1
+
+        reader = SharedPriceWindow(name=window.name, days=30)
+        aapl = reader.read('AAPL')
+        assert list(aapl['close_price']) == [100, 101, 102, 103, 104]
+        assert list(reader.read('MSFT')['close_price']) == [110, 111, 112, 113, 114]
+        assert len(reader.read('AAPL', days=2)['close_price']) == 2
+        assert not aapl['close_price'].flags.writeable
+        assert reader.read('GOOG') is None
+        reader.close()
+    finally:
+        discard(window)
+
+
+def test_days_beyond_window_miss():
+    """A range longer than the window is a miss so callers fall back to SQL"""
+    window = new_window(days=10)
+    try:
+        window.publish(make_prices(['AAPL']))
+        assert window.read('AAPL', days=10) is not None
+        assert window.read('AAPL', days=11) is None
+    finally:
+        discard(window)
+
+
+def test_generation_swap_keeps_held_arrays():
+    """Arrays a reader holds stay valid after a new generation is published"""
+    window = new_window()
+    reader = SharedPriceWindow(name=window.name, days=30)
+    try:
+        window.publish(make_prices(['AAPL'], base=100.0))
+        held = reader.read('AAPL')['close_price']
+
+        assert window.publish(make_prices(['AAPL'], base=200.0)) == 2
+        assert list(held) == [100, 101, 102, 103, 104]
+        assert list(reader.read('AAPL')['close_price']) == [200, 201, 202, 203, 204]
+    finally:
+        reader.close()
+        discard(window)
+
+
+def test_concurrent_publishers_keep_counter_consistent():
+    """Publishers with separate in-process locks are serialized by the file lock"""
+    name = f"test_hot_{uuid.uuid4().hex[:8]}"
+    publishers = [SharedPriceWindow(name=name, days=30) for _ in range(2)]
+    prices = make_prices(['AAPL'])
+
+    def publish_many(window):
+        for _ in range(20):
+            window.publish(prices)
+
+    threads = [threading.Thread(target=publish_many, args=(window,)) for window in publishers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        words = publishers[0]._control_words()
+        assert int(words[0]) % 2 == 0
+        assert int(words[1]) == 40
+        assert publishers[0].read('AAPL') is not None
+    finally:
+        publishers[1].close()
+        discard(publishers[0])
+
+
+def test_publish_repairs_odd_counter():
+    """A counter left odd by a crashed publisher is repaired by the next publish"""
+    window = new_window()
+    try:
+        window.publish(make_prices(['AAPL']))
+        window._control_words()[0] += 1
+        assert window.read('AAPL') is None
+        window.publish(make_prices(['AAPL']))
+        assert window.read('AAPL') is not None
+    finally:
+        discard(window)
@@ -0,0 +1,69 @@
+"""
+Test module for the technical indicator engine.
+Checks that incremental bar updates match a full vectorized recompute.
+"""
+
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.indicator_service import compute_indicators, update_indicator_state, INDICATOR_COLUMNS
+
+def make_prices(symbol, bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, bars))
+    return pd.DataFrame({
+        'symbol': symbol,
+        'date': pd.date_range('2025-01-01', periods=bars, freq='D'),
+        'open_price': close,
+        'high_price': close + rng.random(bars),
+        'low_price': close - rng.random(bars),
+        'close_price': close,
+        'volume': rng.integers(1, 1000, bars),
+    })
+
+def assert_same(row, expected):
+    for column in INDICATOR_COLUMNS:
+        if np.isnan(expected[column]):
+            assert row[column] is None, column
+        else:
+            assert abs(row[column] - expected[column]) < 1e-9, column
+
+def test_incremental_updates_match_full_compute():
+    prices = pd.concat([make_prices('AAA', 60, 1), make_prices('BBB', 25, 2)])
+    full, _ = compute_indicators(prices)
+    _, states = compute_indicators(prices.groupby('symbol').head(-3))
+
+    for symbol in ['AAA', 'BBB']:
+        state = states[symbol]
+        for bar in prices[prices['symbol'] == symbol].tail(3).to_dict('records'):
+            state, row = update_indicator_state(state, bar)
+        assert_same(row, full[full['symbol'] == symbol].iloc[-1])
+
+def test_revised_last_bar_replaces_it():
+    prices = make_prices('AAA', 40, 3)
+    full, _ = compute_indicators(prices)
+    _, states = compute_indicators(prices)
+
+    revised = dict(prices.iloc[-1])
+    revised['close_price'] += 25
+    state, _ = update_indicator_state(states['AAA'], revised)
+    state, row = update_indicator_state(state, prices.iloc[-1].to_dict())
+    assert_same(row, full.iloc[-1])
+
+def test_vwap_does_not_depend_on_history_start():
+    prices = make_prices('AAA', 60, 4)
+    full, states = compute_indicators(prices)
+    later, _ = compute_indicators(prices.iloc[15:])
+    assert abs(full['vwap'].iloc[-1] - later['vwap'].iloc[-1]) < 1e-9
+
+    # A state cached from the full history and a fresh compute over a later window agree
+    bar = dict(prices.iloc[-1])
+    bar['date'] = bar['date'] + pd.Timedelta(days=1)
+    _, row = update_indicator_state(states['AAA'], bar)
+    extended, _ = compute_indicators(pd.concat([prices.iloc[30:], pd.DataFrame([bar])]))
+    assert abs(row['vwap'] - extended['vwap'].iloc[-1]) < 1e-9
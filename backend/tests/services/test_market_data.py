@@ -0,0 +1,60 @@
+"""
+Tests for the offline replay market data provider
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pandas as pd
+
+from app.services.market_data import ReplayProvider
+from app.services.stock_service import StockService
+
+
+def write_fixtures(root):
+    os.makedirs(os.path.join(root, "history"))
+    os.makedirs(os.path.join(root, "quotes"))
+    pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=5, freq='D'),
+        'Open': [10.0, 11.0, 12.0, 13.0, 14.0],
+        'High': [11.0, 12.0, 13.0, 14.0, 15.0],
+        'Low': [9.0, 10.0, 11.0, 12.0, 13.0],
+        'Close': [10.5, 11.5, 12.5, 13.5, 14.5],
+        'Volume': [100, 200, 300, 400, 500],
+    }).to_csv(os.path.join(root, "history", "AAPL.csv"), index=False)
+    with open(os.path.join(root, "quotes", "AAPL.json"), "w") as quote_file:
+        quote_file.write('{"currentPrice": 14.5, "previousClose": 13.5, "volume": 500}')
+
+
+def test_stock_service_reads_replayed_fixtures(tmp_path):
+    write_fixtures(str(tmp_path))
+    service = StockService(provider=ReplayProvider(root=str(tmp_path), latency=0, error_rate=0))
+
+    frames = service.fetch_stocks_data(['AAPL', 'MSFT'], start_date=datetime(2024, 1, 2))
+    assert list(frames) == ['AAPL']
+    assert frames['AAPL']['close_price'].tolist() == [11.5, 12.5, 13.5, 14.5]
+
+    quote = service.get_current_price('AAPL')
+    assert quote['current_price'] == 14.5
+    assert quote['previous_close'] == 13.5
+
+
+def test_replay_error_injection_is_repeatable(tmp_path):
+    write_fixtures(str(tmp_path))
+
+    def outcomes():
+        provider = ReplayProvider(root=str(tmp_path), latency=0, error_rate=0.5, seed=7)
+        results = []
+        for _ in range(20):
+            try:
+                provider.info('AAPL')
+                results.append(True)
+            except ConnectionError:
+                results.append(False)
+        return results
+
+    first = outcomes()
+    assert first == outcomes()
+    assert True in first and False in first
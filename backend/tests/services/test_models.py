@@ -0,0 +1,109 @@
+"""
+Tests for the pluggable predictors, the versioned model store and the model cache
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import StockFeature
+from app.services.feature_store import FeatureStore
+from app.services.model_store import ModelStore, ModelCache, ModelTrainer, train_model
+from app.services.predictors import PREDICTORS, MODEL_FEATURES
+from app.services.watchlist_service import WatchlistService
+
+
+def test_trained_models_are_versioned_and_cached(tmp_path):
+    rng = np.random.default_rng(3)
+    features = rng.normal(size=(200, len(MODEL_FEATURES)))
+    targets = features @ np.linspace(0.1, 0.6, len(MODEL_FEATURES)) + 0.02
+    assert {"ridge_regression", "linear_regression"} <= set(PREDICTORS)
+
+    first = train_model(str(tmp_path), "linear_regression", "AAPL", 1, features, targets, "2024-01-31")
+    assert first["version"] == 1 and first["r2"] > 0.99
+
+    store = ModelStore(str(tmp_path))
+    cache = ModelCache(store, max_entries=4)
+    predictor, meta = cache.get("linear_regression", "AAPL", 1)
+    assert np.allclose(predictor.predict(features[:5]), targets[:5])
+    assert cache.get("linear_regression", "AAPL", 1)[0] is predictor
+    assert cache.get("linear_regression", "AAPL", 5) is None
+
+    train_model(str(tmp_path), "linear_regression", "AAPL", 1, features, targets, "2024-02-29")
+    predictor_v2, meta_v2 = cache.get("linear_regression", "AAPL", 1)
+    assert meta_v2["version"] == 2 and predictor_v2 is not predictor
+    assert len(cache) == 1
+
+
+def test_concurrent_saves_get_distinct_versions(tmp_path):
+    """A version reserved by another training is skipped"""
+    rng = np.random.default_rng(4)
+    features = rng.normal(size=(50, len(MODEL_FEATURES)))
+    targets = features @ np.linspace(0.1, 0.6, len(MODEL_FEATURES))
+    assert train_model(str(tmp_path), "linear_regression", "AAPL", 1, features, targets, "2024-01-31")["version"] == 1
+
+    store = ModelStore(str(tmp_path))
+    directory = store._directory("linear_regression", "AAPL", 1)
+    # Another training has reserved v2 but not finished writing it
+    open(os.path.join(directory, "v2.npz"), "x").close()
+    assert train_model(str(tmp_path), "linear_regression", "AAPL", 1, features, targets, "2024-02-29")["version"] == 3
+    assert store.latest_version("linear_regression", "AAPL", 1) == 3
+    assert store.load("linear_regression", "AAPL", 1, 3)[1]["version"] == 3
+
+
+def test_concurrent_saves_never_move_latest_back(tmp_path):
+    """LATEST ends at the highest version however concurrent saves interleave"""
+    rng = np.random.default_rng(6)
+    features = rng.normal(size=(30, len(MODEL_FEATURES)))
+    predictor = PREDICTORS["linear_regression"]().fit(features, features.sum(axis=1))
+    stores = [ModelStore(str(tmp_path)) for _ in range(4)]
+
+    def save_many(store):
+        for _ in range(10):
+            store.save("linear_regression", "AAPL", 1, predictor, {})
+
+    threads = [threading.Thread(target=save_many, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stores[0].latest_version("linear_regression", "AAPL", 1) == 40
+
+
+def test_training_job_status_is_shared_between_workers(tmp_path):
+    """A job submitted to one trainer is reported, completed, by another using the same store"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2024-01-01', periods=80)
+    db.add_all([
+        StockFeature(symbol='AAPL', date=day.to_pydatetime(), close_price=100.0,
+                     **{column: float(value) for column, value in zip(MODEL_FEATURES, rng.normal(size=len(MODEL_FEATURES)))})
+        for day in dates
+    ])
+    db.commit()
+    feature_store = FeatureStore(None, WatchlistService())
+    store = ModelStore(str(tmp_path))
+
+    job = ModelTrainer(feature_store, store, max_workers=0).submit(db, ['AAPL', 'MSFT'], 'ridge_regression')
+    assert job['status'] == 'completed'
+    assert [model['symbol'] for model in job['trained']] == ['AAPL']
+    assert job['skipped'] == ['MSFT']
+
+    other_worker = ModelTrainer(feature_store, store, max_workers=0)
+    shared = other_worker.get_job(job['id'])
+    assert shared['status'] == 'completed'
+    assert shared['trained'] == job['trained']
+    assert other_worker.get_job('0' * 12) is None
+    assert store.latest_version('ridge_regression', 'AAPL', 1) == 1
+    db.close()
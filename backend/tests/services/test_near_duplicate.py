@@ -0,0 +1,44 @@
+"""
+Test module for the near-duplicate headline index.
+Checks that LSH candidate lookup keeps the title+date+fuzzy semantics of
+the aggregation step.
+"""
+
+import sys
+import os
+import difflib
+from datetime import datetime
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.near_duplicate import NearDuplicateIndex
+
+DAY = datetime(2025, 7, 27, 10, 0)
+NEXT_DAY = datetime(2025, 7, 28, 10, 0)
+
+def test_matches_fuzzy_variant_on_same_date():
+    """A lightly edited headline on the same date matches the stored one."""
+    index = NearDuplicateIndex()
+    index.add("Tata Elxsi reports strong Q2 results", DAY, "cluster-1")
+    
+    variant = "Tata Elxsi reports strong Q2 result"
+    assert difflib.SequenceMatcher(None, variant.lower(), "tata elxsi reports strong q2 results").ratio() > 0.85
+    assert index.match(variant, DAY.replace(hour=18)) == "cluster-1"
+
+def test_ignores_other_dates_and_unrelated_titles():
+    """Matches are restricted to the same publication date and the 0.85 threshold."""
+    index = NearDuplicateIndex()
+    index.add("Tata Elxsi reports strong Q2 results", DAY, "cluster-1")
+    
+    assert index.match("Tata Elxsi reports strong Q2 results", NEXT_DAY) is None
+    assert index.match("Sensex closes 300 points lower on weak cues", DAY) is None
+
+def test_first_stored_match_wins():
+    """When several stored headlines qualify, the earliest one is returned."""
+    index = NearDuplicateIndex()
+    index.add("Tata Elxsi shares rally 5% after earnings", DAY, "first")
+    index.add("Tata Elxsi shares rally 5% after earnings", DAY, "second")
+    
+    assert index.match("TATA ELXSI shares rally 5% after earnings!", DAY) == "first"
+    assert len(index) == 2
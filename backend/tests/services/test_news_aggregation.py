@@ -0,0 +1,110 @@
+"""
+Tests for the incremental raw -> aggregated news step
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import RSSSource, RawNews, AggregatedNews, PipelineWatermark
+from app.services.news_service import NewsService, AGGREGATION_WATERMARK
+
+DAY = datetime(2024, 3, 1, 9, 0, 0)
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([RSSSource(id=1, url='https://example.com/a', source='Alpha'),
+                RSSSource(id=2, url='https://example.com/b', source='Beta')])
+    db.commit()
+    return db
+
+
+def add_raw(db, link, title, source_id=1, description='', id=None):
+    db.add(RawNews(id=id, rss_source_id=source_id, title=title, description=description,
+                   link=link, published_date=DAY))
+    db.commit()
+
+
+def clusters(db):
+    return {row.title: row.sources for row in db.query(AggregatedNews).order_by(AggregatedNews.id)}
+
+
+def test_second_run_processes_only_new_rows():
+    """A second run leaves aggregated rows alone and only handles raw news added since"""
+    db = make_session()
+    add_raw(db, 'https://example.com/1', 'Tata Elxsi wins a large design contract')
+    service = NewsService()
+
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 1, "created": 1, "merged": 0}
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 0, "created": 0, "merged": 0}
+
+    add_raw(db, 'https://example.com/2', 'Markets close higher on banking gains')
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 1, "created": 1, "merged": 0}
+    assert clusters(db) == {
+        'Tata Elxsi wins a large design contract': ['Alpha'],
+        'Markets close higher on banking gains': ['Alpha'],
+    }
+    db.close()
+
+
+def test_new_row_merges_into_stored_cluster():
+    """A near-duplicate from another source is added to the stored cluster, with its longer description"""
+    db = make_session()
+    add_raw(db, 'https://example.com/1', 'Tata Elxsi wins a large design contract', description='Short')
+    service = NewsService()
+    service.deduplicate_and_store_aggregated_news(db)
+
+    add_raw(db, 'https://example.com/2', 'Tata Elxsi wins large design contract', source_id=2,
+            description='A much longer description of the contract')
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 1, "created": 0, "merged": 1}
+
+    cluster = db.query(AggregatedNews).one()
+    assert cluster.sources == ['Alpha', 'Beta']
+    assert cluster.additional_info == {'source': 'Beta', 'details': 'A much longer description of the contract'}
+    db.close()
+
+
+def test_bootstrap_does_not_recount_existing_clusters():
+    """The first run keeps clusters written by full re-dedup runs as they are"""
+    db = make_session()
+    db.add(AggregatedNews(title='Tata Elxsi wins a large design contract', description='',
+                          published_date=DAY, sources=['Alpha', 'Beta']))
+    db.commit()
+    add_raw(db, 'https://example.com/1', 'Tata Elxsi wins a large design contract')
+    add_raw(db, 'https://example.com/2', 'Tata Elxsi wins large design contract', source_id=2)
+    add_raw(db, 'https://example.com/3', 'Markets close higher on banking gains')
+
+    counts = NewsService().deduplicate_and_store_aggregated_news(db)
+
+    assert counts == {"processed": 3, "created": 1, "merged": 0}
+    assert clusters(db) == {
+        'Tata Elxsi wins a large design contract': ['Alpha', 'Beta'],
+        'Markets close higher on banking gains': ['Alpha'],
+    }
+    assert db.query(PipelineWatermark).filter(PipelineWatermark.name == AGGREGATION_WATERMARK).one().last_id == 3
+    db.close()
+
+
+def test_row_committed_below_watermark_is_not_skipped():
+    """A raw row with an id below the watermark, committed late, is still aggregated"""
+    db = make_session()
+    add_raw(db, 'https://example.com/1', 'Tata Elxsi wins a large design contract', id=1)
+    add_raw(db, 'https://example.com/3', 'Markets close higher on banking gains', id=3)
+    service = NewsService()
+    service.deduplicate_and_store_aggregated_news(db)
+
+    # A concurrent poller commits id 2 after the run above saw id 3
+    add_raw(db, 'https://example.com/2', 'Tata Elxsi wins large design contract', source_id=2, id=2)
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 1, "created": 0, "merged": 1}
+    assert clusters(db)['Tata Elxsi wins a large design contract'] == ['Alpha', 'Beta']
+    assert service.deduplicate_and_store_aggregated_news(db) == {"processed": 0, "created": 0, "merged": 0}
+    db.close()
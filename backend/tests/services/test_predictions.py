@@ -0,0 +1,180 @@
+"""
+Tests for the vectorized trend prediction model and trained-model predictions
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Prediction, PredictionAccuracy, StockPrice
+from app.services.feature_store import FeatureStore
+from app.services.model_store import ModelCache, ModelStore, train_model
+from app.services.prediction_service import PredictionService, TREND_ALGORITHM, simple_trend
+from app.services.predictors import MODEL_FEATURES
+from app.services.stock_service import StockService
+from app.services.watchlist_service import WatchlistService
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def make_service():
+    stock_service = StockService()
+    stock_service.hot_window = None
+    stock_service.price_store = None
+    return PredictionService(stock_service, WatchlistService())
+
+
+def add_prices(db, symbol, closes, last_day):
+    """Store daily bars of `closes` (oldest first) ending at last_day"""
+    db.add_all([
+        StockPrice(symbol=symbol, date=last_day - timedelta(days=len(closes) - 1 - position),
+                   open_price=close, high_price=close, low_price=close, close_price=close, volume=1000)
+        for position, close in enumerate(closes)
+    ])
+    db.commit()
+
+
+def test_simple_trend_matches_per_symbol_rule():
+    closes = np.array([
+        [100.0, 102.0, 101.0],
+        [50.0, 55.0, 60.5],
+        [10.0, 10.0, 10.0],
+    ])
+    predicted, confidence = simple_trend(closes)
+
+    for row, (price, score) in enumerate(zip(predicted, confidence)):
+        changes = [(closes[row][i] - closes[row][i - 1]) / closes[row][i - 1] for i in range(1, 3)]
+        avg_change = sum(changes) / len(changes)
+        assert np.isclose(price, closes[row][-1] * (1 + avg_change))
+        assert np.isclose(score, min(abs(avg_change) * 10, 0.8))
+
+
+def test_repeated_predict_reuses_stored_row():
+    """The same inputs return the stored prediction; a new bar stores a new one"""
+    db = make_session()
+    service = make_service()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = np.array([today - timedelta(days=offset) for offset in (2, 1, 0)], dtype='datetime64[ns]')
+    prices = {'date': dates, 'close_price': np.array([100.0, 102.0, 104.0])}
+
+    first = service.predict(db, 'AAPL', prices, days_ahead=1)
+    again = service.predict(db, 'AAPL', prices, days_ahead=1)
+    assert again.id == first.id
+    assert db.query(Prediction).count() == 1
+
+    next_bar = {
+        'date': np.append(dates[1:], np.datetime64(today + timedelta(days=1), 'ns')),
+        'close_price': np.array([102.0, 104.0, 103.0]),
+    }
+    updated = service.predict(db, 'AAPL', next_bar, days_ahead=1)
+    assert updated.input_version != first.input_version
+    assert updated.id != first.id
+    assert db.query(Prediction).count() == 2
+    db.close()
+
+
+def test_predict_batch_reports_stored_keys_as_reused():
+    """A batch only stores predictions whose inputs changed since the last run"""
+    db = make_session()
+    service = make_service()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    add_prices(db, 'AAPL', [100.0, 101.0, 102.0], today - timedelta(days=1))
+    add_prices(db, 'MSFT', [200.0, 198.0, 196.0], today - timedelta(days=1))
+    add_prices(db, 'NEW', [10.0], today)
+
+    first = service.predict_batch(db, ['AAPL', 'MSFT', 'NEW'])
+    assert sorted(first['predicted']) == ['AAPL', 'MSFT']
+    assert first['skipped'] == ['NEW']
+
+    add_prices(db, 'MSFT', [195.0], today)
+    second = service.predict_batch(db, ['AAPL', 'MSFT', 'NEW'])
+    assert second['reused'] == ['AAPL']
+    assert second['predicted'] == ['MSFT']
+    assert db.query(Prediction).count() == 3
+    db.close()
+
+
+def test_backfill_accuracy_resolves_with_next_bar():
+    """Targets resolve with the first close on or after them, within ACCURACY_MATCH_DAYS"""
+    db = make_session()
+    service = make_service()
+    for day, close in [(datetime(2024, 3, 1), 100.0), (datetime(2024, 3, 4), 110.0), (datetime(2024, 3, 20), 120.0)]:
+        db.add(StockPrice(symbol='AAPL', date=day, open_price=close, high_price=close, low_price=close,
+                          close_price=close, volume=1000))
+    predictions = {
+        'friday': Prediction(stock_symbol='AAPL', prediction_date=datetime(2024, 3, 1), predicted_price=90.0,
+                             algorithm_used=TREND_ALGORITHM, days_ahead=1, input_version='a'),
+        # Saturday: resolved with Monday's close
+        'saturday': Prediction(stock_symbol='AAPL', prediction_date=datetime(2024, 3, 2), predicted_price=105.0,
+                               algorithm_used=TREND_ALGORITHM, days_ahead=1, input_version='b'),
+        # No close within ACCURACY_MATCH_DAYS: stays pending
+        'gap': Prediction(stock_symbol='AAPL', prediction_date=datetime(2024, 3, 10), predicted_price=115.0,
+                          algorithm_used=TREND_ALGORITHM, days_ahead=1, input_version='c'),
+    }
+    db.add_all(predictions.values())
+    db.commit()
+
+    assert service.backfill_accuracy(db) == {"resolved": 2, "pending": 1}
+    for prediction in predictions.values():
+        db.refresh(prediction)
+    assert predictions['friday'].actual_price == 100.0
+    assert predictions['friday'].accuracy == 0.9
+    assert predictions['saturday'].actual_price == 110.0
+    assert np.isclose(predictions['saturday'].accuracy, round(1 - 5 / 110, 4))
+    assert predictions['gap'].actual_price is None
+
+    # Nothing new to resolve on a second run
+    assert service.backfill_accuracy(db) == {"resolved": 0, "pending": 1}
+
+    summary = db.query(PredictionAccuracy).one()
+    assert (summary.stock_symbol, summary.algorithm_used, summary.sample_count) == ('AAPL', TREND_ALGORITHM, 2)
+    assert np.isclose(summary.mean_accuracy, (0.9 + round(1 - 5 / 110, 4)) / 2)
+    assert np.isclose(summary.mean_absolute_error, 7.5)
+    assert np.isclose(summary.mean_absolute_percentage_error, (10 / 100 + 5 / 110) / 2)
+    assert service.get_historical_accuracy(db, 'AAPL') == summary.mean_accuracy
+    assert service.get_historical_accuracy(db, 'MSFT') is None
+    db.close()
+
+
+def test_model_prediction_rejects_stale_features(tmp_path):
+    """Trained-model predictions use current feature vectors only and are memoized"""
+    db = make_session()
+    service = make_service()
+    service.feature_store = FeatureStore(service.stock_service, service.watchlist_service)
+    service.model_cache = ModelCache(ModelStore(str(tmp_path)))
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    add_prices(db, 'AAPL', list(100 + np.sin(np.arange(60))), today - timedelta(days=1))
+    # Varying volume, so the volume z-score is defined
+    for position, price in enumerate(db.query(StockPrice).order_by(StockPrice.date)):
+        price.volume = 1000 + (position * 37) % 200
+    db.commit()
+    service.feature_store.update(db, ['AAPL'])
+
+    assert service.predict_with_model(db, 'AAPL', 1, 'linear_regression') is None
+    rng = np.random.default_rng(5)
+    features = rng.normal(size=(50, len(MODEL_FEATURES)))
+    train_model(str(tmp_path), 'linear_regression', 'AAPL', 1, features, features @ np.full(len(MODEL_FEATURES), 0.01),
+                today.date().isoformat())
+
+    prediction = service.predict_with_model(db, 'AAPL', 1, 'linear_regression')
+    assert prediction.algorithm_used == 'linear_regression'
+    assert prediction.prediction_date == today + timedelta(days=1)
+    assert service.predict_with_model(db, 'AAPL', 1, 'linear_regression').id == prediction.id
+
+    # A new bar without recomputed features leaves the stored vector a day behind
+    add_prices(db, 'AAPL', [101.0], today)
+    assert service.predict_with_model(db, 'AAPL', 1, 'linear_regression') is None
+    service.feature_store.update(db, ['AAPL'])
+    assert service.predict_with_model(db, 'AAPL', 1, 'linear_regression').id != prediction.id
+    db.close()
@@ -0,0 +1,84 @@
+"""
+Tests for the Parquet price store
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import threading
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.services.price_store import ParquetPriceStore
+from app.services.stock_service import StockService
+
+
+def make_prices(symbol, start, days, close=100.0):
+    dates = pd.date_range(start, periods=days)
+    return pd.DataFrame({
+        'symbol': symbol, 'date': dates,
+        'open_price': close, 'high_price': close + 1, 'low_price': close - 1,
+        'close_price': close, 'volume': 1000,
+    })
+
+
+def test_write_merges_by_date_across_years(tmp_path):
+    """Rows replace stored rows of the same date and partitions split by year"""
+    store = ParquetPriceStore(str(tmp_path))
+    assert store.write(make_prices('AAPL', '2023-12-30', 4)) == 2
+    assert store.write(make_prices('AAPL', '2024-01-01', 3, close=200.0)) == 1
+
+    prices = store.read('AAPL')
+    assert list(prices['close_price']) == [100, 100, 200, 200, 200]
+    assert list(store.read('AAPL', start_date=pd.Timestamp('2024-01-02'))['close_price']) == [200, 200]
+    assert store.read('MSFT').empty
+    assert not [name for name in os.listdir(tmp_path / 'symbol=AAPL' / 'year=2024') if name.endswith('.tmp')]
+
+
+def test_concurrent_writers_keep_every_row(tmp_path):
+    """Writers with separate in-process locks are serialized by the file lock"""
+    stores = [ParquetPriceStore(str(tmp_path)) for _ in range(2)]
+
+    def write_days(store, offset):
+        for day in range(offset, 40, 2):
+            store.write(make_prices('AAPL', pd.Timestamp('2024-01-01') + pd.Timedelta(days=day), 1))
+
+    threads = [threading.Thread(target=write_days, args=(store, offset)) for offset, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stores[0].read('AAPL')) == 40
+
+
+def test_failed_sync_falls_back_to_sql_until_resynced(tmp_path):
+    """After a failed store write reads come from SQL, and the next write resyncs the symbol"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    service = StockService()
+    service.hot_window = None
+    service.price_store = ParquetPriceStore(str(tmp_path))
+    today = pd.Timestamp.now().normalize()
+
+    assert service.save_stock_data_to_db(db, make_prices('AAPL', today - pd.Timedelta(days=5), 3))
+    assert service.price_store.has_symbol('AAPL')
+
+    write = service.price_store.write
+    def failing_write(prices):
+        raise OSError("disk full")
+    service.price_store.write = failing_write
+    assert service.save_stock_data_to_db(db, make_prices('AAPL', today - pd.Timedelta(days=2), 1, close=150.0))
+    assert not service.price_store.has_symbol('AAPL')
+    assert list(service.get_stock_history_frame(db, 'AAPL', 30)['close_price']) == [100, 100, 100, 150]
+
+    service.price_store.write = write
+    assert service.save_stock_data_to_db(db, make_prices('AAPL', today - pd.Timedelta(days=1), 1, close=160.0))
+    assert service.price_store.has_symbol('AAPL')
+    assert list(service.price_store.read('AAPL')['close_price']) == [100, 100, 100, 150, 160]
+    db.close()
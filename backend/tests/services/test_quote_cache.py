@@ -0,0 +1,67 @@
+"""
+Test module for the quote cache.
+Checks single-flight loading, stale-while-revalidate and LRU eviction.
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.quote_cache import QuoteCache
+
+def test_concurrent_misses_share_one_load():
+    """Concurrent misses for one key wait on a single load"""
+    cache = QuoteCache(ttl=60, stale_ttl=0, max_entries=8)
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return {"current_price": 100.0}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("TATAELXSI.NS", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"current_price": 100.0}] * 8
+
+def test_stale_value_is_served_while_refreshing():
+    """An expired value is served while one background refresh replaces it"""
+    cache = QuoteCache(ttl=0.05, stale_ttl=60, max_entries=8)
+    assert cache.get("INFY.NS", lambda: 1) == 1
+    time.sleep(0.1)
+
+    refreshed = threading.Event()
+    def slow_loader():
+        time.sleep(0.1)
+        refreshed.set()
+        return 2
+
+    assert cache.get("INFY.NS", slow_loader) == 1
+    assert refreshed.wait(2)
+    time.sleep(0.05)
+    assert cache.get("INFY.NS", lambda: 3) == 2
+
+def test_failed_loads_are_not_cached_and_lru_evicts():
+    """None results are not cached and the least recently used key is evicted"""
+    cache = QuoteCache(ttl=60, stale_ttl=0, max_entries=2)
+    assert cache.get("A", lambda: None) is None
+    assert cache.get("A", lambda: "a") == "a"
+    cache.get("B", lambda: "b")
+    cache.get("A", lambda: "unused")
+    cache.get("C", lambda: "c")
+
+    assert len(cache) == 2
+    assert cache.get("A", lambda: "reloaded") == "a"
+    assert cache.get("B", lambda: "reloaded") == "reloaded"
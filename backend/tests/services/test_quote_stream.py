@@ -0,0 +1,96 @@
+"""
+Tests for the live quote broadcaster
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import asyncio
+
+from app.services.quote_stream import QuoteBroadcaster
+
+
+class FakeStockService:
+    """Serves queued quotes per symbol and counts upstream calls"""
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+        self.calls = []
+
+    def refresh_current_price(self, symbol):
+        self.calls.append(symbol)
+        quotes = self.quotes[symbol]
+        return quotes.pop(0) if len(quotes) > 1 else quotes[0]
+
+
+def make_broadcaster(quotes):
+    broadcaster = QuoteBroadcaster(FakeStockService(quotes))
+    broadcaster.interval = 0.01
+    return broadcaster
+
+
+def test_one_poller_per_symbol_and_snapshot_for_late_subscribers():
+    """Clients share a symbol's poller and a late subscriber starts with a snapshot"""
+    async def scenario():
+        broadcaster = make_broadcaster({'AAPL': [{'symbol': 'AAPL', 'current_price': 100.0}]})
+        first, second = broadcaster.new_queue(), broadcaster.new_queue()
+        broadcaster.subscribe('AAPL', first)
+        first_message = await asyncio.wait_for(first.get(), 2)
+        broadcaster.subscribe('AAPL', second)
+        second_message = second.get_nowait()
+        pollers = len(broadcaster._pollers)
+        await broadcaster.stop()
+        return first_message, second_message, pollers
+
+    first_message, second_message, pollers = asyncio.run(scenario())
+    assert first_message == {'type': 'snapshot', 'symbol': 'AAPL', 'quote': {'symbol': 'AAPL', 'current_price': 100.0}}
+    assert second_message == first_message
+    assert pollers == 1
+
+
+def test_only_changed_fields_are_sent():
+    """Quotes after the snapshot are sent as deltas, and unchanged quotes not at all"""
+    async def scenario():
+        broadcaster = make_broadcaster({'AAPL': [
+            {'current_price': 100.0, 'volume': 10, 'last_updated': 't1'},
+            {'current_price': 100.0, 'volume': 10, 'last_updated': 't2'},
+            {'current_price': 101.0, 'volume': 10, 'last_updated': 't3'},
+        ]})
+        queue = broadcaster.new_queue()
+        broadcaster.subscribe('AAPL', queue)
+        messages = [await asyncio.wait_for(queue.get(), 2) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        await broadcaster.stop()
+        return messages, queue.empty()
+
+    messages, empty = asyncio.run(scenario())
+    assert messages[0]['type'] == 'snapshot'
+    assert messages[1] == {'type': 'delta', 'symbol': 'AAPL', 'changes': {'current_price': 101.0, 'last_updated': 't3'}}
+    assert empty
+
+
+def test_poller_stops_after_last_unsubscribe():
+    """The poller runs until its last subscriber leaves, then upstream calls stop"""
+    async def scenario():
+        broadcaster = make_broadcaster({'AAPL': [{'current_price': 100.0}]})
+        first, second = broadcaster.new_queue(), broadcaster.new_queue()
+        broadcaster.subscribe('AAPL', first)
+        broadcaster.subscribe('AAPL', second)
+        poller = broadcaster._pollers['AAPL']
+
+        broadcaster.unsubscribe('AAPL', first)
+        await asyncio.sleep(0.03)
+        assert not poller.done() and broadcaster.subscriber_count('AAPL') == 1
+
+        broadcaster.unsubscribe('AAPL', second)
+        await asyncio.gather(poller, return_exceptions=True)
+        calls = len(broadcaster.stock_service.calls)
+        await asyncio.sleep(0.03)
+        return poller, calls, len(broadcaster.stock_service.calls), broadcaster
+
+    poller, calls, later_calls, broadcaster = asyncio.run(scenario())
+    assert poller.cancelled()
+    assert calls == later_calls
+    assert broadcaster.subscriber_count('AAPL') == 0
+    assert 'AAPL' not in broadcaster._pollers and 'AAPL' not in broadcaster._latest
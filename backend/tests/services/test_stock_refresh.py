@@ -0,0 +1,124 @@
+"""
+Tests for incremental, batched stock refreshes and the price upsert
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import StockPrice
+from app.services.bulk_writer import upsert_rows
+from app.services.market_data import ReplayProvider
+from app.services.stock_service import StockService
+
+TODAY = datetime.combine(datetime.now().date(), datetime.min.time())
+
+
+def make_session(dialect_name=None):
+    engine = create_engine("sqlite://")
+    if dialect_name is not None:
+        # Takes the generic select-then-update path of upsert_rows on SQLite
+        engine.dialect.name = dialect_name
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def write_history(root, symbol, closes):
+    """Replay fixture of daily bars of `closes`, the last one dated today"""
+    os.makedirs(os.path.join(root, "history"), exist_ok=True)
+    pd.DataFrame({
+        'Date': [TODAY - timedelta(days=len(closes) - 1 - position) for position in range(len(closes))],
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+        'Volume': [1000] * len(closes),
+    }).to_csv(os.path.join(root, "history", f"{symbol}.csv"), index=False)
+
+
+def make_service(root):
+    service = StockService(provider=ReplayProvider(root=str(root), latency=0, error_rate=0))
+    service.hot_window = None
+    service.price_store = None
+    service.historical_days = 10
+    downloads = []
+    download = service.provider.download
+
+    def recording_download(symbols, start_date, end_date):
+        downloads.append((list(symbols), start_date))
+        return download(symbols, start_date, end_date)
+
+    service.provider.download = recording_download
+    return service, downloads
+
+
+def price_row(close, date=TODAY):
+    return {'symbol': 'AAPL', 'date': date, 'open_price': close, 'high_price': close,
+            'low_price': close, 'close_price': close, 'volume': 1000}
+
+
+@pytest.mark.parametrize("dialect_name", [None, "generic"])
+def test_upsert_updates_existing_rows(dialect_name):
+    """Re-saving a bar updates it in place, with ON CONFLICT or the select-then-update fallback"""
+    db = make_session(dialect_name)
+    assert upsert_rows(db, StockPrice, [price_row(100.0)], ['symbol', 'date'], ['close_price', 'volume']) == 1
+    db.commit()
+
+    rows = [price_row(101.0), price_row(102.0), price_row(90.0, TODAY - timedelta(days=1))]
+    assert upsert_rows(db, StockPrice, rows, ['symbol', 'date'], ['close_price', 'volume']) == 2
+    db.commit()
+
+    prices = {price.date: price for price in db.query(StockPrice)}
+    assert len(prices) == 2
+    assert prices[TODAY].close_price == 102.0
+    assert prices[TODAY].updated_at is not None
+    assert prices[TODAY - timedelta(days=1)].close_price == 90.0
+    db.close()
+
+
+def test_refresh_fetches_from_latest_stored_day(tmp_path):
+    """A stored symbol is fetched from its last day, and its revised last bar replaces the stored one"""
+    write_history(str(tmp_path), 'AAPL', [100.0, 101.0, 102.0, 103.0, 104.0])
+    service, downloads = make_service(tmp_path)
+    db = make_session()
+    stored = service._prepare_history(
+        service.provider._slice('AAPL', TODAY - timedelta(days=10), TODAY - timedelta(days=1)), 'AAPL'
+    )
+    stored.loc[stored.index[-1], 'close_price'] = 99.0  # an intraday bar, revised since
+    assert service.save_stock_data_to_db(db, stored)
+
+    result = service.update_stocks_data(db, ['AAPL'])
+
+    assert result == {"updated": ['AAPL'], "failed": [], "rows": 3}
+    assert downloads == [(['AAPL'], TODAY - timedelta(days=2))]
+    closes = [price.close_price for price in db.query(StockPrice).order_by(StockPrice.date)]
+    assert closes == [100.0, 101.0, 102.0, 103.0, 104.0]
+    db.close()
+
+
+def test_refresh_groups_by_start_date_and_splits_batches(tmp_path):
+    """Symbols sharing a start date are downloaded together, in batches of STOCK_DOWNLOAD_BATCH_SIZE"""
+    for symbol in ['AAPL', 'MSFT', 'GOOG', 'INFY']:
+        write_history(str(tmp_path), symbol, [100.0, 101.0, 102.0])
+    service, downloads = make_service(tmp_path)
+    service.download_batch_size = 2
+    db = make_session()
+    assert service.save_stock_data_to_db(db, service._prepare_history(
+        service.provider._slice('AAPL', TODAY - timedelta(days=10), TODAY), 'AAPL'
+    ))
+
+    result = service.update_stocks_data(db, ['AAPL', 'MSFT', 'GOOG', 'INFY', 'MISSING'])
+
+    assert result['updated'] == ['AAPL', 'MSFT', 'GOOG', 'INFY']
+    assert result['failed'] == ['MISSING']
+    assert downloads[0] == (['AAPL'], TODAY - timedelta(days=1))
+    assert [symbols for symbols, _ in downloads[1:]] == [['MSFT', 'GOOG'], ['INFY', 'MISSING']]
+    # First loads cover the full historical window
+    assert all(start_date < TODAY - timedelta(days=9) for _, start_date in downloads[1:])
+    assert db.query(StockPrice).count() == 12
+    db.close()
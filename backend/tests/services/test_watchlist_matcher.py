@@ -0,0 +1,51 @@
+"""
+Test module for the watchlist news matcher.
+Checks single-pass tagging of news items with every symbol they mention.
+"""
+
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.services.watchlist_service import WatchlistMatcher, default_aliases
+
+WATCHLIST = {
+    "TATAELXSI.NS": default_aliases("TATAELXSI.NS", "Tata Elxsi") + ["elxsi"],
+    "TATAMOTORS.NS": default_aliases("TATAMOTORS.NS", "Tata Motors") + ["tata"],
+    "INFY.NS": default_aliases("INFY.NS", "Infosys"),
+}
+
+def test_tags_every_matching_symbol():
+    """A headline mentioning several stocks is tagged with all of them, in watchlist order."""
+    matcher = WatchlistMatcher(WATCHLIST)
+    assert matcher.match("Infosys and Tata Elxsi lead IT rally") == ["TATAELXSI.NS", "INFY.NS"]
+    assert matcher.match("TATAMOTORS hits 52-week high") == ["TATAMOTORS.NS"]
+
+def test_matches_whole_words_only():
+    """Aliases must appear as whole words; the longest alias wins at a position."""
+    matcher = WatchlistMatcher(WATCHLIST)
+    assert matcher.match("Elxsis and infosystems are not stocks") == []
+    # "tata elxsi" is consumed as one alias, so the shorter "tata" does not fire
+    assert matcher.match("Tata Elxsi Q2 results") == ["TATAELXSI.NS"]
+
+def test_tag_sets_related_stocks_and_filters():
+    """tag() annotates every item and returns only the related ones."""
+    matcher = WatchlistMatcher(WATCHLIST)
+    items = [
+        {"title": "Sensex ends flat", "description": "Broader markets mixed"},
+        {"title": "Block deal in Infosys", "description": None},
+    ]
+    tagged = matcher.tag(items)
+    assert tagged == [items[1]]
+    assert items[0]["related_stocks"] == []
+    assert items[1]["related_stocks"] == ["INFY.NS"]
+
+def test_whitespace_in_text_is_normalized():
+    """Runs of spaces and line breaks inside a multi-word alias still match it."""
+    matcher = WatchlistMatcher(WATCHLIST)
+    assert matcher.match("Tata  Elxsi\tQ2 results") == ["TATAELXSI.NS"]
+    items = [{"title": "Order win for Tata", "description": "Elxsi design arm"}]
+    assert matcher.tag(items) == items
+    assert items[0]["related_stocks"] == ["TATAELXSI.NS"]